@@ -14,13 +14,15 @@ from django.http import Http404, HttpResponseRedirect
 from django.template.response import TemplateResponse
 from django.urls import path, reverse
 from django.utils.decorators import method_decorator
-from django.utils.html import escape
+from django.utils.html import escape, format_html
 from django.utils.translation import gettext
 from django.utils.translation import gettext_lazy as _
 from django.views.decorators.csrf import csrf_protect
 from django.views.decorators.debug import sensitive_post_parameters
 
-from accounts.models import File, User
+from accounts.enums import FileJobAction
+from accounts.models import File, FileJob, OutgoingEmail, User
+from utils.admin import ScalableAdminMixin
 
 
 csrf_protect_m = method_decorator(csrf_protect)
@@ -28,7 +30,7 @@ sensitive_post_parameters_m = method_decorator(sensitive_post_parameters())
 
 
 @admin.register(File)
-class FileAdmin(admin.ModelAdmin):
+class FileAdmin(ScalableAdminMixin, admin.ModelAdmin):
     MAX_ADMIN_FIELD_LENGTH: int = 16
 
     readonly_fields = (
@@ -46,6 +48,12 @@ class FileAdmin(admin.ModelAdmin):
         'owner',
         'file_name',
     )
+    list_select_related = (
+        'owner',
+    )
+    raw_id_fields = (
+        'owner',
+    )
     fieldsets = (
         (
             None, {
@@ -72,15 +80,53 @@ class FileAdmin(admin.ModelAdmin):
             }
         ),
     )
-    search_fields = (
-        'owner__username',
-        'owner__first_name',
-        'owner__last_name',
-        'sha256',
-        'original_full_name',
-        'ip',
+    search_lookups = {
+        'sha256': 'sha256__startswith',
+        'ip': 'ip',
+        'user': 'owner__username',
+    }
+    default_search_lookup = 'url_path'
+    search_help_text = _('URL path, sha256:<hash prefix>, ip:<address> or user:<username>')
+    actions = (
+        'queue_delete',
+        'queue_sniff_content_type',
+        'queue_recompute_sha256',
+        'queue_regenerate_metadata',
     )
 
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        # Collector deletes objects one by one inside the request, ``queue_delete`` is used instead.
+        actions.pop('delete_selected', None)
+
+        return actions
+
+    def queue_job(self, request, queryset, action: FileJobAction) -> None:
+        job: FileJob = FileJob.enqueue(action, queryset, user=request.user)
+        url: str = reverse('admin:accounts_filejob_change', args=(job.pk,))
+
+        self.message_user(
+            request,
+            format_html(_('Job <a href="{}">{}</a> is queued for {} files.'), url, job, job.total),
+            messages.SUCCESS
+        )
+
+    @admin.action(description=_('Delete selected files in background'), permissions=['delete'])
+    def queue_delete(self, request, queryset):
+        self.queue_job(request, queryset, FileJobAction.DELETE)
+
+    @admin.action(description=_('Re-sniff content type in background'), permissions=['change'])
+    def queue_sniff_content_type(self, request, queryset):
+        self.queue_job(request, queryset, FileJobAction.SNIFF_CONTENT_TYPE)
+
+    @admin.action(description=_('Recompute sha256 in background'), permissions=['change'])
+    def queue_recompute_sha256(self, request, queryset):
+        self.queue_job(request, queryset, FileJobAction.RECOMPUTE_SHA256)
+
+    @admin.action(description=_('Regenerate metadata in background'), permissions=['change'])
+    def queue_regenerate_metadata(self, request, queryset):
+        self.queue_job(request, queryset, FileJobAction.REGENERATE_METADATA)
+
     def file_hash(self, obj: File) -> str:
         return obj.sha256[:self.MAX_ADMIN_FIELD_LENGTH]
 
@@ -293,3 +339,42 @@ class UserAdmin(admin.ModelAdmin):
             request.POST['_continue'] = 1
 
         return super().response_add(request, obj, post_url_continue)
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'status', 'attempts', 'date_created', 'date_sent')
+    list_filter = ('status',)
+    readonly_fields = ('date_created', 'date_sent')
+
+
+@admin.register(FileJob)
+class FileJobAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'status', 'progress_percent', 'processed', 'failed', 'total', 'date_created')
+    list_filter = ('status', 'action')
+    list_select_related = ('created_by',)
+    exclude = ('file_ids',)
+    readonly_fields = (
+        'action',
+        'status',
+        'progress_percent',
+        'total',
+        'processed',
+        'failed',
+        'last_error',
+        'created_by',
+        'date_created',
+        'date_started',
+        'date_finished',
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.display(description=_('Progress'))
+    def progress_percent(self, obj: FileJob) -> str:
+        return '%.1f%%' % obj.progress
+
+    def get_queryset(self, request):
+        # Ids of the files can be megabytes, they are never displayed.
+        return super().get_queryset(request).defer('file_ids')
@@ -0,0 +1,10 @@
+from django.contrib.auth.backends import ModelBackend
+
+from accounts.caches import UserCache
+
+
+class CachedModelBackend(ModelBackend):
+    """Model backend resolving users of the sessions from ``accounts.caches.UserCache``."""
+
+    def get_user(self, user_id):
+        return UserCache(user_id).get_or_set(lambda: super(CachedModelBackend, self).get_user(user_id))
@@ -0,0 +1,178 @@
+import datetime
+from typing import Callable, Iterable, Optional
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from accounts.dataclasses import SignedURLReturnObject
+
+
+class SignedURLCache:
+    """Cache of the already signed URLs.
+
+    All signed URLs of the file are stored under one key, so the file URLs can be evicted
+    with one call. Each URL is keyed by method, expiration and extra parameters, for example
+    content disposition, and returned while it has at least ``min_lifetime_ratio`` of
+    the expiration time left, so the client always gets reasonable time to use the URL.
+    """
+    KEY_PREFIX: str = 'signed_urls'
+    min_lifetime_ratio: float = 0.5
+
+    def __init__(self, file_id: int):
+        self.file_id = file_id
+
+    @property
+    def key(self) -> str:
+        return '%s:%s' % (self.KEY_PREFIX, self.file_id)
+
+    @staticmethod
+    def get_url_key(method: str, expiration: int, *parts) -> str:
+        return ':'.join(str(part) for part in (method, expiration) + parts)
+
+    def get_or_set(
+            self,
+            method: str,
+            expiration: int,
+            generate: Callable[[], SignedURLReturnObject],
+            *parts
+    ) -> SignedURLReturnObject:
+        """Returns cached signed URL or generates new one.
+
+        Args:
+            method (str): HTTP method of the signed URL.
+            expiration (int): Expiration time of the signed URL in seconds.
+            generate (Callable): Generates signed URL if there is no suitable URL in the cache.
+            *parts: Extra parameters that change the signed URL.
+
+        Returns:
+            accounts.dataclasses.SignedURLReturnObject: Signed URL with expiration date.
+        """
+        url_key: str = self.get_url_key(method, expiration, *parts)
+        now: datetime.datetime = timezone.now()
+        min_lifetime = datetime.timedelta(seconds=expiration * self.min_lifetime_ratio)
+        urls: dict = cache.get(self.key) or {}
+        signed_url: Optional[SignedURLReturnObject] = urls.get(url_key)
+
+        if signed_url is not None and signed_url.expires_at - now >= min_lifetime:
+            return signed_url
+
+        signed_url = generate()
+        signed_url.expires_at = now + datetime.timedelta(seconds=expiration)
+
+        # Drop expired URLs, so the entry does not grow.
+        urls = {_key: _url for _key, _url in urls.items() if _url.expires_at > now}
+        urls[url_key] = signed_url
+        timeout = max(_url.expires_at for _url in urls.values()) - now
+        cache.set(self.key, urls, timeout=int(timeout.total_seconds()))
+
+        return signed_url
+
+    def evict(self) -> None:
+        cache.delete(self.key)
+
+    @classmethod
+    def evict_many(cls, file_ids: Iterable[int]) -> None:
+        cache.delete_many([cls(file_id).key for file_id in file_ids])
+
+
+class EntitlementCache:
+    """Cache of the user entitlements: metadata of the active subscription product.
+
+    Users without an active subscription are cached as well, so the default limits don't cost
+    a query either. Entries are evicted when subscriptions of the user are changed or expired
+    by ``sweep_subscriptions`` command.
+
+    Subscriptions are changed by the worker commands, so the cache must be shared with the web
+    processes, see ``base.checks.check_shared_cache``.
+    """
+    KEY_PREFIX: str = 'entitlements'
+    timeout: int = 60 * 60
+
+    def __init__(self, user_id: int):
+        self.user_id = user_id
+
+    @property
+    def key(self) -> str:
+        return '%s:%s' % (self.KEY_PREFIX, self.user_id)
+
+    def get_or_set(self, load: Callable[[], Optional[dict]]) -> Optional[dict]:
+        """Returns cached entitlements or loads them.
+
+        Args:
+            load (Callable): Returns metadata of the active subscription product or None.
+
+        Returns:
+            dict: Subscription metadata, None if the user doesn't have an active subscription.
+        """
+        entry: Optional[dict] = cache.get(self.key)
+
+        if entry is None:
+            entry = {'metadata': load()}
+            cache.set(self.key, entry, timeout=self.timeout)
+
+        return entry['metadata']
+
+    def evict(self) -> None:
+        cache.delete(self.key)
+
+    @classmethod
+    def evict_many(cls, user_ids: Iterable[int]) -> None:
+        cache.delete_many([cls(user_id).key for user_id in user_ids])
+
+
+class UserCache:
+    """Cache of the users resolved by the session and JWT authentication.
+
+    User is stored under the key with the version stamp of the user, every change of the user
+    replaces the stamp. A user loaded concurrently with the change is stored under the old stamp,
+    so it's never returned after the change.
+    """
+    KEY_PREFIX: str = 'users'
+    timeout: int = 15 * 60
+    version_timeout: int = 24 * 60 * 60
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+
+    @property
+    def version_key(self) -> str:
+        return '%s:version:%s' % (self.KEY_PREFIX, self.user_id)
+
+    def get_version(self) -> str:
+        version: Optional[str] = cache.get(self.version_key)
+
+        if version is None:
+            version = uuid4().hex
+
+            if not cache.add(self.version_key, version, timeout=self.version_timeout):
+                version = cache.get(self.version_key, version)
+
+        return version
+
+    def get_or_set(self, load: Callable):
+        """Returns cached user or loads it.
+
+        Args:
+            load (Callable): Returns user or None, None is not cached.
+
+        Returns:
+            accounts.models.User: User or None.
+        """
+        key: str = '%s:%s:%s' % (self.KEY_PREFIX, self.user_id, self.get_version())
+        user = cache.get(key)
+
+        if user is None:
+            user = load()
+
+            if user is not None:
+                cache.set(key, user, timeout=self.timeout)
+
+        return user
+
+    def invalidate(self) -> None:
+        cache.set(self.version_key, uuid4().hex, timeout=self.version_timeout)
+
+    @classmethod
+    def invalidate_many(cls, user_ids: Iterable) -> None:
+        cache.set_many({cls(user_id).version_key: uuid4().hex for user_id in user_ids}, timeout=cls.version_timeout)
@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+import datetime
 from typing import Union
 
 from base.dataclasses import DataClassBase
@@ -11,3 +12,4 @@ class SignedURLReturnObject(DataClassBase):
     headers: Union[dict, None]
     method: str
     body: Union[dict, None]
+    expires_at: Union[datetime.datetime, None] = None
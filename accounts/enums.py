@@ -27,3 +27,38 @@ class UploadStatus(Enum):
     """Upload status"""
     PENDING = 'PENDING'
     DONE = 'DONE'
+
+
+class ContentDisposition(Enum):
+    """Content disposition of the downloaded file"""
+    ATTACHMENT = 'attachment'
+    INLINE = 'inline'
+
+
+class SendfileBackend(Enum):
+    """Front server which sends local files"""
+    NGINX = 'nginx'
+    XSENDFILE = 'xsendfile'
+    UWSGI = 'uwsgi'
+
+
+class OutgoingEmailStatus(Enum):
+    """Delivery status of the outgoing email"""
+    PENDING = 'PENDING'
+    SENT = 'SENT'
+    FAILED = 'FAILED'
+
+
+class FileJobAction(Enum):
+    """Bulk action of the background file job"""
+    DELETE = 'DELETE'
+    SNIFF_CONTENT_TYPE = 'SNIFF_CONTENT_TYPE'
+    RECOMPUTE_SHA256 = 'RECOMPUTE_SHA256'
+    REGENERATE_METADATA = 'REGENERATE_METADATA'
+
+
+class FileJobStatus(Enum):
+    """Progress status of the background file job"""
+    PENDING = 'PENDING'
+    RUNNING = 'RUNNING'
+    DONE = 'DONE'
@@ -8,3 +8,7 @@ class SafeRandomStringNotGenerated(Exception):
 
 class NotAllowed(Exception):
     """Action in view is not allowed"""
+
+
+class ReservationExceeded(Exception):
+    """Uploaded file is bigger than the reserved storage"""
@@ -0,0 +1,10 @@
+from accounts.models import FileJob
+from base.workers import BatchWorkerCommand
+
+
+class Command(BatchWorkerCommand):
+    help = 'Processes bulk file jobs queued from the admin panel.'
+    default_batch_size = 500
+
+    def process_batch(self, batch_size: int, **options) -> int:
+        return FileJob.process_pending(batch_size=batch_size)
@@ -0,0 +1,35 @@
+from django.core.mail import get_connection
+
+from accounts.models import close_email_connection, OutgoingEmail
+from base.workers import BatchWorkerCommand
+
+
+class Command(BatchWorkerCommand):
+    help = 'Sends emails from the outbox over one SMTP connection.'
+    default_batch_size = 100
+    default_interval = 1
+
+    connection = None
+
+    def process_batch(self, batch_size: int, **options) -> int:
+        if self.connection is None:
+            self.connection = get_connection()
+
+        self.check_connection()
+
+        return OutgoingEmail.send_pending(self.connection, batch_size=batch_size)
+
+    def check_connection(self) -> None:
+        """Closes SMTP connection dropped by the server while the worker was idle."""
+        smtp = getattr(self.connection, 'connection', None)
+
+        if smtp is None:
+            return
+
+        try:
+            status, _message = smtp.noop()
+        except Exception:
+            status = None
+
+        if status != 250:
+            close_email_connection(self.connection)
@@ -0,0 +1,10 @@
+from accounts.models import UploadReservation
+from base.workers import BatchWorkerCommand
+
+
+class Command(BatchWorkerCommand):
+    help = 'Releases expired upload reservations.'
+    default_interval = 60
+
+    def process_batch(self, batch_size: int, **options) -> int:
+        return UploadReservation.sweep(batch_size=batch_size)
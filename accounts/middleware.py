@@ -0,0 +1,20 @@
+from django.contrib.auth import BACKEND_SESSION_KEY
+from django.utils.deprecation import MiddlewareMixin
+
+
+LEGACY_BACKENDS = (
+    'django.contrib.auth.backends.ModelBackend',
+)
+BACKEND = 'accounts.backends.CachedModelBackend'
+
+
+class LegacySessionBackendMiddleware(MiddlewareMixin):
+    """Moves sessions created with the legacy authentication backends to ``CachedModelBackend``.
+
+    Legacy backends are not in ``AUTHENTICATION_BACKENDS``, so failed logins don't check the password
+    twice. Every session is updated once, must be placed before ``AuthenticationMiddleware``.
+    """
+
+    def process_request(self, request):
+        if request.session.get(BACKEND_SESSION_KEY) in LEGACY_BACKENDS:
+            request.session[BACKEND_SESSION_KEY] = BACKEND
@@ -0,0 +1,54 @@
+# Generated by Django 4.1.3 on 2026-10-19 17:44
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def populate_used_storage(apps, schema_editor):
+    User = apps.get_model('accounts', 'User')
+    File = apps.get_model('accounts', 'File')
+
+    used_storage = File.objects.exclude(owner=None).exclude(size=None).order_by().values('owner').annotate(
+        total=models.Sum('size')
+    )
+
+    for row in used_storage:
+        User.objects.filter(pk=row['owner']).update(used_storage=row['total'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0019_alter_user_is_active'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='reserved_storage',
+            field=models.BigIntegerField(default=0, editable=False, verbose_name='Reserved storage'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='used_storage',
+            field=models.BigIntegerField(default=0, editable=False, verbose_name='Used storage'),
+        ),
+        migrations.CreateModel(
+            name='UploadReservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('size', models.BigIntegerField(verbose_name='Size')),
+                ('date_created', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Created date')),
+                ('date_expires', models.DateTimeField(db_index=True, verbose_name='Expiration date')),
+                ('file', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='upload_reservation', to='accounts.file')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_reservations', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Upload reservation',
+                'verbose_name_plural': 'Upload reservations',
+            },
+        ),
+        migrations.RunPython(populate_used_storage, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.1.3 on 2026-10-19 18:13
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0020_upload_reservations'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutgoingEmail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=998, verbose_name='Subject')),
+                ('body', models.TextField(blank=True, verbose_name='Body')),
+                ('html_body', models.TextField(blank=True, null=True, verbose_name='HTML body')),
+                ('from_email', models.CharField(blank=True, max_length=256, null=True, verbose_name='From')),
+                ('to', models.JSONField(verbose_name='To')),
+                ('status', models.CharField(choices=[('PENDING', 'PENDING'), ('SENT', 'SENT'), ('FAILED', 'FAILED')], default='PENDING', max_length=16, verbose_name='Status')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Attempts')),
+                ('last_error', models.TextField(blank=True, null=True, verbose_name='Last error')),
+                ('date_created', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Created date')),
+                ('date_next_attempt', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Next attempt date')),
+                ('date_sent', models.DateTimeField(blank=True, null=True, verbose_name='Sent date')),
+            ],
+            options={
+                'verbose_name': 'Outgoing email',
+                'verbose_name_plural': 'Outgoing emails',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='outgoingemail',
+            index=models.Index(fields=['status', 'date_next_attempt'], name='accounts_ou_status_1c6c51_idx'),
+        ),
+    ]
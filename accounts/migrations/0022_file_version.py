@@ -0,0 +1,18 @@
+# Generated by Django 4.1.3 on 2026-10-19 18:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0021_outgoing_email'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='file',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False, verbose_name='Version'),
+        ),
+    ]
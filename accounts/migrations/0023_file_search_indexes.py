@@ -0,0 +1,25 @@
+# Generated by Django 4.1.3 on 2026-10-19 18:26
+
+from django.db import migrations, models
+
+from base.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # Indexes of the big table are built concurrently, it can't be done in a transaction.
+    atomic = False
+
+    dependencies = [
+        ('accounts', '0022_file_version'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='file',
+            index=models.Index(fields=['sha256'], name='accounts_file_sha256_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        AddIndexConcurrently(
+            model_name='file',
+            index=models.Index(fields=['ip'], name='accounts_file_ip_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.1.3 on 2026-10-19 18:29
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0023_file_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FileJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(choices=[('DELETE', 'DELETE'), ('SNIFF_CONTENT_TYPE', 'SNIFF_CONTENT_TYPE'), ('RECOMPUTE_SHA256', 'RECOMPUTE_SHA256'), ('REGENERATE_METADATA', 'REGENERATE_METADATA')], max_length=32, verbose_name='Action')),
+                ('status', models.CharField(choices=[('PENDING', 'PENDING'), ('RUNNING', 'RUNNING'), ('DONE', 'DONE')], default='PENDING', max_length=16, verbose_name='Status')),
+                ('file_ids', models.JSONField(blank=True, default=list, verbose_name='File ids')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Total')),
+                ('processed', models.PositiveIntegerField(default=0, verbose_name='Processed')),
+                ('failed', models.PositiveIntegerField(default=0, verbose_name='Failed')),
+                ('last_error', models.TextField(blank=True, null=True, verbose_name='Last error')),
+                ('date_created', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Created date')),
+                ('date_started', models.DateTimeField(blank=True, null=True, verbose_name='Started date')),
+                ('date_finished', models.DateTimeField(blank=True, null=True, verbose_name='Finished date')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='file_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'File job',
+                'verbose_name_plural': 'File jobs',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='filejob',
+            index=models.Index(fields=['status', 'id'], name='accounts_fi_status_f07b73_idx'),
+        ),
+    ]
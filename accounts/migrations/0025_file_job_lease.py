@@ -0,0 +1,18 @@
+# Generated by Django 4.1.3 on 2026-10-19 19:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0024_file_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='filejob',
+            name='date_leased_until',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Leased until date'),
+        ),
+    ]
@@ -1,6 +1,12 @@
+from contextvars import ContextVar
+import datetime
+from functools import partial
 from hashlib import sha256
 from pathlib import Path
-from typing import Optional
+import smtplib
+import time
+import traceback
+from typing import Iterable, List, Optional
 
 from django.conf import settings
 from django.contrib.auth.models import (
@@ -8,25 +14,36 @@ from django.contrib.auth.models import (
     PermissionsMixin,
 )
 from django.core.exceptions import ObjectDoesNotExist, PermissionDenied
-from django.core.mail import send_mail
-from django.db import models
+from django.core.mail import EmailMultiAlternatives
+from django.db import models, transaction
+from django.db.models import Case, F, Q, Value, When
 from django.db.models.fields.files import FieldFile
 from django.template.defaultfilters import filesizeformat
+from django.urls import reverse
 from django.utils import timezone
+from django.utils.http import urlencode
 from django.utils.translation import gettext_lazy as _
 import magic
 
+from accounts.caches import EntitlementCache, SignedURLCache, UserCache
 from accounts.dataclasses import SignedURLReturnObject
-from accounts.enums import SignedURLMethod
+from accounts.enums import ContentDisposition, FileJobAction, FileJobStatus, OutgoingEmailStatus, SignedURLMethod
+from accounts.exceptions import ReservationExceeded
 from accounts.managers import UserManager
 from accounts.utils import file_upload_path, get_safe_random_string, get_uuid_hex
 from docs.models import TermsOfService
+from utils.metrics import observe_latency
+from utils.presigners import get_storage_key, get_storage_presigner
+from utils.storages import delete_many
+from utils.streams import iter_storage_range
 
 
 MAGIC_MIME = magic.Magic(mime=True)
 DEFAULT_MAX_FILE_SIZE: int = 209715200  # Maximum file size200 * 2 ^ 20 = 200 MB
 DEFAULT_STORAGE_SIZE: int = 2147483648  # 2 * 2 ^ 30 = 2 GB
 MIN_FILE_SIZE: int = 0
+# Set while files are deleted in bulk, receivers of the ``File`` deletion signals skip the deleted files.
+BULK_FILE_DELETION: ContextVar[bool] = ContextVar('bulk_file_deletion', default=False)
 
 
 class UserDoesNotHaveSubscription(Exception):
@@ -120,6 +137,16 @@ class User(AbstractBaseUser, PermissionsMixin):
         null=True,
         blank=True
     )
+    used_storage = models.BigIntegerField(
+        _('Used storage'),
+        default=0,
+        editable=False
+    )
+    reserved_storage = models.BigIntegerField(
+        _('Reserved storage'),
+        default=0,
+        editable=False
+    )
 
     objects = UserManager()
 
@@ -153,8 +180,9 @@ class User(AbstractBaseUser, PermissionsMixin):
 
         return self.username
 
-    def email_user(self, subject, message, from_email=None, **kwargs) -> None:
-        send_mail(subject, message, from_email, [self.email], **kwargs)
+    def email_user(self, subject, message, from_email=None, html_message=None) -> None:
+        """Puts the email to the outbox, it's sent by ``send_emails`` command."""
+        OutgoingEmail.enqueue(subject, message, [self.email], from_email=from_email, html_message=html_message)
 
     def get_max_file_size(self):
         """Retrieves maximum upload file size.
@@ -168,10 +196,8 @@ class User(AbstractBaseUser, PermissionsMixin):
             int: Maximum upload file size.
         """
         try:
-            # That's a difficult operation.
-            # TODO: Caching.
-            metadata = self.subscriptions.filter(active=True).latest('id').product.metadata
-        except ObjectDoesNotExist:
+            metadata = self.get_subscription_metadata()
+        except UserDoesNotHaveSubscription:
             return self.max_file_size
         try:
             max_file_size = metadata['max_file_size']
@@ -189,30 +215,63 @@ class User(AbstractBaseUser, PermissionsMixin):
         storage size and max upload file size, but for now that's fine.
         Plus I have not decided how to handle multiple subscriptions and if we need them at all.
 
+        Metadata is cached with ``accounts.caches.EntitlementCache``, expired subscriptions are
+        deactivated by the sweeper, so there is no need to check the period on every call.
+
         Returns:
             django.db.models.JSONField: If user has an active subscription.
 
         Raises:
             accounts.models.UserDoesNotHaveSubscription: If user does not have an active subscription.
         """
+        metadata = EntitlementCache(self.pk).get_or_set(self._load_subscription_metadata)
+
+        if metadata is None:
+            raise UserDoesNotHaveSubscription()
+
+        return metadata
+
+    def _load_subscription_metadata(self):
         try:
-            # That's a difficult operation.
-            # TODO: Caching.
-            return self.subscriptions.filter(active=True).latest('id').product.metadata
+            subscription = self.subscriptions.filter(active=True).select_related('product').latest('id')
         except ObjectDoesNotExist:
-            raise UserDoesNotHaveSubscription()
+            return None
+
+        return subscription.product.metadata or {}
 
     def get_used_storage(self):
+        """Returns storage used by the finalized files.
+
+        Value is maintained by ``accounts.models.UploadReservation``, so there is no need to
+        aggregate files sizes on every call.
+
+        Returns:
+            int: Used storage in bytes.
+        """
+        return self.used_storage
+
+    def calculate_used_storage(self):
+        """Calculates used storage from the files.
+
+        Note:
+            That's an expensive operation, should be used only to recover ``self.used_storage``.
+
+        Returns:
+            int: Used storage in bytes.
+        """
         space = self.files.exclude(size=None).values_list('size', flat=True).aggregate(used_storage=models.Sum('size'))
         return space['used_storage'] or 0
 
-    def is_file_size_allowed(self, file_size: int):
+    def get_storage_size(self):
         try:
             metadata = self.get_subscription_metadata()
         except UserDoesNotHaveSubscription:
             metadata = dict(storage_size=DEFAULT_STORAGE_SIZE)
-        storage_size = int(metadata['storage_size'])
-        return file_size + self.get_used_storage() < storage_size
+
+        return int(metadata['storage_size'])
+
+    def is_file_size_allowed(self, file_size: int):
+        return file_size + self.used_storage + self.reserved_storage < self.get_storage_size()
 
     def configure_from_event(self, event):
         if event.data.object.customer:
@@ -331,6 +390,14 @@ class File(models.Model):
         _('Uploaded date'),
         default=timezone.now
     )
+    # Incremented on every save, used as a validator of the API representations.
+    version = models.PositiveIntegerField(
+        _('Version'),
+        default=1,
+        editable=False,
+        null=False,
+        blank=False
+    )
 
     DEFAULT_SIGNED_URL_EXPIRATION = 15 * 60
     MIN_SIGNED_URL_EXPIRATION = 0
@@ -339,6 +406,7 @@ class File(models.Model):
         SignedURLMethod.PUT,
         SignedURLMethod.GET,
     )
+    LOCAL_DOWNLOAD_SIGNATURE_SALT = 'accounts.models.File.local_download'
 
     def __str__(self):
         return self.sha256[:8]
@@ -347,6 +415,11 @@ class File(models.Model):
         verbose_name = _('File')
         verbose_name_plural = _('Files')
         ordering = ['-id']
+        indexes = [
+            # Prefix searches in admin, ``LIKE 'prefix%'`` needs pattern ops with non-C collations.
+            models.Index(fields=['sha256'], name='accounts_file_sha256_idx', opclasses=['varchar_pattern_ops']),
+            models.Index(fields=['ip'], name='accounts_file_ip_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         fake: bool = kwargs.pop('fake', False)
@@ -359,7 +432,14 @@ class File(models.Model):
         else:
             self.set_fake_file_attrs()
 
+        if self._state.adding:
+            super().save(*args, **kwargs)
+            return
+
+        # Incremented in SQL, so concurrent saves don't produce the same version.
+        self.version = F('version') + 1
         super().save(*args, **kwargs)
+        self.refresh_from_db(fields=['version'])
 
     def set_name_attrs(self, original_full_name):
         if self.original_full_name and original_full_name is None:
@@ -476,20 +556,38 @@ class File(models.Model):
     def generate_post_upload_signed_url(
             self,
             expiration: Optional[int] = None,
-            headers: Optional[dict] = None
+            headers: Optional[dict] = None,
+            size: Optional[int] = None
             ) -> SignedURLReturnObject:
+        """Generates signed POST policy of the upload.
+
+        Args:
+            expiration (int, optional): Expiration time in seconds or None.
+            headers (dict, optional): Extra headers.
+            size (int, optional): Declared file size, the storage rejects bigger uploads.
+                If not specified, uploads are limited by the maximum file size.
+
+        Returns:
+            accounts.dataclasses.SignedURLReturnObject: Values that allows clients to make upload request.
+        """
         if expiration is None:
             expiration = self.get_signed_url_expiration(expiration)
 
-        presigned_post = self.file.field.storage.connection.meta.client.generate_presigned_post(
-            Bucket=self.file.storage.bucket_name,
-            Key=self.file.name,
-            Conditions=[
-                ["content-length-range", MIN_FILE_SIZE, self.get_max_file_size()],
+        max_size: int = self.get_max_file_size()
+
+        if size is not None:
+            max_size = min(size, max_size)
+
+        started_at: float = time.perf_counter()
+        presigned_post = get_storage_presigner(self.file.storage).generate_presigned_post(
+            get_storage_key(self.file.storage, self.file.name),
+            conditions=[
+                ["content-length-range", MIN_FILE_SIZE, max_size],
                 {"bucket": self.file.storage.bucket_name},
             ],
-            ExpiresIn=expiration,
+            expires_in=expiration,
         )
+        observe_latency('s3.PresignPostObject', time.perf_counter() - started_at)
 
         return SignedURLReturnObject(
             url=presigned_post['url'],
@@ -501,7 +599,8 @@ class File(models.Model):
     def generate_download_signed_url(
             self,
             expiration: Optional[int] = None,
-            headers: Optional[dict] = None
+            headers: Optional[dict] = None,
+            disposition: ContentDisposition = ContentDisposition.ATTACHMENT
     ) -> SignedURLReturnObject:
         """Generates download signed URL depending on storage.
 
@@ -513,21 +612,43 @@ class File(models.Model):
                 If specified must be greater than 0 and less than 60*60*24*7 (7 days).
                 If not specified, then ``File.DEFAULT_SIGNED_URL_EXPIRATION`` will be used.
             headers (dict, optional): Extra headers.
+            disposition (accounts.enums.ContentDisposition, optional): Download the file or open it in the browser.
+
+        Note:
+            Signed URLs without extra headers are cached with ``accounts.caches.SignedURLCache``,
+            so the same URL can be returned while enough lifetime remains.
 
         Returns:
             accounts.dataclasses.SignedURLReturnObject: Values that allows clients to make upload request.
-
-        Raises:
-            NotImplementedError: If storage is not supported.
         """
         expiration: int = self.get_signed_url_expiration(expiration)
 
         if settings.AWS_STORAGE_BUCKET_NAME:
-            return self.generate_aws_s3_download_signed_url(expiration=expiration, headers=headers)
+            generate = partial(
+                self.generate_aws_s3_download_signed_url,
+                expiration=expiration,
+                headers=headers,
+                disposition=disposition
+            )
+        else:
+            generate = partial(
+                self.generate_local_download_signed_url,
+                expiration=expiration,
+                headers=headers,
+                disposition=disposition
+            )
 
-        raise NotImplementedError()
+        if headers:
+            return generate()
+
+        return SignedURLCache(self.pk).get_or_set(SignedURLMethod.GET.value, expiration, generate, disposition.value)
 
-    def generate_aws_s3_download_signed_url(self, expiration=None, headers=None):
+    def generate_aws_s3_download_signed_url(
+            self,
+            expiration=None,
+            headers=None,
+            disposition: ContentDisposition = ContentDisposition.ATTACHMENT
+    ):
         """Generates AWS S3 download signed URL.
 
         Args:
@@ -535,6 +656,7 @@ class File(models.Model):
                 If specified must be greater than 0 and less than 60*60*24*7 (7 days).
                 If not specified, then ``File.DEFAULT_SIGNED_URL_EXPIRATION`` will be used.
             headers (dict, optional): Extra headers.
+            disposition (accounts.enums.ContentDisposition, optional): Download the file or open it in the browser.
 
         Returns:
             accounts.dataclasses.SignedURLReturnObject: Values that allows clients to download the file.
@@ -545,14 +667,23 @@ class File(models.Model):
         if headers is None:
             headers = {}
 
-        url = self.file.storage.url(
-            self.file.name,
-            parameters={
-                'ResponseContentDisposition': 'attachment; filename ="%s";' % self.original_full_name,
-            },
-            expire=expiration,
-            http_method=method
-        )
+        storage = self.file.storage
+        parameters: dict = {
+            'ResponseContentDisposition': self.get_content_disposition(disposition),
+        }
+
+        if storage.custom_domain or not storage.querystring_auth:
+            # Storage generates CloudFront or not signed URLs.
+            url = storage.url(self.file.name, parameters=parameters, expire=expiration, http_method=method)
+        else:
+            started_at: float = time.perf_counter()
+            url = get_storage_presigner(storage).generate_presigned_url(
+                get_storage_key(storage, self.file.name),
+                params=parameters,
+                expires_in=expiration,
+                http_method=method
+            )
+            observe_latency('s3.PresignGetObject', time.perf_counter() - started_at)
 
         return SignedURLReturnObject(
             url=url,
@@ -561,6 +692,63 @@ class File(models.Model):
             body={}
         )
 
+    def generate_local_download_signed_url(
+            self,
+            expiration=None,
+            headers=None,
+            disposition: ContentDisposition = ContentDisposition.ATTACHMENT
+    ):
+        """Generates download signed URL of the file from the local storage.
+
+        URL is signed with HMAC, so it can be validated without database queries,
+        see ``accounts.views.LocalFileDownloadView``.
+
+        Args:
+            expiration (int, optional): Expiration time in seconds.
+                If specified must be greater than 0 and less than 60*60*24*7 (7 days).
+                If not specified, then ``File.DEFAULT_SIGNED_URL_EXPIRATION`` will be used.
+            headers (dict, optional): Extra headers.
+            disposition (accounts.enums.ContentDisposition, optional): Download the file or open it in the browser.
+
+        Returns:
+            accounts.dataclasses.SignedURLReturnObject: Values that allows clients to download the file.
+        """
+        # base.utils imports accounts.models
+        from base.utils import generate_url_signature
+
+        expiration: int = self.get_signed_url_expiration(expiration)
+        expires: int = int(timezone.now().timestamp()) + expiration
+
+        if headers is None:
+            headers = {}
+
+        url: str = '%s?%s' % (
+            reverse('accounts:file_local_download', kwargs={'url_path': self.url_path}),
+            urlencode({
+                'disposition': disposition.value,
+                'expires': expires,
+                'signature': generate_url_signature(
+                    self.get_local_download_signature_value(self.url_path, disposition),
+                    expires,
+                    self.LOCAL_DOWNLOAD_SIGNATURE_SALT
+                ),
+            })
+        )
+
+        return SignedURLReturnObject(
+            url=url,
+            headers=headers,
+            method=SignedURLMethod.GET.value,
+            body={}
+        )
+
+    @staticmethod
+    def get_local_download_signature_value(url_path: str, disposition: ContentDisposition) -> str:
+        return '%s:%s' % (url_path, disposition.value)
+
+    def get_content_disposition(self, disposition: ContentDisposition = ContentDisposition.ATTACHMENT) -> str:
+        return '%s; filename ="%s";' % (disposition.value, self.original_full_name)
+
     def get_h_size(self):
         """Returns humanreadable size of the file.
 
@@ -570,13 +758,14 @@ class File(models.Model):
         return filesizeformat(self.size)
 
     def is_user_has_access(self, user: User):
-        if self.owner is None:
+        if self.owner_id is None:
             return True
 
         if not self.is_private:
             return True
 
-        return self.owner == user
+        # Compares keys, so the owner isn't loaded, anonymous user has no pk.
+        return self.owner_id == user.pk
 
     def get_max_file_size(self):
         if self.owner is None:
@@ -603,6 +792,721 @@ class File(models.Model):
         return self.owner == user
 
 
+class UploadReservation(models.Model):
+    """Storage reserved between upload START and FINISH.
+
+    START reserves declared file size with a single conditional ``UPDATE`` of the user row,
+    so concurrent uploads can't exceed the storage size and there is no need to aggregate
+    files sizes. FINISH converts reservation to the used storage, expired reservations are
+    released by ``sweep_upload_reservations`` command.
+
+    User rows are updated without signals, so cached users are invalidated after the commit.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='upload_reservations',
+        null=False,
+        blank=False
+    )
+    file = models.OneToOneField(
+        File,
+        on_delete=models.CASCADE,
+        related_name='upload_reservation',
+        null=False,
+        blank=False
+    )
+    size = models.BigIntegerField(
+        _('Size'),
+        null=False,
+        blank=False
+    )
+    date_created = models.DateTimeField(
+        _('Created date'),
+        default=timezone.now
+    )
+    date_expires = models.DateTimeField(
+        _('Expiration date'),
+        db_index=True,
+        null=False,
+        blank=False
+    )
+
+    # Upload token is valid for an hour, FINISH can't be done after it.
+    DEFAULT_TTL: int = 60 * 60
+
+    class Meta:
+        verbose_name = _('Upload reservation')
+        verbose_name_plural = _('Upload reservations')
+
+    @classmethod
+    def reserve(cls, user: User, file: File, size: int, ttl: Optional[int] = None):
+        """Reserves storage for the file.
+
+        Args:
+            user (accounts.models.User): Owner of the file.
+            file (accounts.models.File): Pending file.
+            size (int): Declared file size.
+            ttl (int, optional): Reservation lifetime in seconds.
+
+        Returns:
+            accounts.models.UploadReservation: Reservation if storage is available, otherwise None.
+        """
+        if ttl is None:
+            ttl = cls.DEFAULT_TTL
+
+        storage_size: int = user.get_storage_size()
+
+        with transaction.atomic():
+            reserved: int = User.objects.filter(
+                pk=user.pk,
+                used_storage__lt=storage_size - size - F('reserved_storage')
+            ).update(reserved_storage=F('reserved_storage') + size)
+
+            if not reserved:
+                return None
+
+            transaction.on_commit(UserCache(user.pk).invalidate)
+
+            return cls.objects.create(
+                user=user,
+                file=file,
+                size=size,
+                date_expires=timezone.now() + datetime.timedelta(seconds=ttl)
+            )
+
+    @classmethod
+    def pop(cls, file: File) -> int:
+        """Removes reservation of the file and releases reserved storage.
+
+        Note:
+            Reservation can be already released by the sweeper, in this case nothing is released.
+
+        Args:
+            file (accounts.models.File): Pending file.
+
+        Returns:
+            int: Released size in bytes.
+        """
+        with transaction.atomic():
+            try:
+                reservation = cls.objects.select_for_update().get(file=file)
+            except cls.DoesNotExist:
+                return 0
+
+            reservation.delete()
+            User.objects.filter(pk=reservation.user_id).update(
+                reserved_storage=F('reserved_storage') - reservation.size
+            )
+            transaction.on_commit(UserCache(reservation.user_id).invalidate)
+
+        return reservation.size
+
+    @classmethod
+    def commit(cls, file: File) -> None:
+        """Converts reservation of the finalized file to the used storage.
+
+        Args:
+            file (accounts.models.File): Finalized file.
+
+        Raises:
+            accounts.exceptions.ReservationExceeded: If the file is bigger than the reserved size
+                or the reservation has been released, nothing is changed in this case.
+        """
+        with transaction.atomic():
+            if file.size > cls.pop(file):
+                raise ReservationExceeded()
+
+            User.objects.filter(pk=file.owner_id).update(used_storage=F('used_storage') + file.size)
+            transaction.on_commit(UserCache(file.owner_id).invalidate)
+
+    @classmethod
+    def sweep(cls, batch_size: int = 1000) -> int:
+        """Releases expired reservations.
+
+        Reservations are deleted with one query and reserved storage is released with one ``UPDATE``
+        per batch.
+
+        Args:
+            batch_size (int, optional): Maximum number of reservations to release.
+
+        Returns:
+            int: Number of released reservations.
+        """
+        with transaction.atomic():
+            expired = list(
+                cls.objects.select_for_update(skip_locked=True).filter(
+                    date_expires__lt=timezone.now()
+                ).values_list('id', 'user_id', 'size')[:batch_size]
+            )
+
+            if not expired:
+                return 0
+
+            released: dict = {}
+
+            for _, user_id, size in expired:
+                released[user_id] = released.get(user_id, 0) + size
+
+            cls.objects.filter(id__in=[_id for _id, _, _ in expired]).delete()
+            User.objects.filter(pk__in=released.keys()).update(
+                reserved_storage=F('reserved_storage') - Case(
+                    *[When(pk=user_id, then=Value(size)) for user_id, size in released.items()],
+                    default=Value(0),
+                    output_field=models.BigIntegerField()
+                )
+            )
+            transaction.on_commit(lambda: UserCache.invalidate_many(released.keys()))
+
+        return len(expired)
+
+
+class OutgoingEmail(models.Model):
+    """Outbox of the transactional emails.
+
+    Views only insert the email in the same transaction as the change that caused it, so
+    the request doesn't wait for the SMTP server. Emails are sent in batches by ``send_emails``
+    command over one SMTP connection, failed emails are retried with exponential backoff and
+    marked as failed after ``MAX_ATTEMPTS``.
+
+    Emails are claimed for ``SEND_LEASE_TIME`` in a short transaction and the status of every email
+    is committed right after it's sent, so a crash doesn't send the delivered emails again.
+    """
+    subject = models.CharField(
+        _('Subject'),
+        max_length=998,
+        null=False,
+        blank=False
+    )
+    body = models.TextField(
+        _('Body'),
+        null=False,
+        blank=True
+    )
+    html_body = models.TextField(
+        _('HTML body'),
+        null=True,
+        blank=True
+    )
+    from_email = models.CharField(
+        _('From'),
+        max_length=256,
+        null=True,
+        blank=True
+    )
+    to = models.JSONField(
+        _('To'),
+        null=False,
+        blank=False
+    )
+    status = models.CharField(
+        _('Status'),
+        max_length=16,
+        choices=[(status.value, status.value) for status in OutgoingEmailStatus],
+        default=OutgoingEmailStatus.PENDING.value
+    )
+    attempts = models.PositiveIntegerField(
+        _('Attempts'),
+        default=0
+    )
+    last_error = models.TextField(
+        _('Last error'),
+        null=True,
+        blank=True
+    )
+    date_created = models.DateTimeField(
+        _('Created date'),
+        default=timezone.now
+    )
+    date_next_attempt = models.DateTimeField(
+        _('Next attempt date'),
+        default=timezone.now
+    )
+    date_sent = models.DateTimeField(
+        _('Sent date'),
+        null=True,
+        blank=True
+    )
+
+    MAX_ATTEMPTS: int = 6
+    RETRY_BASE_DELAY: int = 60
+    RETRY_MAX_DELAY: int = 60 * 60
+    SEND_LEASE_TIME: int = 10 * 60
+
+    class Meta:
+        verbose_name = _('Outgoing email')
+        verbose_name_plural = _('Outgoing emails')
+        indexes = [
+            models.Index(fields=['status', 'date_next_attempt']),
+        ]
+
+    def __str__(self):
+        return self.subject
+
+    @classmethod
+    def enqueue(cls, subject: str, body: str, to: List[str], from_email: Optional[str] = None,
+                html_message: Optional[str] = None):
+        """Puts the email to the outbox.
+
+        Args:
+            subject (str): Subject.
+            body (str): Plain text body.
+            to (list): Recipients.
+            from_email (str, optional): Sender, ``settings.DEFAULT_FROM_EMAIL`` by default.
+            html_message (str, optional): HTML alternative of the body.
+
+        Returns:
+            accounts.models.OutgoingEmail: Pending email.
+        """
+        return cls.objects.create(
+            subject=str(subject),
+            body=str(body),
+            html_body=html_message,
+            from_email=from_email,
+            to=list(to),
+        )
+
+    def to_message(self, connection) -> EmailMultiAlternatives:
+        message = EmailMultiAlternatives(
+            self.subject,
+            self.body,
+            self.from_email or settings.DEFAULT_FROM_EMAIL,
+            self.to,
+            connection=connection
+        )
+
+        if self.html_body:
+            message.attach_alternative(self.html_body, 'text/html')
+
+        return message
+
+    def get_retry_delay(self) -> datetime.timedelta:
+        return datetime.timedelta(seconds=min(self.RETRY_BASE_DELAY * 2 ** (self.attempts - 1), self.RETRY_MAX_DELAY))
+
+    @classmethod
+    def send_pending(cls, connection, batch_size: int = 100) -> int:
+        """Sends pending emails over the connection.
+
+        Emails are claimed with ``SKIP LOCKED``, so senders can run concurrently. Batch stops on the first
+        connection failure, the rest of the emails are released for the next poll. Delivery latencies
+        and failures are collected with ``utils.metrics`` as ``email.sent`` and ``email.failed``.
+
+        Args:
+            connection: Email backend, it's opened if needed and left open for the next batch.
+            batch_size (int, optional): Maximum number of emails to send.
+
+        Returns:
+            int: Number of attempted emails.
+        """
+        now: datetime.datetime = timezone.now()
+
+        with transaction.atomic():
+            email_ids: List[int] = list(
+                cls.objects.select_for_update(skip_locked=True).filter(
+                    status=OutgoingEmailStatus.PENDING.value,
+                    date_next_attempt__lte=now
+                ).order_by('date_next_attempt', 'id').values_list('id', flat=True)[:batch_size]
+            )
+
+            if not email_ids:
+                return 0
+
+            # Emails of a crashed sender are sent again after the lease.
+            cls.objects.filter(id__in=email_ids).update(
+                date_next_attempt=now + datetime.timedelta(seconds=cls.SEND_LEASE_TIME)
+            )
+
+        emails: dict = cls.objects.in_bulk(email_ids)
+        attempted: int = 0
+
+        for email_id in email_ids:
+            attempted += 1
+
+            try:
+                emails[email_id].send(connection, now)
+            except Exception:
+                # Server is unavailable, so the rest of the emails would wait for the timeout as well.
+                cls.objects.filter(id__in=email_ids[attempted:]).update(date_next_attempt=now)
+                break
+
+        return attempted
+
+    def send(self, connection, now: Optional[datetime.datetime] = None) -> bool:
+        """Sends the email, on failure schedules a retry or marks the email as failed.
+
+        Returns:
+            bool: True if the email has been sent.
+
+        Raises:
+            Exception: Connection error, e.g. the server is unavailable, it's raised after the failure is saved.
+        """
+        if now is None:
+            now = timezone.now()
+
+        self.attempts += 1
+        started_at: float = time.perf_counter()
+
+        try:
+            # Message doesn't close connection opened before sending.
+            connection.open()
+            self.to_message(connection).send()
+        except Exception as error:
+            observe_latency('email.failed', time.perf_counter() - started_at)
+            self.last_error = traceback.format_exc()
+            close_email_connection(connection)
+
+            if self.attempts >= self.MAX_ATTEMPTS:
+                self.status = OutgoingEmailStatus.FAILED.value
+            else:
+                self.date_next_attempt = now + self.get_retry_delay()
+
+            self.save(update_fields=['attempts', 'last_error', 'status', 'date_next_attempt'])
+
+            if is_email_connection_error(error):
+                raise
+
+            return False
+
+        observe_latency('email.sent', time.perf_counter() - started_at)
+        self.status = OutgoingEmailStatus.SENT.value
+        self.date_sent = timezone.now()
+        self.save(update_fields=['attempts', 'status', 'date_sent'])
+
+        return True
+
+
+def is_email_connection_error(error: Exception) -> bool:
+    """Returns True if the error is caused by the connection, not by the message, e.g. refused recipients."""
+    if isinstance(error, (smtplib.SMTPConnectError, smtplib.SMTPServerDisconnected)):
+        return True
+
+    # SMTP errors are subclasses of ``OSError``, the rest are socket errors.
+    return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+
+def close_email_connection(connection) -> None:
+    """Closes the connection, errors are ignored as the connection can be already broken."""
+    try:
+        connection.close()
+    except Exception:
+        pass
+
+
+class FileJob(models.Model):
+    """Background bulk action over the files selected in the admin panel.
+
+    Ids of the selected files are stored with the job, ``process_file_jobs`` command processes them
+    in chunks, every chunk is committed together with the progress, so the job can be interrupted
+    and continued at any point. Files deleted before their chunk is processed are skipped.
+
+    Worker leases the job for ``LEASE_TIME`` in a short transaction, so the files are read from the storage
+    without holding the row lock, and every file is updated in its own transaction. Chunk of a crashed worker
+    is processed again after the lease expires.
+
+    Deleted files release storage of the owners with one ``UPDATE`` per chunk and their objects are
+    removed from the storage after the commit.
+    """
+    action = models.CharField(
+        _('Action'),
+        max_length=32,
+        choices=[(action.value, action.value) for action in FileJobAction],
+        null=False,
+        blank=False
+    )
+    status = models.CharField(
+        _('Status'),
+        max_length=16,
+        choices=[(status.value, status.value) for status in FileJobStatus],
+        default=FileJobStatus.PENDING.value
+    )
+    file_ids = models.JSONField(
+        _('File ids'),
+        default=list,
+        null=False,
+        blank=True
+    )
+    total = models.PositiveIntegerField(
+        _('Total'),
+        default=0
+    )
+    processed = models.PositiveIntegerField(
+        _('Processed'),
+        default=0
+    )
+    failed = models.PositiveIntegerField(
+        _('Failed'),
+        default=0
+    )
+    last_error = models.TextField(
+        _('Last error'),
+        null=True,
+        blank=True
+    )
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        related_name='file_jobs',
+        null=True,
+        blank=True
+    )
+    date_created = models.DateTimeField(
+        _('Created date'),
+        default=timezone.now
+    )
+    date_started = models.DateTimeField(
+        _('Started date'),
+        null=True,
+        blank=True
+    )
+    date_finished = models.DateTimeField(
+        _('Finished date'),
+        null=True,
+        blank=True
+    )
+    date_leased_until = models.DateTimeField(
+        _('Leased until date'),
+        null=True,
+        blank=True
+    )
+
+    # Content type is sniffed from the first bytes, as on upload.
+    SNIFF_SIZE: int = 65536
+    # Actions other than deletion read the files, so their chunks are small.
+    READ_CHUNK_SIZE: int = 10
+    LEASE_TIME: int = 30 * 60
+
+    class Meta:
+        verbose_name = _('File job')
+        verbose_name_plural = _('File jobs')
+        indexes = [
+            models.Index(fields=['status', 'id']),
+        ]
+
+    def __str__(self):
+        return '%s #%s' % (self.action, self.pk)
+
+    @property
+    def progress(self) -> float:
+        if not self.total:
+            return 100.0
+
+        return 100.0 * self.processed / self.total
+
+    @classmethod
+    def enqueue(cls, action: FileJobAction, queryset, user: Optional[User] = None):
+        """Creates the job for the files of the queryset.
+
+        Only ids are read, so the job is created quickly for hundreds of thousands of files.
+
+        Args:
+            action (accounts.enums.FileJobAction): Bulk action.
+            queryset (django.db.models.QuerySet): Files.
+            user (accounts.models.User, optional): Operator.
+
+        Returns:
+            accounts.models.FileJob: Pending job.
+        """
+        file_ids: List[int] = list(queryset.order_by('pk').values_list('pk', flat=True))
+
+        return cls.objects.create(action=action.value, file_ids=file_ids, total=len(file_ids), created_by=user)
+
+    @classmethod
+    def process_pending(cls, batch_size: int = 500) -> int:
+        """Processes the next chunks of the oldest unfinished jobs.
+
+        Jobs are locked with ``SKIP LOCKED``, so workers process different jobs concurrently.
+
+        Args:
+            batch_size (int, optional): Maximum number of files to process.
+
+        Returns:
+            int: Number of processed files.
+        """
+        processed: int = 0
+
+        while processed < batch_size:
+            chunk_size: Optional[int] = cls.process_next_chunk(batch_size - processed)
+
+            if chunk_size is None:
+                break
+
+            processed += chunk_size
+
+        return processed
+
+    @classmethod
+    def process_next_chunk(cls, chunk_size: int) -> Optional[int]:
+        """Processes the next chunk of the oldest unfinished job.
+
+        Returns:
+            int: Number of processed files, None if there are no unfinished jobs.
+        """
+        now: datetime.datetime = timezone.now()
+
+        with transaction.atomic():
+            job: Optional[FileJob] = cls.objects.select_for_update(skip_locked=True).filter(
+                Q(date_leased_until__isnull=True) | Q(date_leased_until__lt=now),
+                status__in=[FileJobStatus.PENDING.value, FileJobStatus.RUNNING.value]
+            ).order_by('id').first()
+
+            if job is None:
+                return None
+
+            job.date_leased_until = now + datetime.timedelta(seconds=cls.LEASE_TIME)
+            job.save(update_fields=['date_leased_until'])
+
+        return job.process_chunk(chunk_size)
+
+    def process_chunk(self, chunk_size: int) -> int:
+        """Processes the next chunk of the files, the job must be leased.
+
+        Returns:
+            int: Number of processed files.
+        """
+        now: datetime.datetime = timezone.now()
+
+        if self.action != FileJobAction.DELETE.value:
+            chunk_size = min(chunk_size, self.READ_CHUNK_SIZE)
+
+        file_ids: List[int] = self.file_ids[self.processed:self.processed + chunk_size]
+        files: List[File] = list(File.objects.filter(pk__in=file_ids).order_by('pk'))
+
+        if self.date_started is None:
+            self.date_started = now
+
+        if self.action != FileJobAction.DELETE.value:
+            for file in files:
+                try:
+                    self.update_file(file)
+                except Exception:
+                    self.failed += 1
+                    self.last_error = '%s: %s' % (file.pk, traceback.format_exc())
+
+            SignedURLCache.evict_many([file.pk for file in files])
+
+        with transaction.atomic():
+            if self.action == FileJobAction.DELETE.value:
+                self.delete_files(files)
+
+            self.save_progress(len(file_ids))
+
+        return len(file_ids)
+
+    def save_progress(self, processed: int) -> None:
+        """Saves progress of the processed chunk and releases the lease."""
+
+        self.processed += processed
+        self.status = FileJobStatus.RUNNING.value
+        self.date_leased_until = None
+
+        if self.processed >= self.total:
+            self.status = FileJobStatus.DONE.value
+            self.date_finished = timezone.now()
+
+        self.save(update_fields=[
+            'status', 'processed', 'failed', 'last_error', 'date_started', 'date_finished', 'date_leased_until'
+        ])
+
+    @staticmethod
+    def delete_files(files: List[File]) -> None:
+        """Deletes files releasing storage of the owners with one ``UPDATE``.
+
+        Receivers of the ``pre_delete`` and ``post_delete`` signals are short-circuited with
+        ``BULK_FILE_DELETION``, their work is done in bulk. Related rows are deleted by the collector.
+        """
+        released: dict = {}
+
+        for file in files:
+            if file.owner_id is None:
+                continue
+
+            if file.size is None:
+                UploadReservation.pop(file)
+            else:
+                released[file.owner_id] = released.get(file.owner_id, 0) + file.size
+
+        if released:
+            User.objects.filter(pk__in=released.keys()).update(
+                used_storage=F('used_storage') - Case(
+                    *[When(pk=user_id, then=Value(size)) for user_id, size in released.items()],
+                    default=Value(0),
+                    output_field=models.BigIntegerField()
+                )
+            )
+            transaction.on_commit(partial(UserCache.invalidate_many, list(released.keys())))
+
+        file_ids: List[int] = [file.pk for file in files]
+        token = BULK_FILE_DELETION.set(True)
+
+        try:
+            File.objects.filter(pk__in=file_ids).delete()
+        finally:
+            BULK_FILE_DELETION.reset(token)
+
+        transaction.on_commit(partial(SignedURLCache.evict_many, file_ids))
+        transaction.on_commit(partial(delete_many, File.file.field.storage, [file.file.name for file in files]))
+
+    def update_file(self, file: File) -> None:
+        """Re-reads the file from the storage and updates the attributes of the action.
+
+        File is read outside the transaction, changes are written in a short transaction of their own.
+        """
+        if file.size is None:
+            # Pending upload, attributes are read on finish.
+            return
+
+        storage = file.file.storage
+        size: int = storage.size(file.file.name)
+        changes: dict = {}
+
+        if self.action == FileJobAction.SNIFF_CONTENT_TYPE.value:
+            chunk: bytes = b''.join(self.iter_file_chunks(file, min(size, self.SNIFF_SIZE)))
+            changes['content_type'] = File.get_content_type_from_buffer(chunk)
+        else:
+            sha256sum = sha256()
+            first_chunk: Optional[bytes] = None
+
+            for chunk in self.iter_file_chunks(file, size):
+                if first_chunk is None:
+                    first_chunk = chunk[:self.SNIFF_SIZE]
+
+                sha256sum.update(chunk)
+
+            changes['sha256'] = sha256sum.hexdigest()
+
+            if self.action == FileJobAction.REGENERATE_METADATA.value:
+                file.set_name_attrs(file.original_full_name)
+                changes.update(
+                    content_type=File.get_content_type_from_buffer(first_chunk or b''),
+                    size=size,
+                    original_name=file.original_name,
+                    original_extension=file.original_extension,
+                )
+
+        with transaction.atomic():
+            if file.owner_id is not None and 'size' in changes:
+                # Size is read under the lock, the file can be re-processed after the lease expiration.
+                current_size: Optional[int] = File.objects.select_for_update().filter(
+                    pk=file.pk
+                ).values_list('size', flat=True).first()
+
+                if current_size is not None and changes['size'] != current_size:
+                    User.objects.filter(pk=file.owner_id).update(
+                        used_storage=F('used_storage') + changes['size'] - current_size
+                    )
+                    transaction.on_commit(UserCache(file.owner_id).invalidate)
+
+            File.objects.filter(pk=file.pk).update(version=F('version') + 1, **changes)
+
+    @staticmethod
+    def iter_file_chunks(file: File, size: int) -> Iterable[bytes]:
+        """Yields the first ``size`` bytes of the stored file."""
+        if size <= 0:
+            return
+
+        yield from iter_storage_range(file.file.storage, file.file.name, 0, size - 1)
+
+
 def generate_fake_file(original_name, owner: User = None, is_private: bool = True):
     file = File()
 
@@ -0,0 +1,130 @@
+"""Signed URL upload flow shared by the account page and the files API.
+
+START creates a pending file, reserves the declared size and returns the signed request the client
+uploads the file with. FINISH verifies the upload token, reads the uploaded file attributes and
+converts the reservation to the used storage.
+"""
+from typing import Tuple
+
+from django.db import transaction
+
+from accounts.dataclasses import SignedURLReturnObject
+from accounts.enums import UploadStatus
+from accounts.exceptions import NotAllowed, ReservationExceeded
+from accounts.models import File, generate_fake_file, UploadReservation
+from base.dataclasses import UploadToken
+from base.exceptions import FatalSignatureError, SignatureConsumedError, SignatureExpiredError
+from base.utils import decode_upload_token, generate_upload_token, release_upload_token
+from utils.metrics import increment
+
+
+def start_upload(filename: str, file_size: int, is_private: bool, user) -> dict:
+    """Creates pending file and returns the signed upload request.
+
+    Args:
+        filename (str): Original file name.
+        file_size (int): Declared file size.
+        is_private (bool): Is file private.
+        user (accounts.models.User): Uploader, anonymous user uploads files without owner.
+
+    Returns:
+        dict: Upload status, token to finish the upload and the signed request data.
+
+    Raises:
+        accounts.exceptions.NotAllowed: If file size is not valid or storage is exceeded.
+    """
+    owner = user if not user.is_anonymous else None
+
+    if file_size < 0:
+        raise NotAllowed()
+
+    with transaction.atomic():
+        file: File = generate_fake_file(filename, owner=owner, is_private=is_private)
+
+        if owner is not None and UploadReservation.reserve(owner, file, file_size) is None:
+            # Pending file is rolled back together with the transaction.
+            raise NotAllowed()
+
+    token: str = generate_upload_token(file.pk, owner_id=file.owner_id)
+    # Storage rejects uploads bigger than the reserved size, FINISH checks the size again.
+    upload_signed_return_object: SignedURLReturnObject = file.generate_post_upload_signed_url(size=file_size)
+    increment('upload.started')
+
+    return {
+        'status': UploadStatus.PENDING.value,
+        'token': token,
+        'request_data': {
+            'url': upload_signed_return_object.url,
+            'headers': upload_signed_return_object.headers,
+            'method': upload_signed_return_object.method,
+            'body': upload_signed_return_object.body,
+        }
+    }
+
+
+def finish_upload(token: str) -> File:
+    """Finalises the upload started with ``start_upload``.
+
+    Args:
+        token (str): Upload token, can be used once.
+
+    Returns:
+        accounts.models.File: Uploaded file.
+
+    Raises:
+        accounts.exceptions.NotAllowed: If token is not valid or file is not uploaded.
+    """
+    try:
+        upload_token: UploadToken = decode_upload_token(token, consume=True)
+    except (FatalSignatureError, SignatureConsumedError, SignatureExpiredError):
+        raise NotAllowed()
+
+    try:
+        file, is_pending = _finish_upload(upload_token)
+    except NotAllowed:
+        raise
+    except Exception:
+        # Token is consumed first, so concurrent FINISH requests don't finalise the file twice,
+        # but transient storage and database errors must not prevent the client from retrying.
+        release_upload_token(token)
+        raise
+
+    if is_pending:
+        # Conversion rate of the uploads is ``upload.finished / upload.started``.
+        increment('upload.finished')
+        increment('upload.bytes', file.size)
+
+    return file
+
+
+def _finish_upload(upload_token: UploadToken) -> Tuple[File, bool]:
+    try:
+        file = File.objects.get(pk=upload_token.upload_id)
+    except File.DoesNotExist:
+        raise NotAllowed()
+
+    if (file.owner_id or 0) != upload_token.owner_id:
+        raise NotAllowed()
+
+    is_pending: bool = file.size is None
+
+    try:
+        # Saved file and committed reservation are rolled back together, so FINISH can be retried.
+        with transaction.atomic():
+            file.save()
+
+            if is_pending and file.owner_id is not None:
+                UploadReservation.commit(file)
+    except FileNotFoundError:
+        if is_pending:
+            UploadReservation.pop(file)
+
+        raise NotAllowed()
+    except ReservationExceeded:
+        # Uploaded file is bigger than the declared size, it's deleted with the reservation.
+        file.file.storage.delete(file.file.name)
+        File.objects.filter(pk=file.pk).delete()
+
+        raise NotAllowed()
+
+    return file, is_pending
@@ -0,0 +1,49 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from accounts.caches import SignedURLCache, UserCache
+from accounts.models import BULK_FILE_DELETION, File, UploadReservation, User
+
+
+@receiver(pre_delete, sender=File)
+def release_file_storage(sender, instance: File, **kwargs):
+    """Releases storage of the deleted file.
+
+    Pending files release reservation, finalized files decrease used storage of the owner.
+    """
+    if instance.owner_id is None or BULK_FILE_DELETION.get():
+        return
+
+    if instance.size is None:
+        UploadReservation.pop(instance)
+        return
+
+    User.objects.filter(pk=instance.owner_id).update(used_storage=F('used_storage') - instance.size)
+    transaction.on_commit(UserCache(instance.owner_id).invalidate)
+
+
+@receiver(post_save, sender=File)
+@receiver(post_delete, sender=File)
+def evict_signed_urls(sender, instance: File, created: bool = False, **kwargs):
+    """Evicts cached signed URLs of the changed or deleted file.
+
+    Files are saved rarely: on upload finish and from the admin panel, so there is no need
+    to track which field has been changed, for example privacy.
+    """
+    if created or BULK_FILE_DELETION.get():
+        return
+
+    SignedURLCache(instance.pk).evict()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user(sender, instance: User, **kwargs):
+    """Invalidates cached user after the commit.
+
+    Covers password change, activation and admin edits. Storage counters are updated with
+    ``QuerySet.update``, so ``accounts.models.UploadReservation`` invalidates users itself.
+    """
+    transaction.on_commit(UserCache(instance.pk).invalidate)
@@ -10,7 +10,8 @@ class File {
 
     // Support 1 file only.
     this.file = this.fileInput.files[0];
-    this.uploadURL = "";
+    // Signed URL uploads are posted to the async view, the page itself is used as a fallback.
+    this.uploadURL = $(this.form).data("upload-url") || "";
 
     if (this.file.size > this.maxFileSize) {
       throw new Error("File is too large.");
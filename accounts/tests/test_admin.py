@@ -0,0 +1,71 @@
+from http import HTTPStatus
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from accounts.admin import FileAdmin
+from accounts.models import File, generate_fake_file, User
+from utils.admin import CURSOR_VAR
+
+
+class FileAdminCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser(
+            'superuser',
+            email='superuser@example.com',
+            password='password',
+            is_active=True
+        )
+        self.user = User.objects.create_user('uploader', email='uploader@example.com')
+        self.files = [generate_fake_file('file%d.txt' % idx, owner=self.user) for idx in range(5)]
+        for idx, file in enumerate(self.files):
+            File.objects.filter(pk=file.pk).update(sha256='%064x' % (idx + 0xabc0), ip='10.0.0.%d' % (idx % 2))
+        self.client.force_login(self.admin)
+        self.url = reverse('admin:accounts_file_changelist')
+
+    def get_results(self, **params):
+        response = self.client.get(self.url, params)
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+        return response.context['cl']
+
+    def test_changelist(self):
+        cl = self.get_results()
+
+        self.assertFalse(cl.keyset_paginated)
+        self.assertEqual(cl.result_count, 5)
+        self.assertIsNone(cl.full_result_count)
+
+    def test_search(self):
+        self.assertEqual(
+            [file.pk for file in self.get_results(q='sha256:%063x' % 0xabc).result_list],
+            [file.pk for file in reversed(self.files)]
+        )
+        self.assertEqual(len(self.get_results(q='ip:10.0.0.1').result_list), 2)
+        self.assertEqual(len(self.get_results(q='user:uploader').result_list), 5)
+        self.assertEqual(len(self.get_results(q='user:other').result_list), 0)
+        self.assertEqual([file.pk for file in self.get_results(q=self.files[0].url_path).result_list],
+                         [self.files[0].pk])
+
+    @patch.object(FileAdmin, 'list_per_page', 2)
+    def test_keyset_pagination(self):
+        pks = []
+        params = {'q': 'user:uploader'}
+
+        while True:
+            cl = self.get_results(**params)
+
+            self.assertTrue(cl.keyset_paginated)
+            pks.extend(file.pk for file in cl.result_list)
+
+            if cl.next_url is None:
+                break
+
+            params[CURSOR_VAR] = cl.result_list[-1].pk
+
+        self.assertEqual(pks, sorted((file.pk for file in self.files), reverse=True))
+        self.assertIsNotNone(cl.first_url)
@@ -0,0 +1,104 @@
+from http import HTTPStatus
+from unittest.mock import Mock, patch
+
+from django.contrib.auth import authenticate, BACKEND_SESSION_KEY
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+from accounts.backends import CachedModelBackend
+from accounts.caches import SignedURLCache
+from accounts.dataclasses import SignedURLReturnObject
+from accounts.models import generate_fake_file, UploadReservation, User
+from api.authentications import CachedJWTAuthentication
+
+
+class SignedURLCacheCase(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+        self.signed_url_cache = SignedURLCache(1)
+        self.generate = Mock(
+            side_effect=lambda: SignedURLReturnObject(url='https://example.com', headers={}, method='GET', body={})
+        )
+
+    def test_get_or_set(self):
+        first = self.signed_url_cache.get_or_set('GET', 3600, self.generate)
+        second = self.signed_url_cache.get_or_set('GET', 3600, self.generate)
+
+        self.assertEqual(self.generate.call_count, 1)
+        self.assertEqual(first.expires_at, second.expires_at)
+
+        self.signed_url_cache.get_or_set('GET', 3600, self.generate, 'inline')
+
+        self.assertEqual(self.generate.call_count, 2)
+
+    def test_evict(self):
+        self.signed_url_cache.get_or_set('GET', 3600, self.generate)
+        self.signed_url_cache.evict()
+        self.signed_url_cache.get_or_set('GET', 3600, self.generate)
+
+        self.assertEqual(self.generate.call_count, 2)
+
+
+class UserCacheCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('cached', email='cached@example.com', password='first', is_active=True)
+        self.backend = CachedModelBackend()
+
+    def test_session_user(self):
+        with self.assertNumQueries(1):
+            self.backend.get_user(self.user.pk)
+
+        with self.assertNumQueries(0):
+            user = self.backend.get_user(str(self.user.pk))
+
+        self.assertEqual(user, self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.set_password('second')
+            self.user.save()
+
+        with self.assertNumQueries(1):
+            self.assertTrue(self.backend.get_user(self.user.pk).check_password('second'))
+
+    def test_legacy_session(self):
+        self.client.force_login(self.user, backend='django.contrib.auth.backends.ModelBackend')
+        response = self.client.get(reverse('accounts:index'))
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(self.client.session[BACKEND_SESSION_KEY], 'accounts.backends.CachedModelBackend')
+
+    def test_failed_login_checks_password_once(self):
+        with patch.object(User, 'check_password', autospec=True, return_value=False) as check_password:
+            self.assertIsNone(authenticate(username='cached', password='wrong'))
+
+        self.assertEqual(check_password.call_count, 1)
+
+    def test_jwt_user(self):
+        authentication = CachedJWTAuthentication()
+        token = {api_settings.USER_ID_CLAIM: self.user.pk}
+
+        authentication.get_user(token)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(authentication.get_user(token), self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save(update_fields=['is_active'])
+
+        with self.assertRaises(AuthenticationFailed):
+            authentication.get_user(token)
+
+    def test_storage_update(self):
+        self.backend.get_user(self.user.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            file = generate_fake_file('cached.txt', owner=self.user)
+            UploadReservation.reserve(self.user, file, 10)
+
+        self.assertEqual(self.backend.get_user(self.user.pk).reserved_storage, 10)
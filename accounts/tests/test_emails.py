@@ -0,0 +1,124 @@
+from smtplib import SMTPRecipientsRefused
+
+from django.core import mail
+from django.core.mail import get_connection
+from django.test import TestCase
+from django.utils import timezone
+
+from accounts.enums import OutgoingEmailStatus
+from accounts.models import OutgoingEmail, User
+from utils.metrics import get_latency_stats, reset_latency_counters
+
+
+class FlakyConnection:
+    """Email backend failing the first ``failures`` messages."""
+
+    def __init__(self, failures=0, error=ConnectionError('Connection unexpectedly closed')):
+        self.failures = failures
+        self.error = error
+        self.opened = 0
+        self.sent = []
+        self.is_open = False
+
+    def open(self):
+        if self.is_open:
+            return False
+
+        self.opened += 1
+        self.is_open = True
+
+        return True
+
+    def close(self):
+        self.is_open = False
+
+    def send_messages(self, messages):
+        if self.failures:
+            self.failures -= 1
+            raise self.error
+
+        self.sent.extend(messages)
+
+        return len(messages)
+
+
+class OutgoingEmailCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('recipient', email='recipient@example.com')
+        reset_latency_counters()
+        self.addCleanup(reset_latency_counters)
+
+    def test_email_user(self):
+        self.user.email_user('Subject', 'Body', html_message='<p>Body</p>')
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutgoingEmail.send_pending(get_connection(), batch_size=10), 1)
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['recipient@example.com'])
+        self.assertEqual(mail.outbox[0].alternatives, [('<p>Body</p>', 'text/html')])
+        self.assertEqual(OutgoingEmail.objects.get().status, OutgoingEmailStatus.SENT.value)
+        self.assertEqual(OutgoingEmail.send_pending(get_connection(), batch_size=10), 0)
+
+    def test_one_connection(self):
+        connection = FlakyConnection()
+
+        for idx in range(5):
+            self.user.email_user('Subject %d' % idx, 'Body')
+
+        self.assertEqual(OutgoingEmail.send_pending(connection, batch_size=10), 5)
+
+        self.assertEqual(connection.opened, 1)
+        self.assertEqual([message.subject for message in connection.sent], ['Subject %d' % idx for idx in range(5)])
+        self.assertEqual(get_latency_stats('email.')['email.sent']['count'], 5)
+
+    def test_retry(self):
+        connection = FlakyConnection(failures=1)
+        self.user.email_user('Subject', 'Body')
+
+        self.assertEqual(OutgoingEmail.send_pending(connection, batch_size=10), 1)
+
+        email = OutgoingEmail.objects.get()
+        self.assertEqual((email.status, email.attempts), (OutgoingEmailStatus.PENDING.value, 1))
+        self.assertIn('ConnectionError', email.last_error)
+        self.assertGreater(email.date_next_attempt, timezone.now())
+        self.assertEqual(OutgoingEmail.send_pending(connection, batch_size=10), 0)
+
+        OutgoingEmail.objects.update(date_next_attempt=timezone.now())
+
+        self.assertEqual(OutgoingEmail.send_pending(connection, batch_size=10), 1)
+        self.assertEqual(OutgoingEmail.objects.get().status, OutgoingEmailStatus.SENT.value)
+        self.assertEqual(connection.opened, 2)
+
+    def test_connection_error_stops_batch(self):
+        connection = FlakyConnection(failures=1)
+
+        for idx in range(3):
+            self.user.email_user('Subject %d' % idx, 'Body')
+
+        self.assertEqual(OutgoingEmail.send_pending(connection, batch_size=10), 1)
+        self.assertEqual(connection.sent, [])
+        self.assertEqual(OutgoingEmail.objects.filter(date_next_attempt__lte=timezone.now()).count(), 2)
+
+        self.assertEqual(OutgoingEmail.send_pending(connection, batch_size=10), 2)
+        self.assertEqual([message.subject for message in connection.sent], ['Subject 1', 'Subject 2'])
+
+    def test_message_error(self):
+        connection = FlakyConnection(failures=1, error=SMTPRecipientsRefused({'recipient@example.com': (550, b'')}))
+
+        for idx in range(3):
+            self.user.email_user('Subject %d' % idx, 'Body')
+
+        self.assertEqual(OutgoingEmail.send_pending(connection, batch_size=10), 3)
+        self.assertEqual([message.subject for message in connection.sent], ['Subject 1', 'Subject 2'])
+
+    def test_failed(self):
+        connection = FlakyConnection(failures=OutgoingEmail.MAX_ATTEMPTS)
+        self.user.email_user('Subject', 'Body')
+
+        for _ in range(OutgoingEmail.MAX_ATTEMPTS):
+            OutgoingEmail.objects.update(date_next_attempt=timezone.now())
+            OutgoingEmail.send_pending(connection, batch_size=10)
+
+        self.assertEqual(OutgoingEmail.objects.get().status, OutgoingEmailStatus.FAILED.value)
+        self.assertEqual(get_latency_stats('email.')['email.failed']['count'], OutgoingEmail.MAX_ATTEMPTS)
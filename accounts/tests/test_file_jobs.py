@@ -0,0 +1,168 @@
+import datetime
+from hashlib import sha256
+import tempfile
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import override_settings, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.enums import FileJobAction, FileJobStatus
+from accounts.models import File, FileJob, generate_fake_file, UploadReservation, User
+
+
+class FileJobCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user('operator', email='operator@example.com')
+        self.files = []
+        for idx in range(5):
+            file = File(file=ContentFile(b'content %d' % idx, name='file%d.txt' % idx), owner=self.user)
+            file.save()
+            self.files.append(file)
+        User.objects.filter(pk=self.user.pk).update(used_storage=sum(file.size for file in self.files))
+
+    def process(self, batch_size):
+        with self.captureOnCommitCallbacks(execute=True):
+            return FileJob.process_pending(batch_size=batch_size)
+
+    def test_delete(self):
+        pending = generate_fake_file('pending.txt', owner=self.user)
+        UploadReservation.reserve(self.user, pending, 100)
+        job = FileJob.enqueue(FileJobAction.DELETE, File.objects.filter(owner=self.user), user=self.user)
+
+        self.assertEqual(job.total, 6)
+        self.assertEqual(self.process(4), 4)
+
+        job.refresh_from_db()
+
+        self.assertEqual(job.status, FileJobStatus.RUNNING.value)
+        self.assertEqual(job.processed, 4)
+
+        self.assertEqual(self.process(4), 2)
+        self.assertEqual(self.process(4), 0)
+
+        job.refresh_from_db()
+        self.user.refresh_from_db()
+
+        self.assertEqual(job.status, FileJobStatus.DONE.value)
+        self.assertEqual(job.progress, 100.0)
+        self.assertFalse(File.objects.exists())
+        self.assertFalse(UploadReservation.objects.exists())
+        self.assertEqual(self.user.used_storage, 0)
+        self.assertEqual(self.user.reserved_storage, 0)
+        self.assertFalse(any(default_storage.exists(file.file.name) for file in self.files))
+
+    def test_delete_cascades(self):
+        # Reservation left by an interrupted finish.
+        UploadReservation.objects.create(
+            user=self.user, file=self.files[0], size=self.files[0].size, date_expires=timezone.now()
+        )
+        FileJob.enqueue(FileJobAction.DELETE, File.objects.filter(pk=self.files[0].pk), user=self.user)
+
+        self.assertEqual(self.process(4), 1)
+
+        self.user.refresh_from_db()
+
+        self.assertFalse(UploadReservation.objects.exists())
+        self.assertEqual(self.user.used_storage, sum(file.size for file in self.files[1:]))
+
+    def test_recompute_sha256(self):
+        File.objects.update(sha256='broken', content_type='broken')
+        FileJob.enqueue(FileJobAction.RECOMPUTE_SHA256, File.objects.all())
+
+        self.assertEqual(self.process(10), 5)
+
+        for file in self.files:
+            refreshed = File.objects.get(pk=file.pk)
+
+            self.assertEqual(refreshed.sha256, sha256(file.file.open('rb').read()).hexdigest())
+            self.assertEqual(refreshed.content_type, 'broken')
+            self.assertEqual(refreshed.version, file.version + 1)
+
+    def test_regenerate_metadata(self):
+        file = self.files[0]
+        File.objects.filter(pk=file.pk).update(size=1, content_type='broken', original_extension=None)
+        FileJob.enqueue(FileJobAction.REGENERATE_METADATA, File.objects.filter(pk=file.pk))
+        self.process(10)
+
+        refreshed = File.objects.get(pk=file.pk)
+        self.user.refresh_from_db()
+
+        self.assertEqual(refreshed.size, file.size)
+        self.assertEqual(refreshed.content_type, 'text/plain')
+        self.assertEqual(refreshed.original_extension, '.txt')
+        self.assertEqual(self.user.used_storage, sum(file.size for file in self.files) + file.size - 1)
+
+    def test_missing_file(self):
+        default_storage.delete(self.files[0].file.name)
+        job = FileJob.enqueue(FileJobAction.SNIFF_CONTENT_TYPE, File.objects.all())
+        self.process(10)
+        job.refresh_from_db()
+
+        self.assertEqual(job.status, FileJobStatus.DONE.value)
+        self.assertEqual(job.failed, 1)
+        self.assertTrue(job.last_error.startswith('%s: ' % self.files[0].pk))
+
+    @patch.object(FileJob, 'READ_CHUNK_SIZE', 2)
+    def test_read_chunks(self):
+        job = FileJob.enqueue(FileJobAction.RECOMPUTE_SHA256, File.objects.all())
+
+        self.assertEqual(FileJob.process_next_chunk(10), 2)
+
+        job.refresh_from_db()
+
+        self.assertEqual(job.processed, 2)
+        self.assertIsNone(job.date_leased_until)
+
+    def test_leased_job(self):
+        job = FileJob.enqueue(FileJobAction.RECOMPUTE_SHA256, File.objects.all())
+        FileJob.objects.filter(pk=job.pk).update(date_leased_until=timezone.now() + datetime.timedelta(minutes=1))
+
+        self.assertIsNone(FileJob.process_next_chunk(10))
+
+        # Lease of a crashed worker expires.
+        FileJob.objects.filter(pk=job.pk).update(date_leased_until=timezone.now() - datetime.timedelta(minutes=1))
+
+        self.assertEqual(self.process(10), 5)
+
+    def test_database_error(self):
+        job = FileJob.enqueue(FileJobAction.SNIFF_CONTENT_TYPE, File.objects.all())
+        content_types = [None] + ['text/csv'] * 4
+
+        # NOT NULL constraint fails for the first file only.
+        with patch.object(File, 'get_content_type_from_buffer', side_effect=content_types):
+            self.process(10)
+
+        job.refresh_from_db()
+
+        self.assertEqual((job.status, job.processed, job.failed), (FileJobStatus.DONE.value, 5, 1))
+        self.assertIn('IntegrityError', job.last_error)
+        self.assertEqual(File.objects.filter(content_type='text/csv').count(), 4)
+
+    def test_admin_action(self):
+        admin = User.objects.create_superuser(
+            'superuser',
+            email='superuser@example.com',
+            password='password',
+            is_active=True
+        )
+        self.client.force_login(admin)
+        self.client.post(reverse('admin:accounts_file_changelist'), {
+            'action': 'queue_delete',
+            '_selected_action': [file.pk for file in self.files[:2]],
+        })
+        job = FileJob.objects.get()
+
+        self.assertEqual(job.action, FileJobAction.DELETE.value)
+        self.assertEqual(job.file_ids, sorted(file.pk for file in self.files[:2]))
+        self.assertEqual(File.objects.count(), 5)
@@ -0,0 +1,72 @@
+import datetime
+
+from django.test import TestCase
+from django.utils import timezone
+
+from accounts.exceptions import ReservationExceeded
+from accounts.models import DEFAULT_STORAGE_SIZE, generate_fake_file, UploadReservation, User
+
+
+class UploadReservationCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('reservation', email='reservation@example.com')
+
+    def test_reserve(self):
+        file = generate_fake_file('first.txt', owner=self.user)
+        reservation = UploadReservation.reserve(self.user, file, DEFAULT_STORAGE_SIZE // 2)
+
+        self.assertIsNotNone(reservation)
+
+        self.user.refresh_from_db()
+
+        self.assertEqual(self.user.reserved_storage, DEFAULT_STORAGE_SIZE // 2)
+
+        file = generate_fake_file('second.txt', owner=self.user)
+
+        self.assertIsNone(UploadReservation.reserve(self.user, file, DEFAULT_STORAGE_SIZE // 2))
+
+    def test_commit(self):
+        file = generate_fake_file('file.txt', owner=self.user)
+        UploadReservation.reserve(self.user, file, 100)
+        file.size = 90
+
+        UploadReservation.commit(file)
+        self.user.refresh_from_db()
+
+        self.assertEqual(self.user.reserved_storage, 0)
+        self.assertEqual(self.user.used_storage, 90)
+        self.assertFalse(UploadReservation.objects.exists())
+
+    def test_commit_exceeded(self):
+        file = generate_fake_file('file.txt', owner=self.user)
+        UploadReservation.reserve(self.user, file, 100)
+        file.size = 101
+
+        with self.assertRaises(ReservationExceeded):
+            UploadReservation.commit(file)
+
+        self.user.refresh_from_db()
+
+        self.assertEqual(self.user.reserved_storage, 100)
+        self.assertEqual(self.user.used_storage, 0)
+        self.assertTrue(UploadReservation.objects.exists())
+
+    def test_sweep(self):
+        file = generate_fake_file('file.txt', owner=self.user)
+        UploadReservation.reserve(self.user, file, 100)
+        UploadReservation.objects.update(date_expires=timezone.now() - datetime.timedelta(seconds=1))
+
+        self.assertEqual(UploadReservation.sweep(), 1)
+
+        self.user.refresh_from_db()
+
+        self.assertEqual(self.user.reserved_storage, 0)
+
+    def test_delete_pending_file(self):
+        file = generate_fake_file('file.txt', owner=self.user)
+        UploadReservation.reserve(self.user, file, 100)
+
+        file.delete()
+        self.user.refresh_from_db()
+
+        self.assertEqual(self.user.reserved_storage, 0)
@@ -0,0 +1,308 @@
+from http import HTTPStatus
+import tempfile
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import override_settings, TestCase
+from django.urls import reverse
+
+from accounts.dataclasses import SignedURLReturnObject
+from accounts.enums import ContentDisposition
+from accounts.models import File, generate_fake_file, UploadReservation, User
+from utils.metrics import get_counter_values, reset_latency_counters
+
+
+class FileDownloadViewCase(TestCase):
+    def setUp(self):
+        # Users are cached by id, ids are reused between tests.
+        cache.clear()
+        self.user = User.objects.create_user('downloader', email='downloader@example.com', is_active=True)
+        self.file = generate_fake_file('file.txt', owner=self.user, is_private=True)
+        File.objects.filter(pk=self.file.pk).update(size=1)
+        self.url = reverse('accounts:file_download', kwargs={'url_path': self.file.url_path})
+
+        patcher = patch.object(
+            File,
+            'generate_download_signed_url',
+            return_value=SignedURLReturnObject(url='https://example.com/file', headers={}, method='GET', body={})
+        )
+        self.generate_download_signed_url = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_get(self):
+        self.client.force_login(self.user)
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        self.assertEqual(response['Location'], 'https://example.com/file')
+        self.assertEqual(
+            self.generate_download_signed_url.call_args.kwargs['disposition'],
+            ContentDisposition.ATTACHMENT
+        )
+
+    def test_head_inline(self):
+        self.client.force_login(self.user)
+        response = self.client.head(self.url, {'inline': ''})
+
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        self.assertEqual(self.generate_download_signed_url.call_args.kwargs['disposition'], ContentDisposition.INLINE)
+
+    def test_private_file(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+        self.generate_download_signed_url.assert_not_called()
+
+    async def test_async_client(self):
+        response = await self.async_client.get(self.url)
+
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+        self.generate_download_signed_url.assert_not_called()
+
+
+@patch.object(
+    File,
+    'generate_post_upload_signed_url',
+    return_value=SignedURLReturnObject(url='https://example.com/upload', headers={}, method='POST', body={})
+)
+class SignedURLUploadViewCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        reset_latency_counters()
+        self.addCleanup(reset_latency_counters)
+
+        self.user = User.objects.create_user('uploader', email='uploader@example.com', is_active=True)
+        self.url = reverse('accounts:upload')
+
+    def post(self, action, data=None, **headers):
+        return self.client.post(
+            self.url,
+            data or {},
+            HTTP_X_TRANSFER_TYPE='signed_url',
+            HTTP_X_UPLOAD_ACTION=action,
+            **headers
+        )
+
+    def test_upload(self, generate_post_upload_signed_url):
+        self.client.force_login(self.user)
+        response = self.post(
+            'start',
+            {'filename': 'upload.txt', 'file_size': 7, 'is_private': 'true'},
+            HTTP_X_SIGNED_URL_REQUEST='true'
+        )
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.json()['request_data']['url'], 'https://example.com/upload')
+
+        pending = File.objects.get(owner=self.user, size__isnull=True)
+        default_storage.save(pending.file.name, ContentFile(b'content'))
+        token = response.json()['token']
+        response = self.post('finish', HTTP_X_UPLOAD_SIGNATURE=token)
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(
+            response.json()['redirect_url'],
+            reverse('accounts:file', kwargs={'url_path': pending.url_path})
+        )
+        self.assertEqual(File.objects.get(pk=pending.pk).size, 7)
+        self.assertEqual(self.post('finish', HTTP_X_UPLOAD_SIGNATURE=token).status_code, HTTPStatus.FORBIDDEN)
+        self.assertEqual(
+            get_counter_values('upload.'),
+            {'upload.started': 1, 'upload.finished': 1, 'upload.bytes': 7}
+        )
+
+    def test_finish_retry_after_storage_error(self, generate_post_upload_signed_url):
+        self.client.force_login(self.user)
+        response = self.post(
+            'start',
+            {'filename': 'upload.txt', 'file_size': 7, 'is_private': 'true'},
+            HTTP_X_SIGNED_URL_REQUEST='true'
+        )
+        token = response.json()['token']
+        pending = File.objects.get(owner=self.user, size__isnull=True)
+        default_storage.save(pending.file.name, ContentFile(b'content'))
+
+        with patch.object(File, 'save', side_effect=OSError('Storage is unavailable')):
+            with self.assertRaises(OSError):
+                self.post('finish', HTTP_X_UPLOAD_SIGNATURE=token)
+
+        self.assertIsNone(File.objects.get(pk=pending.pk).size)
+
+        response = self.post('finish', HTTP_X_UPLOAD_SIGNATURE=token)
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(File.objects.get(pk=pending.pk).size, 7)
+        self.assertEqual(User.objects.get(pk=self.user.pk).used_storage, 7)
+
+    def test_finish_bigger_than_reserved(self, generate_post_upload_signed_url):
+        self.client.force_login(self.user)
+        response = self.post(
+            'start',
+            {'filename': 'upload.txt', 'file_size': 1, 'is_private': 'true'},
+            HTTP_X_SIGNED_URL_REQUEST='true'
+        )
+        generate_post_upload_signed_url.assert_called_once_with(size=1)
+
+        pending = File.objects.get(owner=self.user, size__isnull=True)
+        default_storage.save(pending.file.name, ContentFile(b'content'))
+        response = self.post('finish', HTTP_X_UPLOAD_SIGNATURE=response.json()['token'])
+
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+        self.assertFalse(File.objects.exists())
+        self.assertFalse(UploadReservation.objects.exists())
+        self.assertFalse(default_storage.exists(pending.file.name))
+
+        user = User.objects.get(pk=self.user.pk)
+        self.assertEqual((user.used_storage, user.reserved_storage), (0, 0))
+
+    def test_not_allowed(self, generate_post_upload_signed_url):
+        response = self.post('start', {'filename': 'upload.txt', 'file_size': 'seven', 'is_private': 'true'},
+                             HTTP_X_SIGNED_URL_REQUEST='true')
+
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+        self.assertEqual(self.client.post(self.url).status_code, HTTPStatus.FORBIDDEN)
+        self.assertFalse(File.objects.exists())
+
+
+class LocalFileDownloadViewCase(TestCase):
+    def setUp(self):
+        self.file = generate_fake_file('file.txt', is_private=False)
+        File.objects.filter(pk=self.file.pk).update(content_type='text/plain')
+
+    def get_signed_url(self, expiration=None, disposition=ContentDisposition.ATTACHMENT):
+        return self.file.generate_local_download_signed_url(expiration=expiration, disposition=disposition).url
+
+    @override_settings(BF_SENDFILE_BACKEND='nginx', BF_SENDFILE_URL='/protected/')
+    def test_nginx(self):
+        response = self.client.get(self.get_signed_url())
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected/%s' % self.file.file.name)
+        self.assertEqual(response['Content-Type'], 'text/plain')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="file.txt"')
+
+    @override_settings(BF_SENDFILE_BACKEND='uwsgi')
+    def test_inline_sendfile(self):
+        response = self.client.get(self.get_signed_url(disposition=ContentDisposition.INLINE))
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response['X-Sendfile'], self.file.file.path)
+        self.assertEqual(response['Content-Disposition'], 'inline; filename="file.txt"')
+
+    @override_settings(BF_SENDFILE_BACKEND='nginx')
+    def test_active_content_is_downloaded(self):
+        File.objects.filter(pk=self.file.pk).update(content_type='text/html')
+        response = self.client.get(self.get_signed_url(disposition=ContentDisposition.INLINE))
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response['Content-Type'], 'application/octet-stream')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="file.txt"')
+        self.assertEqual(response['Content-Security-Policy'], 'sandbox')
+
+    @override_settings(BF_SENDFILE_BACKEND='nginx')
+    def test_invalid_signature(self):
+        url = self.get_signed_url().replace('disposition=attachment', 'disposition=inline')
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+
+    @override_settings(BF_SENDFILE_BACKEND='nginx')
+    def test_expired_signature(self):
+        url = self.get_signed_url()
+
+        with patch('base.utils.datetime') as datetime_mock:
+            datetime_mock.datetime.now.return_value.timestamp.return_value = 2 ** 40
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+
+
+class FileStreamViewCase(TestCase):
+    CONTENT = bytes(range(256)) * 4
+
+    def setUp(self):
+        cache.clear()
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.file = File(file=ContentFile(self.CONTENT, name='file.bin'))
+        self.file.save()
+        self.url = reverse('accounts:file_stream', kwargs={'url_path': self.file.url_path})
+
+    def test_get(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(b''.join(response.streaming_content), self.CONTENT)
+        self.assertEqual(response['Content-Length'], str(len(self.CONTENT)))
+        self.assertEqual(response['ETag'], '"%s"' % self.file.sha256)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+    def test_inline(self):
+        File.objects.filter(pk=self.file.pk).update(content_type='image/png')
+        response = self.client.head(self.url, {'inline': ''})
+
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertEqual(response['Content-Disposition'], 'inline; filename="file.bin"')
+        self.assertEqual(response['Content-Security-Policy'], 'sandbox')
+
+    def test_active_content_is_downloaded(self):
+        for content_type in ('text/html', 'image/svg+xml', 'text/xml'):
+            File.objects.filter(pk=self.file.pk).update(content_type=content_type)
+            response = self.client.head(self.url, {'inline': ''})
+
+            self.assertEqual(response['Content-Type'], 'application/octet-stream')
+            self.assertEqual(response['Content-Disposition'], 'attachment; filename="file.bin"')
+            self.assertEqual(response['Content-Security-Policy'], 'sandbox')
+
+    def test_range(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=100-199')
+
+        self.assertEqual(response.status_code, HTTPStatus.PARTIAL_CONTENT)
+        self.assertEqual(b''.join(response.streaming_content), self.CONTENT[100:200])
+        self.assertEqual(response['Content-Range'], 'bytes 100-199/%d' % len(self.CONTENT))
+        self.assertEqual(response['Content-Length'], '100')
+
+    def test_if_range(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"%s"' % self.file.sha256)
+        self.assertEqual(response.status_code, HTTPStatus.PARTIAL_CONTENT)
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"outdated"')
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(b''.join(response.streaming_content), self.CONTENT)
+
+    def test_range_not_satisfiable(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=5000-')
+
+        self.assertEqual(response.status_code, HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+        self.assertEqual(response['Content-Range'], 'bytes */%d' % len(self.CONTENT))
+
+    def test_not_modified(self):
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH='"%s"' % self.file.sha256)
+
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_private_file(self):
+        owner = User.objects.create_user('owner', email='owner@example.com', is_active=True)
+        File.objects.filter(pk=self.file.pk).update(owner=owner, is_private=True)
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+
+        self.client.force_login(owner)
+        response = self.client.head(self.url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response['Cache-Control'], 'private')
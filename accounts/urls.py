@@ -5,9 +5,13 @@ from accounts.views import (
     Account,
     EmailActivationView,
     FileDeleteView,
+    FileDownloadView,
+    FileStreamView,
     FileView,
+    LocalFileDownloadView,
     SettingsView,
     SigInView,
+    SignedURLUploadView,
     SignUpView
 )
 
@@ -17,8 +21,12 @@ app_name = 'accounts'
 
 urlpatterns = [
     path('', Account.as_view(), name='index'),
+    path('uploads/', SignedURLUploadView.as_view(), name='upload'),
     path('files/<str:url_path>/', FileView.as_view(), name='file'),
     path('files/<str:url_path>/delete/', FileDeleteView.as_view(), name='file_delete'),
+    path('files/<str:url_path>/download/', FileDownloadView.as_view(), name='file_download'),
+    path('files/<str:url_path>/stream/', FileStreamView.as_view(), name='file_stream'),
+    path('files/<str:url_path>/local/', LocalFileDownloadView.as_view(), name='file_local_download'),
     path('signup/', SignUpView.as_view(), name='signup'),
     path('signin/', SigInView.as_view(), name='signin'),
     path('logout/', LogoutView.as_view(template_name='accounts/auth/logout.html'), name='logout'),
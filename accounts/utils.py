@@ -1,14 +1,28 @@
 import datetime
 import secrets
 from typing import Type
+from urllib.parse import quote
 from uuid import uuid4
 
 from django.db import models
 from django.utils.crypto import get_random_string
 
+from accounts.enums import ContentDisposition
 from accounts.exceptions import SafeRandomStringNotGenerated, UUID4HEXNotGenerated
 
 
+DEFAULT_CONTENT_TYPE: str = 'application/octet-stream'
+# Passive content types browsers can't execute scripts from, only they are served as is and inline.
+INLINE_CONTENT_TYPES = (
+    'application/pdf',
+    'text/plain',
+)
+INLINE_CONTENT_TYPE_PREFIXES = ('image/', 'audio/', 'video/')
+ACTIVE_CONTENT_TYPES = (
+    'image/svg+xml',
+)
+
+
 def file_upload_path(instance: Type[models.Model], filename: str) -> str:
     """Generates file upload path.
 
@@ -75,3 +89,55 @@ def get_safe_random_string(instance: Type[models.Model], field: str, tries: int
             return uuid4_hex
     else:
         raise SafeRandomStringNotGenerated()
+
+
+def get_content_disposition_header(disposition: str, filename: str) -> str:
+    """Generates Content-Disposition header value.
+
+    Non latin-1 file names are encoded according to RFC 6266.
+
+    Args:
+        disposition (str): ``attachment`` or ``inline``.
+        filename (str): File name.
+
+    Returns:
+        str: Content-Disposition header value.
+    """
+    try:
+        filename.encode('latin-1')
+    except UnicodeEncodeError:
+        return "%s; filename*=utf-8''%s" % (disposition, quote(filename))
+
+    return '%s; filename="%s"' % (disposition, filename.replace('\\', '\\\\').replace('"', r'\"'))
+
+
+def is_passive_content_type(content_type: str) -> bool:
+    media_type: str = content_type.split(';', 1)[0].strip().lower()
+
+    if media_type in ACTIVE_CONTENT_TYPES:
+        return False
+
+    return media_type in INLINE_CONTENT_TYPES or media_type.startswith(INLINE_CONTENT_TYPE_PREFIXES)
+
+
+def set_file_content_headers(response, content_type: str, disposition: ContentDisposition, filename: str) -> None:
+    """Sets content headers of the user file served from the application origin.
+
+    HTML, SVG, XML and other active content would run scripts with the session of the viewer,
+    so only passive content types are sent as is and can be opened inline, other files are always
+    downloaded as ``application/octet-stream``. ``Content-Security-Policy: sandbox`` blocks scripts
+    even if the browser renders the file anyway.
+
+    Args:
+        response (django.http.HttpResponse): File response.
+        content_type (str): Stored content type of the file.
+        disposition (accounts.enums.ContentDisposition): Requested disposition.
+        filename (str): Original file name.
+    """
+    if not content_type or not is_passive_content_type(content_type):
+        content_type = DEFAULT_CONTENT_TYPE
+        disposition = ContentDisposition.ATTACHMENT
+
+    response['Content-Type'] = content_type
+    response['Content-Disposition'] = get_content_disposition_header(disposition.value, filename)
+    response['Content-Security-Policy'] = 'sandbox'
@@ -1,6 +1,9 @@
 from datetime import timedelta
-from typing import Union
+from http import HTTPStatus
+from typing import Tuple, Union
+from urllib.parse import quote
 
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import login
@@ -8,23 +11,42 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.views import LoginView
 from django.core.exceptions import PermissionDenied
 from django.core.paginator import Paginator
-from django.http import HttpResponseForbidden, JsonResponse
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    HttpResponseForbidden,
+    HttpResponseNotModified,
+    HttpResponseRedirect,
+    StreamingHttpResponse
+)
 from django.http.request import HttpHeaders
 from django.shortcuts import redirect, render
 from django.template.loader import render_to_string
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.datastructures import MultiValueDictKeyError
 from django.utils.html import strip_tags
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
 from django.utils.translation import gettext as _
 from django.views import View
 
 from accounts.dataclasses import SignedURLReturnObject
-from accounts.enums import TransferType, UploadAction, UploadStatus
+from accounts.enums import ContentDisposition, SendfileBackend, TransferType, UploadAction, UploadStatus
 from accounts.exceptions import NotAllowed
 from accounts.forms import ChangePasswordForm, SignInForm, FileUploadForm, SignUpForm
-from accounts.models import File, generate_fake_file, User
+from accounts.models import File, User
+from accounts.services import finish_upload, start_upload
+from accounts.utils import set_file_content_headers
 from base.exceptions import FatalSignatureError, SignatureExpiredError
-from base.utils import decode_jwt_signature, generate_jwt_signature
+from base.utils import (
+    aget_request_user,
+    decode_jwt_signature,
+    generate_jwt_signature,
+    verify_url_signature
+)
+from utils.json import FastJsonResponse
+from utils.streams import DEFAULT_CHUNK_SIZE, iter_storage_range, parse_range_header, RangeNotSatisfiable
 
 
 BOOK_CONTENT_TYPES = (
@@ -128,17 +150,83 @@ CATEGORIES = {
 }
 
 
-class Account(View):
-    template_name = 'accounts/account.html'
-    page_size = 12
-    # Looks like the max length is 2 ** 8, but 2 ** 6 is big enough
-    max_search_length: int = 2 ** 6
+class SignedURLUploadMixin:
+    """Request parsing of the signed URL upload START and FINISH actions."""
     TRANSFER_TYPE_KEY = 'X-Transfer-Type'
     SUPPORTED_TRANSFER_TYPES = (TransferType.SIGNED_URL,)
     SIGNED_URL_REQUEST_KEY = 'X-Signed-URL-request'
     UPLOAD_ACTION_KEY = 'X-Upload-Action'
     UPLOAD_SIGNATURE_KEY = 'X-Upload-Signature'
 
+    def _get_transfer_type(self, headers: HttpHeaders):
+        transfer_type: Union[str, None] = headers.get(self.TRANSFER_TYPE_KEY, None)
+
+        if transfer_type is None:
+            return TransferType.DEFAULT
+
+        if transfer_type.upper() not in [_type.value for _type in self.SUPPORTED_TRANSFER_TYPES]:
+            raise NotAllowed()
+
+        return TransferType[transfer_type.upper()]
+
+    # noinspection PyMethodMayBeStatic
+    def get_header(self, headers, header_key):
+        header_value = headers.get(header_key, None)
+
+        if header_value is None:
+            raise NotAllowed()
+
+        return header_value
+
+    # noinspection PyMethodMayBeStatic
+    def _cast_check_input_to_bool(self, val):
+        if val == 'true':
+            return True
+        elif val == 'false':
+            return False
+
+        raise NotAllowed()
+
+    def parse_start_body(self, body: dict) -> Tuple[str, int, bool]:
+        """Returns file name, file size and privacy of the START request.
+
+        Raises:
+            accounts.exceptions.NotAllowed: If some of the fields are missing or not valid.
+        """
+        try:
+            filename: str = body['filename']
+        except MultiValueDictKeyError:
+            raise NotAllowed()
+        try:
+            file_size: str = body['file_size']
+        except MultiValueDictKeyError:
+            raise NotAllowed()
+        try:
+            actual_file_size = int(file_size)
+        except (ValueError, TypeError):
+            raise NotAllowed()
+
+        try:
+            is_private: bool = self._cast_check_input_to_bool(body['is_private'])
+        except MultiValueDictKeyError:
+            raise NotAllowed()
+
+        return filename, actual_file_size, is_private
+
+    # noinspection PyMethodMayBeStatic
+    def get_finish_response_data(self, file: File) -> dict:
+        return {
+            'redirect_url': reverse('accounts:file', kwargs={'url_path': file.url_path}),
+            'status': UploadStatus.DONE.value
+        }
+
+
+class Account(SignedURLUploadMixin, View):
+    template_name = 'accounts/account.html'
+    page_size = 12
+    # Looks like the max length is 2 ** 8, but 2 ** 6 is big enough
+    max_search_length: int = 2 ** 6
+
     def check_search_length(self, search_query: str):
         if self.max_search_length >= len(search_query):
             return True
@@ -221,105 +309,21 @@ class Account(View):
         if upload_action.upper() == UploadAction.START.value:
             request_key: str = self.get_header(request.headers, self.SIGNED_URL_REQUEST_KEY)
 
-            return JsonResponse(self.start_signed_url_upload(request.POST, request_key, request.user))
+            return FastJsonResponse(self.start_signed_url_upload(request.POST, request_key, request.user))
         elif upload_action.upper() == UploadAction.FINISH.value:
             signature: str = self.get_header(request.headers, self.UPLOAD_SIGNATURE_KEY)
 
-            return JsonResponse(self.finish_upload_signed_url(signature))
+            return FastJsonResponse(self.finish_upload_signed_url(signature))
         else:
             raise NotAllowed()
 
-    # noinspection PyMethodMayBeStatic
     def finish_upload_signed_url(self, signature):
-        try:
-            payload = decode_jwt_signature(signature)
-        except (FatalSignatureError, SignatureExpiredError):
-            raise NotAllowed()
-
-        try:
-            upload_hash = payload['upload_hash']
-        except KeyError:
-            raise NotAllowed()
-
-        try:
-            file = File.objects.get(upload_hex=upload_hash)
-        except File.DoesNotExist:
-            raise NotAllowed()
-
-        try:
-            file.save()
-        except FileNotFoundError:
-            raise NotAllowed()
-
-        return {
-            'redirect_url': reverse('accounts:file', kwargs={'url_path': file.url_path}),
-            'status': UploadStatus.DONE.value
-        }
-
-    # noinspection PyMethodMayBeStatic
-    def _cast_check_input_to_bool(self, val):
-        if val == 'true':
-            return True
-        elif val == 'false':
-            return False
-
-        raise NotAllowed()
+        return self.get_finish_response_data(finish_upload(signature))
 
     def start_signed_url_upload(self, body: dict, request_key: str, user):
-        payload: dict = dict()
-
-        try:
-            filename: str = body['filename']
-        except MultiValueDictKeyError:
-            raise NotAllowed()
-        try:
-            file_size: str = body['file_size']
-        except MultiValueDictKeyError:
-            raise NotAllowed()
-        try:
-            actual_file_size = int(file_size)
-        except (ValueError, TypeError):
-            raise NotAllowed()
-
-        try:
-            is_private: bool = self._cast_check_input_to_bool(body['is_private'])
-        except MultiValueDictKeyError:
-            raise NotAllowed()
-
-        owner = user if not user.is_anonymous else None
-        # Dirty hack for those, who reads my source code:
-        # In theory you can replace uploaded file after starts signed upload and before finalising upload,
-        # because in content-length-range for now file_size is not passed.
-        # I can't rely on JS and 100% be sure, that the sizes will be similar.
-        # TODO: Check size calculation on client/backend sides.
-        if owner is not None and not owner.is_file_size_allowed(actual_file_size):
-            raise NotAllowed()
-        file: File = generate_fake_file(filename, owner=owner, is_private=is_private)
-
-        for key, value in body.items():
-            payload[key] = value
-
-        payload.update(
-            {
-                'request_key': request_key,
-                'upload_hash': file.upload_hex,
-                'filename': filename,
-            }
-        )
+        filename, file_size, is_private = self.parse_start_body(body)
 
-        token = generate_jwt_signature(payload)
-        upload_signed_return_object = file.generate_post_upload_signed_url()
-
-        return {
-            'status': UploadStatus.PENDING.value,
-            'token': token,
-            'request_data': {
-                'url': upload_signed_return_object.url,
-                'headers': upload_signed_return_object.headers,
-                'method': upload_signed_return_object.method,
-                'body': upload_signed_return_object.body,
-            }
-        }
+        return start_upload(filename, file_size, is_private, user)
 
     def _default_upload(self, request):
         file_upload_form: FileUploadForm = FileUploadForm(
@@ -377,30 +381,45 @@ class Account(View):
         except NotAllowed:
             return HttpResponseForbidden()
 
-    def _get_transfer_type(self, headers: HttpHeaders):
-        transfer_type: Union[str, None] = headers.get(self.TRANSFER_TYPE_KEY, None)
+    def get_related_files(self, user: User, category: dict, query: str):
+        cond: dict = self.get_condition(user, category, query)
 
-        if transfer_type is None:
-            return TransferType.DEFAULT
+        return File.objects.filter(**cond).exclude(size__isnull=True)
 
-        if transfer_type.upper() not in [_type.value for _type in self.SUPPORTED_TRANSFER_TYPES]:
-            raise NotAllowed()
 
-        return TransferType[transfer_type.upper()]
+class SignedURLUploadView(SignedURLUploadMixin, View):
+    """Signed URL upload START and FINISH of the account page as an async view.
 
-    # noinspection PyMethodMayBeStatic
-    def get_header(self, headers, header_key):
-        header_value = headers.get(header_key, None)
+    Under ASGI the event loop isn't blocked while storage and database are called, they are called
+    in the thread pool.
+    """
+    http_method_names = ['post']
 
-        if header_value is None:
+    async def post(self, request, *args, **kwargs):
+        try:
+            return await self.upload(request)
+        except NotAllowed:
+            return HttpResponseForbidden()
+
+    async def upload(self, request):
+        if self._get_transfer_type(request.headers) != TransferType.SIGNED_URL:
             raise NotAllowed()
 
-        return header_value
+        upload_action: str = self.get_header(request.headers, self.UPLOAD_ACTION_KEY)
 
-    def get_related_files(self, user: User, category: dict, query: str):
-        cond: dict = self.get_condition(user, category, query)
+        if upload_action.upper() == UploadAction.START.value:
+            self.get_header(request.headers, self.SIGNED_URL_REQUEST_KEY)
+            filename, file_size, is_private = self.parse_start_body(request.POST)
+            user = await aget_request_user(request)
 
-        return File.objects.filter(**cond).exclude(size__isnull=True)
+            return FastJsonResponse(await sync_to_async(start_upload)(filename, file_size, is_private, user))
+        elif upload_action.upper() == UploadAction.FINISH.value:
+            signature: str = self.get_header(request.headers, self.UPLOAD_SIGNATURE_KEY)
+            file: File = await sync_to_async(finish_upload)(signature)
+
+            return FastJsonResponse(self.get_finish_response_data(file))
+
+        raise NotAllowed()
 
 
 class FileView(View):
@@ -460,7 +479,8 @@ class FileView(View):
             context={
                 'file': file,
                 'upload_url': signed_url_object.url,
-                'expiration': timedelta(seconds=expiration),
+                # Signed URL can be returned from the cache, so the actual lifetime can be less than requested.
+                'expiration': timedelta(seconds=int((signed_url_object.expires_at - timezone.now()).total_seconds())),
             }
         )
 
@@ -472,6 +492,189 @@ class FileView(View):
         return File.objects.exclude(size__isnull=True).get(url_path=url_path)
 
 
+class FileDownloadView(View):
+    """Redirects to the signed download URL of the file.
+
+    Supports ``?inline`` query parameter to open the file in the browser instead of downloading it.
+    """
+    http_method_names = ['get', 'head']
+    INLINE_KEY: str = 'inline'
+    ONE_HOUR: int = 60 * 60
+
+    async def get(self, request, *args, **kwargs):
+        try:
+            file = await File.objects.exclude(size__isnull=True).aget(url_path=kwargs['url_path'])
+        except (KeyError, File.DoesNotExist):
+            raise PermissionDenied()
+
+        if not file.is_user_has_access(await aget_request_user(request)):
+            raise PermissionDenied()
+
+        disposition: ContentDisposition = ContentDisposition.ATTACHMENT
+
+        if self.INLINE_KEY in request.GET:
+            disposition = ContentDisposition.INLINE
+
+        # Signing is local, but cached URLs are read from the cache backend, which is blocking.
+        signed_url_object: SignedURLReturnObject = await sync_to_async(file.generate_download_signed_url)(
+            expiration=self.ONE_HOUR,
+            disposition=disposition
+        )
+
+        return HttpResponseRedirect(signed_url_object.url)
+
+
+class FileStreamView(View):
+    """Streams the file from the storage through the application.
+
+    Used by clients which can't follow signed URLs. Supports single ``Range`` requests with
+    ``If-Range`` validation, so download managers can fetch the file in parallel segments.
+    Memory usage doesn't depend on the file size, the file is sent in chunks of ``CHUNK_SIZE``.
+    """
+    http_method_names = ['get', 'head']
+    INLINE_KEY: str = 'inline'
+    CHUNK_SIZE: int = DEFAULT_CHUNK_SIZE
+
+    def get(self, request, *args, **kwargs):
+        return self.stream(request, kwargs.get('url_path'), with_body=True)
+
+    def head(self, request, *args, **kwargs):
+        return self.stream(request, kwargs.get('url_path'), with_body=False)
+
+    def stream(self, request, url_path, with_body: bool):
+        try:
+            file = FileView.get_related_file(url_path)
+        except File.DoesNotExist:
+            raise PermissionDenied()
+
+        if not file.is_user_has_access(request.user):
+            raise PermissionDenied()
+
+        etag: str = '"%s"' % file.sha256
+        last_modified: int = int(file.date_uploaded.timestamp())
+
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
+            response['ETag'] = etag
+            return response
+
+        byte_range = None
+
+        if self.is_if_range_satisfied(request, etag, last_modified):
+            try:
+                byte_range = parse_range_header(request.headers.get('Range'), file.size)
+            except RangeNotSatisfiable:
+                response = HttpResponse(status=HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                response['Content-Range'] = 'bytes */%d' % file.size
+                return response
+
+        start, end = 0, file.size - 1
+        status: int = HTTPStatus.OK
+
+        if byte_range is not None:
+            start, end = byte_range
+            status = HTTPStatus.PARTIAL_CONTENT
+
+        if with_body and file.size > 0:
+            response = StreamingHttpResponse(
+                iter_storage_range(file.file.storage, file.file.name, start, end, self.CHUNK_SIZE),
+                status=status
+            )
+        else:
+            response = HttpResponse(status=status)
+
+        if status == HTTPStatus.PARTIAL_CONTENT:
+            response['Content-Range'] = 'bytes %d-%d/%d' % (start, end, file.size)
+
+        disposition: ContentDisposition = ContentDisposition.ATTACHMENT
+
+        if self.INLINE_KEY in request.GET:
+            disposition = ContentDisposition.INLINE
+
+        response['Content-Length'] = str(max(end - start + 1, 0))
+        set_file_content_headers(response, file.content_type, disposition, file.original_full_name)
+        response['Accept-Ranges'] = 'bytes'
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        response['Cache-Control'] = 'private' if file.is_private else 'public'
+
+        return response
+
+    @staticmethod
+    def is_if_range_satisfied(request, etag: str, last_modified: int) -> bool:
+        """Checks ``If-Range`` header.
+
+        Args:
+            request (django.http.HttpRequest): Request.
+            etag (str): Strong ETag of the file.
+            last_modified (int): Last modification timestamp of the file.
+
+        Returns:
+            bool: True if ``Range`` header must be applied, False if the whole file must be sent.
+        """
+        if_range: Union[str, None] = request.headers.get('If-Range')
+
+        if not if_range:
+            return True
+
+        if if_range.startswith(('"', 'W/')):
+            # Weak ETags must not be used with If-Range.
+            return if_range == etag
+
+        return parse_http_date_safe(if_range) == last_modified
+
+
+class LocalFileDownloadView(View):
+    """Serves the file from the local storage by the signed URL.
+
+    Signature is validated before any database query. The file itself is sent by the front server
+    depending on ``settings.BF_SENDFILE_BACKEND``: ``X-Accel-Redirect`` for nginx, ``X-Sendfile``
+    for Apache/uWSGI, otherwise the file is streamed by Django.
+    """
+    http_method_names = ['get', 'head']
+
+    def get(self, request, *args, **kwargs):
+        try:
+            disposition: ContentDisposition = ContentDisposition(request.GET['disposition'])
+            expires: int = int(request.GET['expires'])
+            signature: str = request.GET['signature']
+        except (KeyError, ValueError):
+            raise PermissionDenied()
+
+        try:
+            verify_url_signature(
+                File.get_local_download_signature_value(kwargs['url_path'], disposition),
+                expires,
+                signature,
+                File.LOCAL_DOWNLOAD_SIGNATURE_SALT
+            )
+        except (FatalSignatureError, SignatureExpiredError):
+            raise PermissionDenied()
+
+        try:
+            file = File.objects.get(url_path=kwargs['url_path'])
+        except File.DoesNotExist:
+            raise Http404()
+
+        sendfile_backend = settings.BF_SENDFILE_BACKEND
+
+        if sendfile_backend == SendfileBackend.NGINX.value:
+            response = HttpResponse()
+            response['X-Accel-Redirect'] = '%s%s' % (settings.BF_SENDFILE_URL, quote(file.file.name))
+        elif sendfile_backend in (SendfileBackend.XSENDFILE.value, SendfileBackend.UWSGI.value):
+            response = HttpResponse()
+            response['X-Sendfile'] = file.file.path
+        else:
+            try:
+                response = FileResponse(file.file.open('rb'))
+            except FileNotFoundError:
+                raise Http404()
+
+        set_file_content_headers(response, file.content_type, disposition, file.original_full_name)
+
+        return response
+
+
 class FileDeleteView(View):
     template_name = 'accounts/delete_confirmation.html'
 
@@ -1,22 +1,61 @@
 from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
 from rest_framework.authentication import BaseAuthentication
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
 
+from accounts.caches import UserCache
 from api.exceptions import AuthenticationFailedException
 from payments.core import stripe
 
 
+def construct_stripe_event(request) -> stripe.Event:
+    """Returns the PSP event of the webhook request with verified signature.
+
+    Verification is CPU only, so it's safe to call it in async views.
+
+    Raises:
+        api.exceptions.AuthenticationFailedException: If the signature is missing or not valid.
+    """
+    try:
+        signature = request.headers['Stripe-Signature']
+    except KeyError:
+        raise AuthenticationFailedException('SSO header is missing')
+    try:
+        event: stripe.Event = stripe.Webhook.construct_event(request.body, signature,
+                                                             settings.STRIPE_ENDPOINT_SECRET)
+    except ValueError as e:
+        raise AuthenticationFailedException()
+    except stripe.error.SignatureVerificationError:
+        raise AuthenticationFailedException()
+
+    return event
+
+
 class StripeAuthentication(BaseAuthentication):
     def authenticate(self, request):
+        return None, construct_stripe_event(request)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWT authentication resolving users from ``accounts.caches.UserCache``."""
+
+    def get_user(self, validated_token):
         try:
-            signature = request.headers['Stripe-Signature']
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
         except KeyError:
-            raise AuthenticationFailedException('SSO header is missing')
-        try:
-            event: stripe.Event = stripe.Webhook.construct_event(request.body, signature,
-                                                                 settings.STRIPE_ENDPOINT_SECRET)
-        except ValueError as e:
-            raise AuthenticationFailedException()
-        except stripe.error.SignatureVerificationError:
-            raise AuthenticationFailedException()
-
-        return None, event
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        user = UserCache(user_id).get_or_set(
+            lambda: get_user_model().objects.filter(**{api_settings.USER_ID_FIELD: user_id}).first()
+        )
+
+        if user is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+
+        if not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+        return user
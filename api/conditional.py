@@ -0,0 +1,70 @@
+"""Conditional requests of the API representations.
+
+ETags are derived from primary keys and versions of the rows, and the selected fields, so they are
+known right after the rows are read. ``If-None-Match`` is checked before anything is serialized,
+polling clients only pay for a narrow query when nothing has changed.
+"""
+from hashlib import sha256
+from typing import Iterable, Tuple
+
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+
+FIELDS_QUERY_PARAM: str = 'fields'
+
+
+def get_fields(request, allowed_fields: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Returns fields selected with ``?fields=a,b``, all allowed fields by default.
+
+    Raises:
+        rest_framework.exceptions.ValidationError: If some of the fields are not allowed.
+    """
+    value: str = request.query_params.get(FIELDS_QUERY_PARAM, '')
+
+    if not value:
+        return allowed_fields
+
+    fields: Tuple[str, ...] = tuple(dict.fromkeys(field.strip() for field in value.split(',') if field.strip()))
+    unknown: list = [field for field in fields if field not in allowed_fields]
+
+    if unknown or not fields:
+        raise ValidationError({FIELDS_QUERY_PARAM: 'Allowed fields: %s' % ', '.join(allowed_fields)})
+
+    return fields
+
+
+def make_etag(versions: Iterable[Tuple[int, int]], fields: Tuple[str, ...]) -> str:
+    """Returns strong ETag of the representation.
+
+    Args:
+        versions (Iterable[tuple]): Primary key and version of every represented row.
+        fields (tuple): Represented fields.
+
+    Returns:
+        str: Quoted ETag.
+    """
+    digest = sha256(','.join(fields).encode('utf-8'))
+
+    for pk, version in versions:
+        digest.update(b';%d:%d' % (pk, version))
+
+    return '"%s"' % digest.hexdigest()[:32]
+
+
+def is_not_modified(request, etag: str) -> bool:
+    if_none_match: str = request.headers.get('If-None-Match', '')
+
+    if not if_none_match:
+        return False
+
+    # Weak comparison as RFC 9110 requires for If-None-Match.
+    return if_none_match.strip() == '*' or etag in [
+        tag[2:] if tag.startswith('W/') else tag for tag in parse_etags(if_none_match)
+    ]
+
+
+def not_modified_response(etag: str) -> Response:
+    return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
@@ -0,0 +1,116 @@
+"""Keyset pagination for the streamed listings.
+
+``PageNumberPagination`` counts all rows and skips ``OFFSET`` rows on every page, so the deep pages
+get slower as the table grows. ``KeysetPagination`` continues from the last primary key of
+the previous page, every page is a single index range scan. Rows are read with ``.values()`` and
+written to the response while the query is iterated, so memory doesn't depend on the page size.
+"""
+import base64
+import binascii
+from typing import Iterable, List, Optional, Tuple
+
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import NotFound
+from rest_framework.utils.urls import replace_query_param
+
+from utils.json import dumps
+
+
+class KeysetPagination:
+    page_size: int = 1000
+    max_page_size: int = 10000
+    page_size_query_param: str = 'page_size'
+    cursor_query_param: str = 'cursor'
+    # Number of rows joined into one chunk of the streamed response.
+    chunk_size: int = 500
+    invalid_cursor_message: str = 'Invalid cursor'
+
+    def get_page_size(self, request) -> int:
+        try:
+            page_size: int = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+
+        if page_size <= 0:
+            return self.page_size
+
+        return min(page_size, self.max_page_size)
+
+    @staticmethod
+    def encode_cursor(pk: int) -> str:
+        return base64.urlsafe_b64encode(str(pk).encode('ascii')).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, request) -> Optional[int]:
+        """Returns the last primary key of the previous page.
+
+        Raises:
+            rest_framework.exceptions.NotFound: If cursor is not valid.
+        """
+        cursor: Optional[str] = request.query_params.get(self.cursor_query_param)
+
+        if cursor is None:
+            return None
+
+        try:
+            return int(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        except (binascii.Error, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self, request, pk: int) -> str:
+        return replace_query_param(request.build_absolute_uri(), self.cursor_query_param, self.encode_cursor(pk))
+
+    def get_streaming_response(self, request, queryset, fields: Tuple[str, ...]) -> StreamingHttpResponse:
+        """Returns the page as ``{"results": [...], "next": <URL or null>}``.
+
+        Args:
+            request (rest_framework.request.Request): Request.
+            queryset (django.db.models.QuerySet): Listed objects.
+            fields (tuple): Serialized fields, ``pk`` is always selected.
+
+        Returns:
+            django.http.StreamingHttpResponse: JSON response.
+        """
+        page_size: int = self.get_page_size(request)
+        after: Optional[int] = self.decode_cursor(request)
+
+        if after is not None:
+            queryset = queryset.filter(pk__gt=after)
+
+        rows: Iterable[dict] = queryset.order_by('pk').values('pk', *fields)[:page_size + 1].iterator(
+            chunk_size=self.chunk_size
+        )
+
+        return StreamingHttpResponse(
+            self.iter_page(request, rows, page_size, fields),
+            content_type='application/json'
+        )
+
+    def iter_page(self, request, rows: Iterable[dict], page_size: int, fields: Tuple[str, ...]) -> Iterable[bytes]:
+        chunk: List[bytes] = []
+        count: int = 0
+        last_pk: Optional[int] = None
+        next_link: Optional[str] = None
+
+        yield b'{"results":['
+
+        for row in rows:
+            if count == page_size:
+                next_link = self.get_next_link(request, last_pk)
+                break
+
+            chunk.append(dumps({field: row[field] for field in fields}))
+            count += 1
+            last_pk = row['pk']
+
+            if len(chunk) == self.chunk_size:
+                yield self.join_chunk(chunk, count == len(chunk))
+                chunk = []
+
+        if chunk:
+            yield self.join_chunk(chunk, count == len(chunk))
+
+        yield b'],"next":' + dumps(next_link) + b'}'
+
+    @staticmethod
+    def join_chunk(chunk: List[bytes], first: bool) -> bytes:
+        return (b'' if first else b',') + b','.join(chunk)
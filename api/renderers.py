@@ -0,0 +1,16 @@
+from rest_framework.renderers import BaseRenderer
+
+from utils.json import dumps
+
+
+class FastJSONRenderer(BaseRenderer):
+    """Compact JSON renderer encoding with orjson, a drop-in replacement of ``JSONRenderer``."""
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None) -> bytes:
+        if data is None:
+            return b''
+
+        return dumps(data)
@@ -13,7 +13,14 @@ class UserSerializer(serializers.ModelSerializer):
             'id', 'username', 'email',
             'first_name', 'last_name', 'is_active',
         ]
-        read_only_field = ['is_active']
+        read_only_fields = ['is_active']
+
+
+class SelfUserSerializer(UserSerializer):
+    """User changing own account, email is changed only with re-verification."""
+
+    class Meta(UserSerializer.Meta):
+        read_only_fields = ['username', 'email', 'is_active']
 
 
 class SignInSerializer(TokenObtainPairSerializer):
@@ -64,3 +71,23 @@ class SignUpSerializer(serializers.ModelSerializer):
             return User.objects.create_user(**validated_data)
         except IntegrityError:
             raise UserAlreadyExists()
+
+
+class FileUploadStartSerializer(serializers.Serializer):
+    filename = serializers.CharField(
+        max_length=256,
+        required=True
+    )
+    file_size = serializers.IntegerField(
+        min_value=0,
+        required=True
+    )
+    is_private = serializers.BooleanField(
+        required=True
+    )
+
+
+class FileUploadFinishSerializer(serializers.Serializer):
+    token = serializers.CharField(
+        required=True
+    )
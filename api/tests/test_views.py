@@ -1,7 +1,20 @@
 from http import HTTPStatus
+import json
+import tempfile
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
 
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
 from django.urls import reverse
-from django.test import TestCase
+from django.test import override_settings, TestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from accounts.dataclasses import SignedURLReturnObject
+from accounts.models import File, User
+from api.v1.views import FileAPIView, FilesView, FileUploadFinishView, FileUploadStartView, UsersView, UserView
+from utils.metrics import reset_latency_counters
 
 
 class HealthCase(TestCase):
@@ -14,3 +27,261 @@ class HealthCase(TestCase):
         self.assertEqual(response.status_code, HTTPStatus.OK)
 
         self.assertEqual(response.content, b'')
+
+
+class UsersViewCase(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.admin = User.objects.create_superuser('superuser', email='superuser@example.com', password='password')
+        for idx in range(5):
+            User.objects.create_user('user%d' % idx, email='user%d@example.com' % idx)
+
+    def get(self, user, **params):
+        request = self.factory.get('/api/v1/users/', params)
+        force_authenticate(request, user=user)
+        response = UsersView.as_view()(request)
+
+        if response.status_code != HTTPStatus.OK:
+            return response.status_code, None
+
+        return response.status_code, json.loads(b''.join(response.streaming_content))
+
+    def test_pages(self):
+        usernames = []
+        params = {'page_size': 4}
+
+        while True:
+            status_code, page = self.get(self.admin, **params)
+
+            self.assertEqual(status_code, HTTPStatus.OK)
+            usernames.extend(user['username'] for user in page['results'])
+
+            if page['next'] is None:
+                break
+
+            params['cursor'] = parse_qs(urlparse(page['next']).query)['cursor'][0]
+
+        self.assertEqual(usernames, list(User.objects.order_by('pk').values_list('username', flat=True)))
+        self.assertEqual(set(page['results'][0]), {'id', 'username', 'email', 'first_name', 'last_name', 'is_active'})
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.get(self.admin, cursor='!')[0], HTTPStatus.NOT_FOUND)
+
+    def test_not_superuser(self):
+        self.assertEqual(self.get(User.objects.get(username='user0'))[0], HTTPStatus.FORBIDDEN)
+
+
+class UserViewCase(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.user = User.objects.create_user('user', email='user@example.com')
+        self.other = User.objects.create_user('other', email='other@example.com')
+
+    def get(self, pk):
+        request = self.factory.get('/api/v1/users/%d/' % pk)
+        force_authenticate(request, user=self.user)
+
+        return UserView.as_view()(request, pk=pk)
+
+    def test_get(self):
+        response = self.get(self.user.pk)
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.data['username'], 'user')
+        self.assertEqual(self.get(self.other.pk).status_code, HTTPStatus.NOT_FOUND)
+
+    def patch(self, user, pk, data):
+        request = self.factory.patch('/api/v1/users/%d/' % pk, data, format='json')
+        force_authenticate(request, user=user)
+
+        return UserView.as_view()(request, pk=pk)
+
+    def test_patch_protected_fields(self):
+        User.objects.filter(pk=self.user.pk).update(is_active=True)
+        self.user.refresh_from_db()
+        response = self.patch(
+            self.user,
+            self.user.pk,
+            {'email': 'victim@example.com', 'is_active': False, 'username': 'admin2', 'first_name': 'Name'}
+        )
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+        user = User.objects.get(pk=self.user.pk)
+        self.assertEqual((user.email, user.username, user.is_active), ('user@example.com', 'user', True))
+        self.assertEqual(user.first_name, 'Name')
+
+    def test_superuser_patch(self):
+        admin = User.objects.create_superuser('superuser', email='superuser@example.com', password='password')
+        response = self.patch(admin, self.user.pk, {'email': 'new@example.com', 'is_active': True})
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+        user = User.objects.get(pk=self.user.pk)
+        self.assertEqual(user.email, 'new@example.com')
+        # ``is_active`` is set by the email verification only.
+        self.assertFalse(user.is_active)
+
+
+class FilesViewCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.factory = APIRequestFactory()
+        self.user = User.objects.create_user('uploader', email='uploader@example.com')
+        self.other = User.objects.create_user('other', email='other@example.com')
+        self.files = []
+        for idx in range(3):
+            file = File(file=ContentFile(b'content %d' % idx, name='file%d.txt' % idx), owner=self.user)
+            file.save()
+            self.files.append(file)
+        File(file=ContentFile(b'other', name='other.txt'), owner=self.other).save()
+
+    def request(self, view, method='get', user=None, headers=None, data=None, **kwargs):
+        request = getattr(self.factory, method)('/api/v1/files/', data, format='json', **(headers or {}))
+        force_authenticate(request, user=user or self.user)
+
+        return view.as_view()(request, **kwargs)
+
+    def test_list(self):
+        response = self.request(FilesView, data={'page_size': 2, 'fields': 'url_path,size'})
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(
+            response.data['results'],
+            [{'url_path': file.url_path, 'size': file.size} for file in self.files[:2]]
+        )
+        self.assertIsNotNone(response.data['next'])
+
+    def test_list_not_modified(self):
+        etag = self.request(FilesView)['ETag']
+
+        with self.assertNumQueries(1):
+            response = self.request(FilesView, headers={'HTTP_IF_NONE_MATCH': etag})
+
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+        self.files[0].save()
+
+        self.assertEqual(self.request(FilesView, headers={'HTTP_IF_NONE_MATCH': etag}).status_code, HTTPStatus.OK)
+
+    def test_get(self):
+        file = self.files[0]
+        response = self.request(FileAPIView, url_path=file.url_path)
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.data['original_full_name'], file.original_full_name)
+        self.assertEqual(response.data['version'], 1)
+
+        etag = response['ETag']
+        response = self.request(FileAPIView, headers={'HTTP_IF_NONE_MATCH': 'W/%s' % etag}, url_path=file.url_path)
+
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+        file.is_private = True
+        file.save()
+        response = self.request(FileAPIView, headers={'HTTP_IF_NONE_MATCH': etag}, url_path=file.url_path)
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.data['version'], 2)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_concurrent_saves(self):
+        first = File.objects.get(pk=self.files[0].pk)
+        second = File.objects.get(pk=self.files[0].pk)
+        first.save()
+        second.save()
+
+        self.assertEqual(first.version, 2)
+        self.assertEqual(second.version, 3)
+        self.assertEqual(self.request(FileAPIView, url_path=first.url_path).data['version'], 3)
+
+    def test_get_fields(self):
+        file = self.files[0]
+        response = self.request(FileAPIView, data={'fields': 'sha256'}, url_path=file.url_path)
+
+        self.assertEqual(response.data, {'sha256': file.sha256})
+        self.assertNotEqual(response['ETag'], self.request(FileAPIView, url_path=file.url_path)['ETag'])
+        self.assertEqual(
+            self.request(FileAPIView, data={'fields': 'owner'}, url_path=file.url_path).status_code,
+            HTTPStatus.BAD_REQUEST
+        )
+
+    def test_other_user_file(self):
+        file = self.files[0]
+
+        self.assertEqual(
+            self.request(FileAPIView, user=self.other, url_path=file.url_path).status_code,
+            HTTPStatus.NOT_FOUND
+        )
+        self.assertEqual(
+            self.request(FileAPIView, 'delete', user=self.other, url_path=file.url_path).status_code,
+            HTTPStatus.NOT_FOUND
+        )
+
+    def test_delete(self):
+        file = self.files[0]
+
+        self.assertEqual(self.request(FileAPIView, 'delete', url_path=file.url_path).status_code, HTTPStatus.NO_CONTENT)
+        self.assertFalse(File.objects.filter(pk=file.pk).exists())
+
+    @patch.object(
+        File,
+        'generate_post_upload_signed_url',
+        return_value=SignedURLReturnObject(url='https://example.com/', headers={}, method='POST', body={})
+    )
+    def test_upload(self, generate_post_upload_signed_url):
+        response = self.request(
+            FileUploadStartView,
+            'post',
+            data={'filename': 'upload.txt', 'file_size': 7, 'is_private': True}
+        )
+
+        self.assertEqual(response.status_code, HTTPStatus.CREATED)
+
+        token = response.data['token']
+        pending = File.objects.get(owner=self.user, size__isnull=True)
+        default_storage.save(pending.file.name, ContentFile(b'content'))
+
+        response = self.request(FileUploadFinishView, 'post', data={'token': token})
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.data['url_path'], pending.url_path)
+        self.assertEqual(response.data['size'], 7)
+        self.assertEqual(self.request(FileUploadFinishView, 'post', data={'token': token}).status_code,
+                         HTTPStatus.FORBIDDEN)
+
+
+class MetricsViewCase(TestCase):
+    def setUp(self):
+        reset_latency_counters()
+        self.addCleanup(reset_latency_counters)
+
+    @override_settings(METRICS_TOKEN=None)
+    def test_disabled(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, HTTPStatus.NOT_FOUND)
+
+    @override_settings(METRICS_TOKEN='metrics_token', METRICS_DIR=None)
+    def test_get(self):
+        self.assertEqual(self.client.get(reverse('health')).status_code, HTTPStatus.OK)
+        self.assertEqual(
+            self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer other').status_code,
+            HTTPStatus.UNAUTHORIZED
+        )
+        User.objects.count()
+
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer metrics_token')
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+
+        content = response.content.decode()
+        self.assertIn('bf_http_duration_seconds_count{name="health"} 1', content)
+        self.assertIn('bf_db_duration_seconds_count{name="default"}', content)
+        self.assertIn('bf_http_responses_4xx_total 1', content)
@@ -21,9 +21,10 @@ class StripeWebhookService:
         except Subscription.DoesNotExist:
             # It can be in case payment was declined or something similar.
             # For now, it's not important, subscription not created locally, because payment is no successful.
-            # I have no time to implement proper webhook handler.
+            # Stripe also sends the update before checkout.session.completed, the event is retried
+            # until the checkout creates the subscription. Subscription events have their own
+            # ordering key, so the retries don't hold the checkout.
             # TODO: https://github.com/koldakov/brosfiles/issues/4 task for webhook handler.
-            #  I would appreciate any help in this.
             raise FeatureNotReady()
 
         payment_instance.update_from_event(self.event)
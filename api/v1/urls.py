@@ -1,7 +1,18 @@
 from django.conf import settings
 from django.urls import path
 
-from api.v1.views import ObtainTokenView, UsersView, RefreshView, SignUpView, StripeWebhook
+from api.v1.views import (
+    FileAPIView,
+    FilesView,
+    FileUploadFinishView,
+    FileUploadStartView,
+    ObtainTokenView,
+    RefreshView,
+    SignUpView,
+    StripeWebhook,
+    UsersView,
+    UserView
+)
 
 urlpatterns = [
     path('webhooks/stripe/', StripeWebhook.as_view(), name='stripe_webhook'),
@@ -14,4 +25,9 @@ if settings.ENABLE_API:
         path('auth/sign-up/', SignUpView.as_view(), name='auth-sign-up'),
         path('auth/tokens/refresh/', RefreshView.as_view(), name='auth-tokens-refresh'),
         path('users/', UsersView.as_view(), name='users'),
+        path('users/<int:pk>/', UserView.as_view(), name='user'),
+        path('files/', FilesView.as_view(), name='files'),
+        path('files/uploads/', FileUploadStartView.as_view(), name='file-upload-start'),
+        path('files/uploads/finish/', FileUploadFinishView.as_view(), name='file-upload-finish'),
+        path('files/<str:url_path>/', FileAPIView.as_view(), name='file'),
     ]
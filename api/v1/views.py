@@ -1,30 +1,55 @@
+from datetime import datetime
+
 from django.conf import settings
+from django.http import HttpResponse
 from django.utils.decorators import method_decorator
+from django.views import View
 from django.views.decorators.csrf import csrf_exempt
 from rest_framework import status
+from rest_framework.exceptions import NotFound, PermissionDenied
 from rest_framework.generics import GenericAPIView, RetrieveUpdateAPIView
-from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.exceptions import TokenError, InvalidToken
 from rest_framework_simplejwt.views import TokenRefreshView
 
-from accounts.models import User
-from api.authentications import StripeAuthentication
-from api.serializers import SignInSerializer, SignUpSerializer, UserSerializer
-from api.v1.services import StripeWebhookService
+from accounts.exceptions import NotAllowed
+from accounts.models import File, User
+from accounts.services import finish_upload, start_upload
+from api.authentications import construct_stripe_event
+from api.conditional import get_fields, is_not_modified, make_etag, not_modified_response
+from api.exceptions import AuthenticationFailedException
+from api.pagination import KeysetPagination
+from api.serializers import (
+    FileUploadFinishSerializer,
+    FileUploadStartSerializer,
+    SelfUserSerializer,
+    SignInSerializer,
+    SignUpSerializer,
+    UserSerializer
+)
+from payments.models import WebhookEvent
+from utils.json import FastJsonResponse
 
 
 @method_decorator(csrf_exempt, name='dispatch')
-class StripeWebhook(APIView):
-    authentication_classes = (StripeAuthentication,)
+class StripeWebhook(View):
+    """Stores verified events in the inbox, they are processed by ``process_webhook_events`` command.
 
-    def post(self, request, *args, **kwargs):
-        service = StripeWebhookService(request.auth)
-        service.process_post_request()
+    Async view, under ASGI the receiver doesn't hold a worker while the event is inserted.
+    """
+    http_method_names = ['post']
+
+    async def post(self, request, *args, **kwargs):
+        try:
+            event = construct_stripe_event(request)
+        except AuthenticationFailedException as exc:
+            return FastJsonResponse({'message': exc.detail, 'time': datetime.now()}, status=exc.status_code)
 
-        return Response(status=status.HTTP_200_OK)
+        await WebhookEvent.areceive(event)
+
+        return HttpResponse(status=status.HTTP_200_OK)
 
 
 class SignUpView(GenericAPIView):
@@ -68,23 +93,161 @@ class RefreshView(TokenRefreshView):
         return Response(serializer.validated_data, status=status.HTTP_200_OK)
 
 
-class LargeResultsSetPagination(PageNumberPagination):
-    page_size = 1000
-    page_size_query_param = 'page_size'
-    max_page_size = 10000
+class UsersView(APIView):
+    """Streams users page by page with keyset pagination, available for superusers only."""
+    permission_classes = (IsAuthenticated,)
+    pagination_class = KeysetPagination
+
+    def get(self, request, *args, **kwargs):
+        if not request.user.is_superuser:
+            raise PermissionDenied()
+
+        return self.pagination_class().get_streaming_response(
+            request,
+            User.objects.all(),
+            tuple(UserSerializer.Meta.fields)
+        )
 
 
-class UsersView(RetrieveUpdateAPIView):
+class UserView(RetrieveUpdateAPIView):
     serializer_class = UserSerializer
     permission_classes = (IsAuthenticated,)
-    pagination_class = LargeResultsSetPagination
+
+    def get_serializer_class(self):
+        if self.request.user.is_superuser:
+            return UserSerializer
+
+        return SelfUserSerializer
 
     def get_queryset(self):
         if self.request.user.is_superuser:
             return User.objects.all()
 
-    def get_object(self):
-        lookup_field_value = self.kwargs[self.lookup_field]
-        obj = User.objects.get(lookup_field_value)
-        self.check_object_permissions(self.request, obj)
-        return obj
+        return User.objects.filter(pk=self.request.user.pk)
+
+
+FILE_FIELDS: tuple = (
+    'url_path',
+    'original_full_name',
+    'content_type',
+    'size',
+    'sha256',
+    'is_private',
+    'date_uploaded',
+    'version',
+)
+
+
+def get_user_files(user):
+    """Returns uploaded files of the user, pending uploads don't have size yet."""
+    return File.objects.filter(owner=user).exclude(size__isnull=True)
+
+
+class FilesView(APIView):
+    """Lists files of the user page by page with keyset pagination.
+
+    Rows are read with ``.values()``, the ``ETag`` of the page is calculated from the row versions and
+    ``If-None-Match`` is answered with 304 before the page is serialized.
+    """
+    permission_classes = (IsAuthenticated,)
+    pagination_class = KeysetPagination
+
+    def get(self, request, *args, **kwargs):
+        paginator = self.pagination_class()
+        fields: tuple = get_fields(request, FILE_FIELDS)
+        page_size: int = paginator.get_page_size(request)
+        after = paginator.decode_cursor(request)
+        queryset = get_user_files(request.user)
+
+        if after is not None:
+            queryset = queryset.filter(pk__gt=after)
+
+        rows: list = list(queryset.order_by('pk').values('pk', 'version', *fields)[:page_size + 1])
+        etag: str = make_etag(((row['pk'], row['version']) for row in rows), fields)
+
+        if is_not_modified(request, etag):
+            return not_modified_response(etag)
+
+        next_link = None
+
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            next_link = paginator.get_next_link(request, rows[-1]['pk'])
+
+        return Response(
+            {
+                'results': [{field: row[field] for field in fields} for row in rows],
+                'next': next_link,
+            },
+            headers={'ETag': etag}
+        )
+
+
+class FileAPIView(APIView):
+    """Retrieves and deletes file of the user.
+
+    Retrieval is a single ``.values()`` query, unchanged files are answered with 304.
+    """
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request, *args, **kwargs):
+        fields: tuple = get_fields(request, FILE_FIELDS)
+        row = get_user_files(request.user).filter(url_path=kwargs['url_path']).values(
+            'pk', 'version', *fields
+        ).first()
+
+        if row is None:
+            raise NotFound()
+
+        etag: str = make_etag([(row['pk'], row['version'])], fields)
+
+        if is_not_modified(request, etag):
+            return not_modified_response(etag)
+
+        return Response({field: row[field] for field in fields}, headers={'ETag': etag})
+
+    def delete(self, request, *args, **kwargs):
+        try:
+            file: File = get_user_files(request.user).get(url_path=kwargs['url_path'])
+        except File.DoesNotExist:
+            raise NotFound()
+
+        file.delete()
+
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class FileUploadStartView(GenericAPIView):
+    """Starts signed URL upload, the file is uploaded directly to the storage with the returned request."""
+    serializer_class = FileUploadStartSerializer
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            upload: dict = start_upload(user=request.user, **serializer.validated_data)
+        except NotAllowed:
+            raise PermissionDenied()
+
+        return Response(upload, status=status.HTTP_201_CREATED)
+
+
+class FileUploadFinishView(GenericAPIView):
+    serializer_class = FileUploadFinishSerializer
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            file: File = finish_upload(serializer.validated_data['token'])
+        except NotAllowed:
+            raise PermissionDenied()
+
+        return Response(
+            {field: getattr(file, field) for field in FILE_FIELDS},
+            headers={'ETag': make_etag([(file.pk, file.version)], FILE_FIELDS)}
+        )
@@ -1,9 +1,33 @@
 from http import HTTPStatus
 
-from django.http import HttpResponse
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
 from django.views import View
 
+from utils.prometheus import collect, CONTENT_TYPE, render
+
 
 class Health(View):
-    def get(self, request, *args, **kwargs):
+    async def get(self, request, *args, **kwargs):
         return HttpResponse(status=HTTPStatus.OK)
+
+
+class Metrics(View):
+    """Request, database, storage and upload metrics of all workers in Prometheus text format.
+
+    Requires ``Authorization: Bearer <BF_METRICS_TOKEN>`` header, the endpoint doesn't exist
+    if the token is not set.
+    """
+    http_method_names = ['get']
+
+    def get(self, request, *args, **kwargs):
+        if not settings.METRICS_TOKEN:
+            raise Http404()
+
+        scheme, _separator, token = request.headers.get('Authorization', '').partition(' ')
+
+        if scheme.lower() != 'bearer' or not constant_time_compare(token.strip(), settings.METRICS_TOKEN):
+            return HttpResponse(status=HTTPStatus.UNAUTHORIZED, headers={'WWW-Authenticate': 'Bearer'})
+
+        return HttpResponse(render(collect(settings.METRICS_DIR)), content_type=CONTENT_TYPE)
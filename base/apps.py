@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class BaseConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'base'
+
+    def ready(self):
+        from base import checks, signals  # noqa: F401
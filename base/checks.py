@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.core.cache import caches, DEFAULT_CACHE_ALIAS
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, register, Tags
+
+
+# Cached state which is changed by one process and must be visible to the other web and worker processes.
+SHARED_CACHE_USERS = (
+    'users resolved by the session and JWT authentication',
+    'catalogue invalidated by sync_catalogue_events',
+    'entitlements evicted by process_webhook_events and sweep_subscriptions',
+    'consumed upload tokens',
+)
+
+
+def is_cache_shared(alias: str = DEFAULT_CACHE_ALIAS) -> bool:
+    """Returns True if the cache is shared between the processes."""
+    return not isinstance(caches[alias], (DummyCache, LocMemCache))
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """Fails ``check --deploy`` if the default cache is local to the process.
+
+    Invalidations made by one uWSGI worker or by the worker commands never reach the other processes
+    otherwise, so they keep serving the stale entries until the entries expire.
+    """
+    if settings.DEBUG or is_cache_shared():
+        return []
+
+    return [
+        Error(
+            'Default cache backend is local to the process.',
+            hint='Set BF_CACHE_URL to a shared cache, e.g. redis://127.0.0.1:6379/1, so the processes see '
+                 'the changes of %s.' % ', '.join(SHARED_CACHE_USERS),
+            id='base.E001',
+        )
+    ]
@@ -29,3 +29,12 @@ class DataClassBase:
 
     def __post_init__(self):
         self._validate()
+
+
+@dataclass
+class UploadToken(DataClassBase):
+    """Decoded upload token."""
+    upload_id: int
+    owner_id: int
+    expires: int
+    key_id: int
@@ -4,3 +4,7 @@ class FatalSignatureError(Exception):
 
 class SignatureExpiredError(Exception):
     pass
+
+
+class SignatureConsumedError(Exception):
+    pass
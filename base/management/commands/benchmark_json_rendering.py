@@ -0,0 +1,58 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from django.utils.text import compress_string
+from rest_framework.renderers import JSONRenderer
+
+from api.renderers import FastJSONRenderer
+
+
+class Command(BaseCommand):
+    help = 'Compares DRF JSONRenderer with orjson based FastJSONRenderer on a files listing page.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help='Rows per page.')
+        parser.add_argument('--repeat', type=int, default=20, help='Number of renders.')
+
+    def handle(self, *args, **options):
+        now: datetime.datetime = timezone.now()
+        page: dict = {
+            'results': [
+                {
+                    'url_path': 'a1b2c3d4e5%06d' % idx,
+                    'original_full_name': 'document %d.pdf' % idx,
+                    'content_type': 'application/pdf',
+                    'size': idx * 1024,
+                    'sha256': '%064x' % idx,
+                    'is_private': idx % 2 == 0,
+                    'date_uploaded': now - datetime.timedelta(seconds=idx),
+                    'version': 1,
+                }
+                for idx in range(options['rows'])
+            ],
+            'next': None,
+        }
+
+        stdlib_time: float = self.measure(JSONRenderer(), page, options['repeat'])
+        fast_time: float = self.measure(FastJSONRenderer(), page, options['repeat'])
+        content: bytes = FastJSONRenderer().render(page)
+
+        self.stdout.write(
+            'json: JSONRenderer %.1f ms, FastJSONRenderer %.1f ms, %.1fx faster' % (
+                stdlib_time * 1000,
+                fast_time * 1000,
+                stdlib_time / fast_time,
+            )
+        )
+        self.stdout.write('gzip: %d bytes, %d bytes compressed' % (len(content), len(compress_string(content))))
+
+    @staticmethod
+    def measure(renderer, data: dict, repeat: int) -> float:
+        started_at: float = time.perf_counter()
+
+        for _idx in range(repeat):
+            renderer.render(data)
+
+        return (time.perf_counter() - started_at) / repeat
@@ -0,0 +1,56 @@
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from base.utils import decode_jwt_signature, decode_upload_token, generate_jwt_signature, generate_upload_token
+
+
+class Command(BaseCommand):
+    help = 'Compares JWT upload signatures with compact upload tokens.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--number', type=int, default=20000, help='Number of signed and verified tokens.')
+
+    def handle(self, *args, **options):
+        number: int = options['number']
+        upload_id: int = 123456789
+        owner_id: int = 12345
+        # Payload the upload start used to sign: POST fields, request key, upload hash and file name.
+        payload: dict = {
+            'csrfmiddlewaretoken': 'Hv9QLt2EjWJ3cHxkVz1m2dYdGbqL7pTnJ4rS8uVwXyZaBcDeFgHiJkLmNoPqRsTu',
+            'filename': 'holiday photos 2023.zip',
+            'file_size': '734003200',
+            'is_private': 'true',
+            'request_key': 'e1f2a3b4c5d6e7f8a9b0c1d2e3f4a5b6',
+            'upload_hash': '0123456789abcdef0123456789abcdef',
+        }
+        jwt_token: str = generate_jwt_signature(payload)
+        upload_token: str = generate_upload_token(upload_id, owner_id=owner_id)
+
+        cases = (
+            (
+                'sign',
+                lambda: generate_jwt_signature(payload),
+                lambda: generate_upload_token(upload_id, owner_id=owner_id),
+            ),
+            (
+                'verify',
+                lambda: decode_jwt_signature(jwt_token),
+                lambda: decode_upload_token(upload_token),
+            ),
+        )
+
+        for name, jwt_case, token_case in cases:
+            jwt_time: float = timeit.timeit(jwt_case, number=number)
+            token_time: float = timeit.timeit(token_case, number=number)
+
+            self.stdout.write(
+                '%s: JWT %.1f us, upload token %.1f us, %.1fx faster' % (
+                    name,
+                    jwt_time / number * 10 ** 6,
+                    token_time / number * 10 ** 6,
+                    jwt_time / token_time,
+                )
+            )
+
+        self.stdout.write('size: JWT %d bytes, upload token %d bytes' % (len(jwt_token), len(upload_token)))
@@ -0,0 +1,89 @@
+import json
+import time
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from accounts.models import User
+from api.pagination import KeysetPagination
+from api.serializers import UserSerializer
+
+
+class Command(BaseCommand):
+    help = 'Compares page number pagination with ModelSerializer and streamed keyset pagination of users.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50000, help='Number of temporary users.')
+        parser.add_argument('--page-size', type=int, default=10000, help='Users per page.')
+
+    def handle(self, *args, **options):
+        users_count: int = options['users']
+        page_size: int = options['page_size']
+
+        with transaction.atomic():
+            User.objects.bulk_create(
+                [
+                    User(username='benchmark%d' % idx, email='benchmark%d@example.com' % idx)
+                    for idx in range(users_count)
+                ],
+                batch_size=1000
+            )
+            total: int = User.objects.count()
+
+            page_number_time: float = self.measure(lambda: self.read_page_number(page_size))
+            keyset_time: float = self.measure(lambda: self.read_keyset(page_size))
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(
+            'users: page number %.0f rows/s, keyset %.0f rows/s, %.1fx faster' % (
+                total / page_number_time,
+                total / keyset_time,
+                page_number_time / keyset_time,
+            )
+        )
+
+    @staticmethod
+    def measure(case) -> float:
+        started_at: float = time.perf_counter()
+        case()
+
+        return time.perf_counter() - started_at
+
+    @staticmethod
+    def read_page_number(page_size: int) -> None:
+        """Reads users the way ``PageNumberPagination`` with ``UserSerializer`` does."""
+        count: int = User.objects.count()
+
+        for offset in range(0, count, page_size):
+            page = list(User.objects.order_by('pk')[offset:offset + page_size])
+            JSONRenderer().render({'count': count, 'results': UserSerializer(page, many=True).data})
+
+    @staticmethod
+    def read_keyset(page_size: int) -> None:
+        factory = APIRequestFactory()
+        host: str = next((host.lstrip('.') for host in settings.ALLOWED_HOSTS if host != '*'), 'localhost')
+        pagination = KeysetPagination()
+        pagination.max_page_size = max(pagination.max_page_size, page_size)
+        cursor: Optional[str] = None
+
+        while True:
+            params: dict = {'page_size': page_size}
+
+            if cursor is not None:
+                params['cursor'] = cursor
+
+            request = Request(factory.get('/api/v1/users/', params, HTTP_HOST=host))
+            response = pagination.get_streaming_response(request, User.objects.all(), tuple(UserSerializer.Meta.fields))
+            next_link: Optional[str] = json.loads(b''.join(response.streaming_content))['next']
+
+            if next_link is None:
+                return
+
+            cursor = parse_qs(urlparse(next_link).query)['cursor'][0]
@@ -0,0 +1,62 @@
+import json
+import subprocess
+import sys
+from typing import List, Tuple
+
+from django.core.management.base import BaseCommand
+
+from utils.preload import parse_import_times
+
+
+PROFILED_CODE: str = (
+    'import json, django; django.setup(); '
+    'from utils.preload import preload_app; '
+    'print(json.dumps(preload_app(freeze_heap=False)))'
+)
+
+
+class Command(BaseCommand):
+    help = 'Reports import time of the modules and duration of the warm-up steps of a new worker.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=30, help='Number of the slowest modules.')
+        parser.add_argument(
+            '--sort',
+            choices=('self', 'cumulative'),
+            default='cumulative',
+            help='Sort modules by own import time or including nested imports.'
+        )
+        parser.add_argument('--top-level', action='store_true', help='Report top level imports only.')
+
+    def handle(self, *args, **options):
+        # New interpreter, modules of this process are already imported.
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', PROFILED_CODE],
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+
+        if result.returncode != 0:
+            self.stderr.write(result.stderr)
+            sys.exit(result.returncode)
+
+        import_times: List[Tuple[str, int, int, int]] = parse_import_times(result.stderr)
+
+        if options['top_level']:
+            import_times = [import_time for import_time in import_times if import_time[1] == 0]
+
+        sort_index: int = 2 if options['sort'] == 'self' else 3
+        total: int = sum(import_time[2] for import_time in import_times)
+
+        self.stdout.write('%-60s %12s %12s' % ('Module', 'Self, ms', 'Cumul., ms'))
+
+        for module, _level, self_time, cumulative_time in sorted(
+            import_times, key=lambda import_time: import_time[sort_index], reverse=True
+        )[:options['limit']]:
+            self.stdout.write('%-60s %12.1f %12.1f' % (module, self_time / 1000, cumulative_time / 1000))
+
+        self.stdout.write('Imported modules: %d, total import time: %.1f ms' % (len(import_times), total / 1000))
+
+        for step, duration in json.loads(result.stdout.strip().splitlines()[-1]).items():
+            self.stdout.write('Warm-up %s: %.1f ms' % (step, duration * 1000))
@@ -0,0 +1,195 @@
+"""Response compression and request metrics.
+
+``CompressionMiddleware`` compresses HTML, JSON and other text responses with brotli when the client
+accepts it and the ``brotli`` package is installed, with gzip otherwise. Short responses are sent as is,
+compressing them costs more than it saves. File downloads are never compressed: they are binary,
+already streamed in chunks and support ranges, which must address the original bytes.
+
+``MetricsMiddleware`` collects latency of the requests with ``utils.metrics``.
+"""
+import time
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+from django.http import FileResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_sequence, compress_string
+
+from utils.metrics import increment, observe_latency
+from utils.prometheus import start_snapshot_writer
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+COMPRESSIBLE_CONTENT_TYPES = (
+    'application/javascript',
+    'application/json',
+    'application/xml',
+    'image/svg+xml',
+)
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """Returns quality values of the codings from ``Accept-Encoding`` header.
+
+    Args:
+        header (str): Header value, e.g. ``gzip, br;q=0.9, *;q=0``.
+
+    Returns:
+        dict: Lowercase codings and their quality values.
+    """
+    codings: Dict[str, float] = {}
+
+    for item in header.split(','):
+        coding, _sep, params = item.partition(';')
+        coding = coding.strip().lower()
+
+        if not coding:
+            continue
+
+        quality: float = 1.0
+        params = params.strip()
+
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+
+        codings[coding] = quality
+
+    return codings
+
+
+def is_compressible(content_type: str) -> bool:
+    media_type: str = content_type.split(';', 1)[0].strip().lower()
+
+    return media_type.startswith('text/') or media_type in COMPRESSIBLE_CONTENT_TYPES
+
+
+def compress_brotli_sequence(sequence: Iterable[bytes], quality: int) -> Iterable[bytes]:
+    compressor = brotli.Compressor(quality=quality)
+
+    for item in sequence:
+        # Flush every chunk, so streamed pages reach the client as they are produced.
+        data: bytes = compressor.process(item) + compressor.flush()
+
+        if data:
+            yield data
+
+    yield compressor.finish()
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Compresses text responses larger than ``settings.COMPRESSION_MIN_SIZE`` bytes.
+
+    Strong ETags are made weak, as ``GZipMiddleware`` does, the compressed representation differs
+    from the original bytes, but conditional requests still match.
+    """
+    brotli_quality: int = 5
+
+    def process_response(self, request, response):
+        if not self.should_compress(response):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        coding: Optional[str] = self.get_coding(request.headers.get('Accept-Encoding', ''))
+
+        if coding is None:
+            return response
+
+        if response.streaming:
+            if coding == 'br':
+                response.streaming_content = compress_brotli_sequence(response.streaming_content, self.brotli_quality)
+            else:
+                response.streaming_content = compress_sequence(response.streaming_content)
+
+            del response.headers['Content-Length']
+        else:
+            if coding == 'br':
+                compressed_content: bytes = brotli.compress(response.content, quality=self.brotli_quality)
+            else:
+                compressed_content: bytes = compress_string(response.content)
+
+            if len(compressed_content) >= len(response.content):
+                return response
+
+            response.content = compressed_content
+            response.headers['Content-Length'] = str(len(compressed_content))
+
+        etag: Optional[str] = response.get('ETag')
+
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+
+        response.headers['Content-Encoding'] = coding
+
+        return response
+
+    @staticmethod
+    def should_compress(response) -> bool:
+        if isinstance(response, FileResponse) or response.has_header('Content-Encoding'):
+            return False
+
+        # Ranges address bytes of the original content.
+        if response.has_header('Accept-Ranges') or response.has_header('Content-Range'):
+            return False
+
+        if 'no-transform' in response.get('Cache-Control', ''):
+            return False
+
+        if not is_compressible(response.get('Content-Type', '')):
+            return False
+
+        return response.streaming or len(response.content) >= settings.COMPRESSION_MIN_SIZE
+
+    @staticmethod
+    def get_coding(accept_encoding: str) -> Optional[str]:
+        """Returns the preferred supported coding, brotli wins over gzip with the same quality."""
+        codings: Dict[str, float] = parse_accept_encoding(accept_encoding)
+        default_quality: float = codings.get('*', 0.0)
+        supported = ('br', 'gzip') if brotli is not None else ('gzip',)
+        coding: Optional[str] = None
+        best_quality: float = 0.0
+
+        for candidate in supported:
+            quality: float = codings.get(candidate, default_quality)
+
+            if quality > best_quality:
+                coding, best_quality = candidate, quality
+
+        return coding
+
+
+class MetricsMiddleware(MiddlewareMixin):
+    """Collects latency of the requests as ``http.<URL name>`` and responses as ``http.responses.<class>``.
+
+    Requests of not resolved URLs are collected as ``http.unresolved``, so scanners don't create
+    new series. Latency of streaming responses is the time to the response headers.
+    """
+    STARTED_AT_ATTRIBUTE: str = '_metrics_started_at'
+
+    def process_request(self, request):
+        setattr(request, self.STARTED_AT_ATTRIBUTE, time.perf_counter())
+
+        if settings.METRICS_DIR:
+            start_snapshot_writer(settings.METRICS_DIR, settings.METRICS_WRITE_INTERVAL)
+
+    def process_response(self, request, response):
+        started_at: Optional[float] = getattr(request, self.STARTED_AT_ATTRIBUTE, None)
+
+        if started_at is None:
+            return response
+
+        resolver_match = getattr(request, 'resolver_match', None)
+        url_name: str = resolver_match.view_name if resolver_match is not None else 'unresolved'
+
+        observe_latency('http.' + url_name, time.perf_counter() - started_at)
+        increment('http.responses.%dxx' % (response.status_code // 100))
+
+        return response
@@ -0,0 +1,14 @@
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from utils.metrics import observe_query
+
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    """Collects latency of the queries of the connection with ``utils.metrics``.
+
+    Signal is sent on every reconnection of the same connection object, wrapper is added once.
+    """
+    if observe_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(observe_query)
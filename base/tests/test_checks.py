@@ -0,0 +1,26 @@
+from django.test import override_settings, SimpleTestCase
+
+from base.checks import check_shared_cache
+
+
+LOCAL_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+SHARED_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'cache'}}
+
+
+class SharedCacheCheckCase(SimpleTestCase):
+    @override_settings(DEBUG=False, CACHES=LOCAL_CACHES)
+    def test_local_cache(self):
+        errors = check_shared_cache(None)
+
+        self.assertEqual([error.id for error in errors], ['base.E001'])
+        self.assertIn('catalogue', errors[0].hint)
+        self.assertIn('entitlements', errors[0].hint)
+        self.assertIn('upload tokens', errors[0].hint)
+
+    @override_settings(DEBUG=True, CACHES=LOCAL_CACHES)
+    def test_debug(self):
+        self.assertEqual(check_shared_cache(None), [])
+
+    @override_settings(DEBUG=False, CACHES=SHARED_CACHES)
+    def test_shared_cache(self):
+        self.assertEqual(check_shared_cache(None), [])
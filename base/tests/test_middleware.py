@@ -0,0 +1,63 @@
+import gzip
+from unittest import skipIf
+
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.test import override_settings, RequestFactory, SimpleTestCase
+
+from base.middleware import brotli, CompressionMiddleware, parse_accept_encoding
+
+
+@override_settings(COMPRESSION_MIN_SIZE=100)
+class CompressionMiddlewareCase(SimpleTestCase):
+    CONTENT = b'{"results":[%s]}' % b','.join(b'{"id":%d}' % idx for idx in range(100))
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def process(self, response, accept_encoding='gzip'):
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING=accept_encoding)
+
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_gzip(self):
+        response = HttpResponse(self.CONTENT, content_type='application/json')
+        response['ETag'] = '"etag"'
+        response = self.process(response, 'gzip, br;q=0')
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), self.CONTENT)
+        self.assertEqual(response['Content-Length'], str(len(response.content)))
+        self.assertEqual(response['ETag'], 'W/"etag"')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+
+    def test_streaming(self):
+        response = self.process(StreamingHttpResponse(iter([self.CONTENT[:10], self.CONTENT[10:]]),
+                                                      content_type='application/json'))
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), self.CONTENT)
+
+    @skipIf(brotli is None, 'brotli is not installed')
+    def test_brotli(self):
+        response = self.process(HttpResponse(self.CONTENT, content_type='text/html'), 'gzip, br')
+
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), self.CONTENT)
+
+    def test_not_compressed(self):
+        cases = (
+            (HttpResponse(self.CONTENT[:50], content_type='application/json'), 'gzip'),
+            (HttpResponse(self.CONTENT, content_type='application/octet-stream'), 'gzip'),
+            (HttpResponse(self.CONTENT, content_type='application/json'), 'gzip;q=0, identity'),
+            (FileResponse(iter([self.CONTENT]), content_type='text/plain'), 'gzip'),
+        )
+
+        for response, accept_encoding in cases:
+            with self.subTest(content_type=response['Content-Type'], accept_encoding=accept_encoding):
+                self.assertFalse(self.process(response, accept_encoding).has_header('Content-Encoding'))
+
+    def test_parse_accept_encoding(self):
+        self.assertEqual(
+            parse_accept_encoding('gzip, BR;q=0.5, *;q=0, deflate;q=x'),
+            {'gzip': 1.0, 'br': 0.5, '*': 0.0, 'deflate': 0.0}
+        )
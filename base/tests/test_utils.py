@@ -1,12 +1,14 @@
 import os
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 
 from django.db.backends.postgresql.schema import DatabaseSchemaEditor
 from django.db.migrations.state import StateApps
-from django.test import TransactionTestCase
+from django.core.cache import cache
+from django.test import override_settings, SimpleTestCase, TransactionTestCase
 
 from accounts.models import User
-from base.utils import create_superuser
+from base.exceptions import FatalSignatureError, SignatureConsumedError, SignatureExpiredError
+from base.utils import create_superuser, decode_upload_token, generate_upload_token
 
 
 class BaseUtilsCase(TransactionTestCase):
@@ -40,3 +42,55 @@ class BaseUtilsCase(TransactionTestCase):
         user, created = create_superuser(self.apps, self.schema_editor)
 
         self.assertFalse(created, 'User created, but should be already exist')
+
+
+@override_settings(BF_UPLOAD_TOKEN_KEYS={'1': 'first-key', '2': 'second-key'}, BF_UPLOAD_TOKEN_KEY_ID=1)
+class UploadTokenCase(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_decode(self):
+        token = generate_upload_token(2 ** 40, owner_id=7)
+        upload_token = decode_upload_token(token)
+
+        self.assertEqual(len(token), 50)
+        self.assertEqual(upload_token.upload_id, 2 ** 40)
+        self.assertEqual(upload_token.owner_id, 7)
+        self.assertEqual(upload_token.key_id, 1)
+        self.assertEqual(decode_upload_token(generate_upload_token(1)).owner_id, 0)
+
+    def test_invalid(self):
+        token = generate_upload_token(1, owner_id=7)
+        tampered = generate_upload_token(2, owner_id=7)[:28] + token[28:]
+
+        for invalid_token in (tampered, token[:-2], 'not a token', ''):
+            with self.subTest(token=invalid_token), self.assertRaises(FatalSignatureError):
+                decode_upload_token(invalid_token)
+
+    def test_expired(self):
+        token = generate_upload_token(1, expiration_time=60)
+
+        with patch('base.utils.datetime') as datetime_mock:
+            datetime_mock.datetime.now.return_value.timestamp.return_value = 2 ** 32
+
+            with self.assertRaises(SignatureExpiredError):
+                decode_upload_token(token)
+
+    def test_consume(self):
+        token = generate_upload_token(1)
+
+        decode_upload_token(token, consume=True)
+        decode_upload_token(token)
+
+        with self.assertRaises(SignatureConsumedError):
+            decode_upload_token(token, consume=True)
+
+    def test_key_rotation(self):
+        token = generate_upload_token(1)
+
+        with override_settings(BF_UPLOAD_TOKEN_KEY_ID=2):
+            self.assertEqual(decode_upload_token(generate_upload_token(1)).key_id, 2)
+            self.assertEqual(decode_upload_token(token).key_id, 1)
+
+        with override_settings(BF_UPLOAD_TOKEN_KEYS={'2': 'second-key'}), self.assertRaises(FatalSignatureError):
+            decode_upload_token(token)
@@ -1,17 +1,34 @@
+import base64
+import binascii
 import datetime
+from functools import lru_cache
+import hashlib
+import hmac
+import struct
 from typing import Optional, Tuple
 
+from asgiref.sync import sync_to_async
 from django.conf import settings
+from django.core.cache import cache
 from django.db import IntegrityError, transaction
 from django.db.backends.postgresql.schema import DatabaseSchemaEditor
 from django.db.migrations.state import StateApps
+from django.utils.crypto import constant_time_compare, salted_hmac
 import jwt
 
 from accounts.models import User
-from base.exceptions import FatalSignatureError, SignatureExpiredError
+from base.dataclasses import UploadToken
+from base.exceptions import FatalSignatureError, SignatureConsumedError, SignatureExpiredError
 
 
 DEFAULT_JWT_EXPIRATION_TIME: int = 60 * 60
+DEFAULT_UPLOAD_TOKEN_EXPIRATION_TIME: int = 60 * 60
+# Key id, upload id, owner id and expiration timestamp.
+UPLOAD_TOKEN_STRUCT = struct.Struct('>BQQI')
+UPLOAD_TOKEN_MAC_SIZE: int = 16
+UPLOAD_TOKEN_SIZE: int = UPLOAD_TOKEN_STRUCT.size + UPLOAD_TOKEN_MAC_SIZE
+UPLOAD_TOKEN_SALT: bytes = b'base.utils.upload_token'
+CONSUMED_UPLOAD_TOKEN_KEY: str = 'consumed_upload_tokens:%s'
 
 
 def create_superuser(apps: StateApps, schema_editor: DatabaseSchemaEditor) -> Tuple[User, bool]:
@@ -79,3 +96,167 @@ def decode_jwt_signature(token, algorithms=None):
         raise FatalSignatureError()
     except jwt.exceptions.ExpiredSignatureError:
         raise SignatureExpiredError()
+
+
+def generate_url_signature(value: str, expires: int, salt: str) -> str:
+    """Generates HMAC signature of the URL.
+
+    Unlike JWT, signature is short and can be validated without decoding,
+    so it's suitable for the URLs which are validated on every request.
+
+    Args:
+        value (str): Value to be signed, for example URL path.
+        expires (int): Expiration timestamp.
+        salt (str): Salt, different URLs must use different salts.
+
+    Returns:
+        str: Signature.
+    """
+    return salted_hmac(salt, '%s:%s' % (value, expires), algorithm='sha256').hexdigest()
+
+
+def verify_url_signature(value: str, expires: int, signature: str, salt: str) -> None:
+    """Verifies HMAC signature of the URL.
+
+    Args:
+        value (str): Signed value.
+        expires (int): Expiration timestamp.
+        signature (str): Signature to verify.
+        salt (str): Salt used for signing.
+
+    Raises:
+        base.exceptions.FatalSignatureError: If signature is not valid.
+        base.exceptions.SignatureExpiredError: If signature is expired.
+    """
+    if not constant_time_compare(generate_url_signature(value, expires, salt), signature):
+        raise FatalSignatureError()
+
+    if expires < datetime.datetime.now().timestamp():
+        raise SignatureExpiredError()
+
+
+@lru_cache(maxsize=16)
+def _get_upload_token_key(secret: str) -> bytes:
+    return hashlib.sha256(UPLOAD_TOKEN_SALT + secret.encode('utf-8')).digest()
+
+
+def get_upload_token_key(key_id: int) -> bytes:
+    """Returns HMAC key of the upload tokens.
+
+    Keys are rotated with ``settings.BF_UPLOAD_TOKEN_KEYS``, new tokens are signed with
+    ``settings.BF_UPLOAD_TOKEN_KEY_ID`` key, tokens signed with other keys from the settings stay valid.
+
+    Args:
+        key_id (int): Key id.
+
+    Returns:
+        bytes: HMAC key.
+
+    Raises:
+        base.exceptions.FatalSignatureError: If key doesn't exist.
+    """
+    try:
+        secret: str = settings.BF_UPLOAD_TOKEN_KEYS[str(key_id)]
+    except KeyError:
+        raise FatalSignatureError()
+
+    return _get_upload_token_key(secret)
+
+
+def generate_upload_token(
+        upload_id: int,
+        owner_id: Optional[int] = None,
+        expiration_time: Optional[int] = DEFAULT_UPLOAD_TOKEN_EXPIRATION_TIME
+) -> str:
+    """Generates compact upload token.
+
+    Unlike JWT, token contains only upload id, owner id and expiration timestamp packed in 21 bytes
+    and 16 bytes of HMAC-SHA256, so it's 50 characters long and verified without JSON decoding.
+
+    Args:
+        upload_id (int): Upload id, id of ``accounts.models.File``.
+        owner_id (int, optional): Owner id, None for anonymous uploads.
+        expiration_time (int, optional): After expiration time token can't be verified.
+
+    Returns:
+        str: Upload token.
+    """
+    if expiration_time is None:
+        expiration_time = DEFAULT_UPLOAD_TOKEN_EXPIRATION_TIME
+
+    key_id: int = settings.BF_UPLOAD_TOKEN_KEY_ID
+    expires: int = int(datetime.datetime.now().timestamp()) + expiration_time
+    message: bytes = UPLOAD_TOKEN_STRUCT.pack(key_id, upload_id, owner_id or 0, expires)
+    mac: bytes = hmac.new(get_upload_token_key(key_id), message, hashlib.sha256).digest()[:UPLOAD_TOKEN_MAC_SIZE]
+
+    return base64.urlsafe_b64encode(message + mac).rstrip(b'=').decode('ascii')
+
+
+def decode_upload_token(token: str, consume: bool = False) -> UploadToken:
+    """Verifies and decodes upload token.
+
+    Args:
+        token (str): Upload token.
+        consume (bool, optional): Mark token as used, the same token can't be decoded with ``consume`` again.
+
+    Returns:
+        base.dataclasses.UploadToken: Decoded token, ``owner_id`` is 0 for anonymous uploads.
+
+    Raises:
+        base.exceptions.FatalSignatureError: If token is not valid.
+        base.exceptions.SignatureExpiredError: If token is expired.
+        base.exceptions.SignatureConsumedError: If token is already consumed.
+    """
+    try:
+        raw: bytes = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+    except (binascii.Error, TypeError, ValueError):
+        raise FatalSignatureError()
+
+    if len(raw) != UPLOAD_TOKEN_SIZE:
+        raise FatalSignatureError()
+
+    message, mac = raw[:UPLOAD_TOKEN_STRUCT.size], raw[UPLOAD_TOKEN_STRUCT.size:]
+    key_id, upload_id, owner_id, expires = UPLOAD_TOKEN_STRUCT.unpack(message)
+    expected_mac: bytes = hmac.new(get_upload_token_key(key_id), message, hashlib.sha256).digest()
+
+    if not hmac.compare_digest(expected_mac[:UPLOAD_TOKEN_MAC_SIZE], mac):
+        raise FatalSignatureError()
+
+    timeout: int = expires - int(datetime.datetime.now().timestamp())
+
+    if timeout < 0:
+        raise SignatureExpiredError()
+
+    # Expired tokens are rejected anyway, so consumed tokens are kept until expiration only.
+    # Token is single-use across the workers only with the shared cache, see ``base.checks``.
+    if consume and not cache.add(CONSUMED_UPLOAD_TOKEN_KEY % mac.hex(), True, timeout=timeout + 1):
+        raise SignatureConsumedError()
+
+    return UploadToken(upload_id=upload_id, owner_id=owner_id, expires=expires, key_id=key_id)
+
+
+def release_upload_token(token: str) -> None:
+    """Allows consumed upload token to be consumed again, e.g. if the upload failed transiently.
+
+    Args:
+        token (str): Upload token verified with ``decode_upload_token``.
+    """
+    raw: bytes = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+
+    cache.delete(CONSUMED_UPLOAD_TOKEN_KEY % raw[UPLOAD_TOKEN_STRUCT.size:].hex())
+
+
+def _get_request_user(request):
+    # Evaluates the lazy user, it is loaded from the session with sync ORM.
+    request.user.is_authenticated
+
+    return request.user
+
+
+async def aget_request_user(request):
+    """Returns the user of the request in async views.
+
+    ``request.user`` is lazy and reads the session and the user from the database on the first access,
+    which is not allowed in the event loop.
+    """
+    return await sync_to_async(_get_request_user)(request)
@@ -0,0 +1,58 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+
+class BatchWorkerCommand(BaseCommand):
+    """Base command for the background workers.
+
+    Subclasses implement ``process_batch``, which processes at most ``batch_size`` items
+    and returns the number of processed items. By default, command drains the queue and exits,
+    with ``--loop`` it keeps polling every ``--interval`` seconds, so it can be run from cron
+    or as a long-living process.
+    """
+    default_batch_size: int = 1000
+    default_interval: float = 5
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=self.default_batch_size,
+            help='Maximum number of items processed in one batch.'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling for the new items.'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=self.default_interval,
+            help='Seconds to sleep between polls in loop mode.'
+        )
+
+    def process_batch(self, batch_size: int, **options) -> int:
+        raise NotImplementedError()
+
+    def handle(self, *args, **options):
+        batch_size: int = options['batch_size']
+
+        while True:
+            total: int = 0
+
+            while True:
+                processed: int = self.process_batch(batch_size, **options)
+                total += processed
+
+                if processed < batch_size:
+                    break
+
+            if total:
+                self.stdout.write('Processed %s items' % total)
+
+            if not options['loop']:
+                return
+
+            time.sleep(options['interval'])
@@ -0,0 +1,31 @@
+"""Gunicorn config of the ASGI deployment, ``BF_SERVER=asgi bash entrypoint.sh``.
+
+Every worker runs an event loop, async views (uploads, download redirects, Stripe webhook, health)
+serve many concurrent clients, sync views run in the thread pool of the worker.
+"""
+import multiprocessing
+import os
+
+
+bind = '0.0.0.0:%s' % os.environ.get('PORT', '8080')
+worker_class = 'uvicorn.workers.UvicornWorker'
+workers = int(os.environ.get('BF_ASGI_WORKERS', multiprocessing.cpu_count() * 2))
+
+timeout = 60                   # Forcefully kill workers silent for more than 60 seconds
+graceful_timeout = 30          # How long to wait for requests in flight on restart
+keepalive = 5                  # Seconds to keep idle connections, should be less than the load balancer timeout
+
+max_requests = 10000           # Restart workers after this many requests
+max_requests_jitter = 1000     # so workers are not restarted at the same time
+
+preload_app = True             # Import and warm up the application in the master, see utils.preload
+
+accesslog = None               # Disable access logging
+errorlog = '-'
+
+
+def post_fork(server, worker):
+    # Storage clients are created per process, the application is already imported by the master.
+    from utils.storages import warm_up
+
+    warm_up()
@@ -14,3 +14,15 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_asgi_application()
+
+from django.conf import settings  # noqa: E402
+
+from utils.preload import preload_app  # noqa: E402
+from utils.storages import warm_up  # noqa: E402
+
+if settings.PRELOAD_APP:
+    # Gunicorn imports the application in the master with ``preload_app``, see configurations/gunicorn.conf.py.
+    preload_app()
+
+# Clients are per process, gunicorn warms them up again in every forked worker.
+warm_up()
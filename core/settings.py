@@ -27,6 +27,9 @@ _PROJECT_NAME = ''.join(PROJECT_NAME.split())
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = ENV.get_value('BF_SECRET_KEY')
 BF_JWT_AUTH_KEY = ENV.get_value('BF_JWT_AUTH_KEY')
+# Upload token keys by key id, e.g. "2=new-secret,1=old-secret", tokens are signed with BF_UPLOAD_TOKEN_KEY_ID key.
+BF_UPLOAD_TOKEN_KEYS = ENV.dict('BF_UPLOAD_TOKEN_KEYS', default={'1': BF_JWT_AUTH_KEY})
+BF_UPLOAD_TOKEN_KEY_ID = ENV.get_value('BF_UPLOAD_TOKEN_KEY_ID', default=1, cast=int)
 
 # By default, always run in production mode
 DEBUG = ENV.get_value('BF_DEBUG', default=False, cast=bool)
@@ -45,7 +48,7 @@ if DEBUG is False:
 
     REST_FRAMEWORK = {
         'DEFAULT_RENDERER_CLASSES': (
-            'rest_framework.renderers.JSONRenderer',
+            'api.renderers.FastJSONRenderer',
         )
     }
 
@@ -82,16 +85,31 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'base.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'base.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
+    'accounts.middleware.LegacySessionBackendMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Templates, URL resolvers and libmagic are warmed up before workers are forked, see utils.preload.
+PRELOAD_APP = ENV.get_value('BF_PRELOAD_APP', default=not DEBUG, cast=bool)
+
+# Metrics of every worker are written to the directory and aggregated by ``/metrics``, see utils.prometheus.
+METRICS_DIR = ENV.get_value('BF_METRICS_DIR', default=None)
+METRICS_WRITE_INTERVAL = ENV.get_value('BF_METRICS_WRITE_INTERVAL', default=5, cast=float)
+# ``/metrics`` requires ``Authorization: Bearer <token>`` header, disabled if not set.
+METRICS_TOKEN = ENV.get_value('BF_METRICS_TOKEN', default=None)
+
+# Text responses smaller than this are not compressed, brotli is used if installed, gzip otherwise.
+COMPRESSION_MIN_SIZE = ENV.get_value('BF_COMPRESSION_MIN_SIZE', default=1024, cast=int)
+
 CORS_ALLOWED_ORIGINS = ENV.get_value('BF_CORS_ALLOWED_ORIGINS', cast=list)
 
 ROOT_URLCONF = 'core.urls'
@@ -133,6 +151,20 @@ else:
         },
     }
 
+# Cache
+# Signed URLs and other shared state are cached, so in production cache must be shared between
+# the workers, for example ``BF_CACHE_URL=redis://127.0.0.1:6379/1``, ``check --deploy`` fails otherwise.
+# Heroku Redis add-on sets ``REDIS_URL``.
+CACHES = {
+    'default': ENV.cache_url('BF_CACHE_URL', default=ENV.get_value('REDIS_URL', default='locmemcache://')),
+}
+
+# Users of the sessions are loaded from the cache. Sessions created with ``ModelBackend`` before are
+# moved to ``CachedModelBackend`` by ``LegacySessionBackendMiddleware``.
+AUTHENTICATION_BACKENDS = [
+    'accounts.backends.CachedModelBackend',
+]
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -173,7 +205,14 @@ if AWS_STORAGE_BUCKET_NAME is not None:
     AWS_SECRET_ACCESS_KEY = ENV.get_value('AWS_SECRET_ACCESS_KEY')
     AWS_S3_REGION_NAME = ENV.get_value('AWS_S3_REGION_NAME')
 
-    DEFAULT_FILE_STORAGE = 'storages.backends.s3boto3.S3Boto3Storage'
+    DEFAULT_FILE_STORAGE = 'utils.storages.PooledS3Boto3Storage'
+
+    AWS_S3_MAX_POOL_CONNECTIONS = ENV.get_value('AWS_S3_MAX_POOL_CONNECTIONS', default=50, cast=int)
+    AWS_S3_CONNECT_TIMEOUT = ENV.get_value('AWS_S3_CONNECT_TIMEOUT', default=5, cast=float)
+    AWS_S3_READ_TIMEOUT = ENV.get_value('AWS_S3_READ_TIMEOUT', default=30, cast=float)
+    AWS_S3_RETRY_MODE = ENV.get_value('AWS_S3_RETRY_MODE', default='standard')
+    AWS_S3_MAX_ATTEMPTS = ENV.get_value('AWS_S3_MAX_ATTEMPTS', default=3, cast=int)
+    AWS_S3_TCP_KEEPALIVE = ENV.get_value('AWS_S3_TCP_KEEPALIVE', default=True, cast=bool)
 
     BF_CLOUD_STORAGE_SITE = ENV.get_value('BF_CLOUD_STORAGE_SITE', default=None)
 
@@ -189,6 +228,11 @@ else:
     MEDIA_URL = '/media/'
     MEDIA_ROOT = str(BASE_DIR / 'media/')
 
+    # nginx, xsendfile, uwsgi or None to stream files with Django
+    BF_SENDFILE_BACKEND = ENV.get_value('BF_SENDFILE_BACKEND', default=None)
+    # nginx internal location aliased to MEDIA_ROOT
+    BF_SENDFILE_URL = ENV.get_value('BF_SENDFILE_URL', default='/protected/')
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -222,6 +266,9 @@ EMAIL_PORT = ENV.get_value('EMAIL_PORT', cast=int, default=587)
 
 EMAIL_USE_TLS = True
 
+# Emails are sent by ``send_emails`` command, a stalled SMTP server must not block the outbox.
+EMAIL_TIMEOUT = ENV.get_value('EMAIL_TIMEOUT', cast=int, default=10)
+
 # Payments
 PAYMENT_HOST = ENV.get_value('BF_PAYMENT_HOST')
 
@@ -230,16 +277,42 @@ PAYMENT_USES_SSL = DEBUG
 STRIPE_PUBLIC_KEY = ENV.get_value('STRIPE_PUBLIC_KEY')
 STRIPE_SECRET_KEY = ENV.get_value('STRIPE_SECRET_KEY')
 STRIPE_ENDPOINT_SECRET = ENV.get_value('STRIPE_ENDPOINT_SECRET')
+# Checkout is created inside the request, PSP must answer well before the worker is killed by harakiri.
+STRIPE_CONNECT_TIMEOUT = ENV.get_value('BF_STRIPE_CONNECT_TIMEOUT', default=3.0, cast=float)
+STRIPE_READ_TIMEOUT = ENV.get_value('BF_STRIPE_READ_TIMEOUT', default=10.0, cast=float)
+STRIPE_MAX_POOL_CONNECTIONS = ENV.get_value('BF_STRIPE_MAX_POOL_CONNECTIONS', default=10, cast=int)
 
 REST_FRAMEWORK = {
     'EXCEPTION_HANDLER': 'api.exception_handlers.api_exception_handler',
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentications.CachedJWTAuthentication',
     ),
     'DEFAULT_RENDERER_CLASSES': (
-        'rest_framework.renderers.JSONRenderer',
+        'api.renderers.FastJSONRenderer',
     ),
 }
 
 # Features
 ENABLE_API = False
+
+# Stand-ins
+# Local S3 and Stripe stand-ins for offline benchmarks and tests. Never enable in production,
+# stand-ins don't verify signatures.
+BF_STANDINS = ENV.get_value('BF_STANDINS', default=False, cast=bool)
+BF_STANDINS_URL = ENV.get_value('BF_STANDINS_URL', default='http://localhost:8000')
+BF_STANDINS_ROOT = ENV.get_value('BF_STANDINS_ROOT', default=str(BASE_DIR / 'standins_data/'))
+BF_STANDINS_STRIPE_PRODUCTS = ENV.get_value('BF_STANDINS_STRIPE_PRODUCTS', default=3, cast=int)
+BF_STANDINS_STRIPE_PRICES_PER_PRODUCT = ENV.get_value('BF_STANDINS_STRIPE_PRICES_PER_PRODUCT', default=2, cast=int)
+
+STRIPE_API_BASE = ENV.get_value('STRIPE_API_BASE', default=None)
+
+if BF_STANDINS:
+    INSTALLED_APPS.append('standins')
+
+    if STRIPE_API_BASE is None:
+        STRIPE_API_BASE = '%s/standins/stripe' % BF_STANDINS_URL
+
+    if AWS_STORAGE_BUCKET_NAME is not None:
+        AWS_S3_ENDPOINT_URL = '%s/standins/s3' % BF_STANDINS_URL
+        AWS_S3_ADDRESSING_STYLE = 'path'
+        AWS_S3_SIGNATURE_VERSION = 's3v4'
@@ -19,13 +19,15 @@ from django.urls import include, path
 from django.views.generic import TemplateView
 
 from accounts.views import Account
-from api.views import Health
+from api.views import Health, Metrics
 
 
 urlpatterns = [
     path('', Account.as_view(), name='index'),
     path('admin/', admin.site.urls),
     path('health/', Health.as_view(), name='health'),
+    # Without trailing slash, the default path of Prometheus scrapes.
+    path('metrics', Metrics.as_view(), name='metrics'),
     path('accounts/', include('accounts.urls'), name='accounts'),
     path('robots.txt', TemplateView.as_view(template_name='base/robots.txt', content_type='text/plain'), name='robots'),
     path('docs/', include('docs.urls')),
@@ -34,6 +36,12 @@ urlpatterns = [
 ]
 
 
+if settings.BF_STANDINS:
+    urlpatterns += [
+        path('standins/', include('standins.urls')),
+    ]
+
+
 if settings.DEBUG:
     from django.conf.urls.static import static
     from django.contrib.staticfiles.urls import staticfiles_urlpatterns
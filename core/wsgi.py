@@ -14,3 +14,20 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_wsgi_application()
+
+from django.conf import settings  # noqa: E402
+
+from utils.preload import preload_app  # noqa: E402
+from utils.storages import warm_up  # noqa: E402
+
+if settings.PRELOAD_APP:
+    # uWSGI imports the application in the master, workers are forked with the warmed up and frozen heap.
+    preload_app()
+
+try:
+    from uwsgidecorators import postfork
+except ImportError:
+    warm_up()
+else:
+    # Clients are created per process, so warm up every forked worker.
+    postfork(warm_up)
@@ -5,9 +5,24 @@ then
   PORT=8080
 fi
 
+if [ -n "${BF_METRICS_DIR}" ]
+then
+  # Snapshots of the workers of the previous run.
+  mkdir -p "$BF_METRICS_DIR"
+  rm -f "$BF_METRICS_DIR"/metrics-*.json
+fi
+
+# Fails if the production settings are not safe, for example the cache is local to the process.
+python manage.py check --deploy --fail-level ERROR || exit 1
 python manage.py collectstatic --noinput
 python manage.py migrate
 
 echo "Starting service on port $PORT"
 echo "To change port set port to PORT virtual environment variable"
+if [ "${BF_SERVER}" = "asgi" ]
+then
+  # Static files are served by the web server or CDN in front of the ASGI workers.
+  exec gunicorn core.asgi:application --config configurations/gunicorn.conf.py
+fi
+
 uwsgi --http :$PORT --ini configurations/server.ini --static-map /static=static --static-map /favicon.ico=favicon.ico
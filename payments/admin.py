@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from payments.models import Price, Product, Subscription
+from payments.models import Price, Product, Subscription, WebhookEvent
 
 
 @admin.register(Product)
@@ -16,3 +16,10 @@ class PriceAdmin(admin.ModelAdmin):
 @admin.register(Subscription)
 class SubscriptionAdmin(admin.ModelAdmin):
     pass
+
+
+@admin.register(WebhookEvent)
+class WebhookEventAdmin(admin.ModelAdmin):
+    list_display = ('event_id', 'event_type', 'ordering_key', 'status', 'attempts', 'event_created')
+    list_filter = ('status', 'event_type')
+    search_fields = ('=event_id', '=ordering_key')
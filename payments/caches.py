@@ -0,0 +1,79 @@
+from typing import Dict, List, Optional
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Prefetch
+
+from payments.models import Price, Product
+
+
+class CatalogueCache:
+    """Cache of the active products with their active prices.
+
+    Catalogue and the rendered catalogue fragments are keyed by the catalogue version, any change
+    of products or prices replaces the version, so all the entries are invalidated with one call
+    and the stale ones expire on their own.
+
+    Catalogue is changed by ``sync_catalogue_events`` worker, so the cache must be shared with the web
+    processes, see ``base.checks.check_shared_cache``.
+    """
+    VERSION_KEY: str = 'catalogue:version'
+    KEY_PREFIX: str = 'catalogue'
+    timeout: int = 24 * 60 * 60
+
+    @classmethod
+    def get_version(cls) -> str:
+        version: Optional[str] = cache.get(cls.VERSION_KEY)
+
+        if version is None:
+            version = uuid4().hex
+
+            if not cache.add(cls.VERSION_KEY, version, timeout=None):
+                version = cache.get(cls.VERSION_KEY, version)
+
+        return version
+
+    @classmethod
+    def invalidate(cls) -> None:
+        """Replaces the catalogue version after the commit, so the old catalogue can't be cached
+        under the new version.
+        """
+        transaction.on_commit(lambda: cache.set(cls.VERSION_KEY, uuid4().hex, timeout=None))
+
+    @staticmethod
+    def get_queryset():
+        return Product.objects.filter(active=True).prefetch_related(
+            Prefetch('prices', queryset=Price.objects.filter(active=True).order_by('unit_amount', 'id'))
+        ).order_by('id')
+
+    @classmethod
+    def get_products(cls) -> List[Product]:
+        """Returns active products, prices of the products are prefetched.
+
+        Returns:
+            list: Active products ordered by id.
+        """
+        key: str = '%s:%s:products' % (cls.KEY_PREFIX, cls.get_version())
+        products: Optional[List[Product]] = cache.get(key)
+
+        if products is None:
+            products = list(cls.get_queryset())
+            cache.set(key, products, timeout=cls.timeout)
+
+        return products
+
+    @classmethod
+    def get_product(cls, product_id) -> Optional[Product]:
+        products: Dict[str, Product] = {str(product.id): product for product in cls.get_products()}
+
+        return products.get(str(product_id))
+
+    @classmethod
+    def get_price(cls, price_id) -> Optional[Price]:
+        for product in cls.get_products():
+            for price in product.prices.all():
+                if str(price.id) == str(price_id):
+                    return price
+
+        return None
@@ -2,4 +2,14 @@ from django.conf import settings
 
 import stripe
 
+from payments.http_client import PooledRequestsClient
+
 stripe.api_key = settings.STRIPE_SECRET_KEY
+stripe.default_http_client = PooledRequestsClient(
+    connect_timeout=settings.STRIPE_CONNECT_TIMEOUT,
+    read_timeout=settings.STRIPE_READ_TIMEOUT,
+    max_pool_connections=settings.STRIPE_MAX_POOL_CONNECTIONS,
+)
+
+if settings.STRIPE_API_BASE is not None:
+    stripe.api_base = settings.STRIPE_API_BASE
@@ -0,0 +1,11 @@
+from dataclasses import dataclass
+
+from base.dataclasses import DataClassBase
+
+
+@dataclass
+class SyncResult(DataClassBase):
+    """Result of the PSP objects synchronisation."""
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
@@ -0,0 +1,8 @@
+from enum import Enum
+
+
+class WebhookEventStatus(Enum):
+    """Processing status of the received webhook event"""
+    PENDING = 'PENDING'
+    DONE = 'DONE'
+    DEAD = 'DEAD'
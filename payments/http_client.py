@@ -0,0 +1,85 @@
+"""Stripe HTTP client with a shared keep-alive connection pool and explicit timeouts.
+
+``stripe.http_client.RequestsClient`` creates a ``requests.Session`` per thread with the default
+pool and waits up to 80 seconds for the response. ``PooledRequestsClient`` shares one session per
+process between threads, so connections to PSP are reused by all requests of the worker, and
+limits connect and read time, so a slow PSP fails fast instead of holding the worker.
+"""
+import os
+import re
+import threading
+import time
+from typing import Dict
+
+import requests
+from requests.adapters import HTTPAdapter
+from stripe.http_client import RequestsClient
+
+from utils.metrics import observe_latency
+
+
+LATENCY_COUNTER_PREFIX: str = 'stripe.'
+# Object ids, e.g. ``cs_test_a1b2`` or ``prod_a1b2``, are replaced to keep the number of counters small.
+# Ids are a short prefix and a token with digits, resource names like ``payment_intents`` are kept.
+OBJECT_ID_RE = re.compile(r'/[a-z]{2,8}_(?:test_|live_)?(?=[A-Za-z0-9]*\d)[A-Za-z0-9]{4,}(?=/|$)')
+
+_sessions: Dict[tuple, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+def get_operation_name(method: str, url: str) -> str:
+    """Returns operation name of the request, e.g. ``POST /v1/checkout/sessions``."""
+    path: str = requests.utils.urlparse(url).path
+
+    return '%s %s' % (method.upper(), OBJECT_ID_RE.sub('/{id}', path))
+
+
+class PooledRequestsClient(RequestsClient):
+    """Stripe HTTP client sharing one session between threads of the process.
+
+    Note:
+        Sessions are stored per process id, so workers forked by uWSGI never share sockets
+        with the master process.
+
+    Per-operation latencies are collected with ``utils.metrics`` under ``stripe.<METHOD> <path>`` names.
+
+    Args:
+        connect_timeout (float): Connection timeout in seconds.
+        read_timeout (float): Read timeout in seconds.
+        max_pool_connections (int): Maximum number of kept-alive connections.
+    """
+    name = 'pooled-requests'
+
+    def __init__(self, connect_timeout: float, read_timeout: float, max_pool_connections: int, **kwargs):
+        super().__init__(timeout=(connect_timeout, read_timeout), **kwargs)
+        self.max_pool_connections = max_pool_connections
+
+    def get_session(self) -> requests.Session:
+        session_key: tuple = (os.getpid(), self.max_pool_connections)
+
+        try:
+            return _sessions[session_key]
+        except KeyError:
+            pass
+
+        with _sessions_lock:
+            if session_key not in _sessions:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_pool_connections)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _sessions[session_key] = session
+
+            return _sessions[session_key]
+
+    def _request_internal(self, method, url, headers, post_data, is_streaming):
+        self._thread_local.session = self.get_session()
+        started_at: float = time.perf_counter()
+
+        try:
+            return super()._request_internal(method, url, headers, post_data, is_streaming)
+        finally:
+            observe_latency(
+                LATENCY_COUNTER_PREFIX + get_operation_name(method, url),
+                time.perf_counter() - started_at
+            )
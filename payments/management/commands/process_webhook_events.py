@@ -0,0 +1,16 @@
+from api.v1.services import StripeWebhookService
+from base.workers import BatchWorkerCommand
+from payments.models import WebhookEvent
+
+
+def handle_event(event) -> None:
+    StripeWebhookService(event).process_post_request()
+
+
+class Command(BatchWorkerCommand):
+    help = 'Processes received PSP webhook events.'
+    default_batch_size = 100
+    default_interval = 1
+
+    def process_batch(self, batch_size: int, **options) -> int:
+        return WebhookEvent.process_pending(handle_event, batch_size=batch_size)
@@ -0,0 +1,10 @@
+from base.workers import BatchWorkerCommand
+from payments.models import Subscription
+
+
+class Command(BatchWorkerCommand):
+    help = 'Deactivates subscriptions with the lapsed period.'
+    default_interval = 60
+
+    def process_batch(self, batch_size: int, **options) -> int:
+        return Subscription.sweep(batch_size=batch_size)
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from payments.sync import sync_catalogue
+
+
+class Command(BaseCommand):
+    help = 'Synchronises products and prices with PSP.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            product_result, price_result = sync_catalogue()
+
+        for name, result in (('Products', product_result), ('Prices', price_result)):
+            self.stdout.write(
+                '%s: %d inserted, %d updated, %d unchanged' % (
+                    name,
+                    result.inserted,
+                    result.updated,
+                    result.unchanged,
+                )
+            )
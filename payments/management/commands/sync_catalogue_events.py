@@ -0,0 +1,11 @@
+from base.workers import BatchWorkerCommand
+from payments.sync import PAGE_SIZE, sync_catalogue_events
+
+
+class Command(BatchWorkerCommand):
+    help = 'Applies product and price events of PSP, resynchronises the whole catalogue if events are expired.'
+    default_batch_size = PAGE_SIZE
+    default_interval = 60
+
+    def process_batch(self, batch_size: int, **options) -> int:
+        return sync_catalogue_events(limit=batch_size)
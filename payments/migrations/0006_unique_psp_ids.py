@@ -0,0 +1,23 @@
+# Generated by Django 4.1.3 on 2026-10-19 18:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0005_alter_subscription_current_period_end'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='price',
+            name='psp_id',
+            field=models.CharField(max_length=64, unique=True, verbose_name='PSP ID'),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='psp_id',
+            field=models.CharField(max_length=64, unique=True, verbose_name='PSP ID'),
+        ),
+    ]
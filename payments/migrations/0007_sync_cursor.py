@@ -0,0 +1,27 @@
+# Generated by Django 4.1.3 on 2026-10-19 18:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0006_unique_psp_ids'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=64, unique=True, verbose_name='Name')),
+                ('event_id', models.CharField(blank=True, max_length=64, null=True, verbose_name='Last event ID')),
+                ('event_created', models.DateTimeField(blank=True, null=True, verbose_name='Last event created date')),
+                ('date_synced', models.DateTimeField(blank=True, null=True, verbose_name='Full synchronisation date')),
+            ],
+            options={
+                'verbose_name': 'Sync cursor',
+                'verbose_name_plural': 'Sync cursors',
+            },
+        ),
+    ]
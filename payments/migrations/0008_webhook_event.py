@@ -0,0 +1,43 @@
+# Generated by Django 4.1.3 on 2026-10-19 18:07
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0007_sync_cursor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WebhookEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_id', models.CharField(max_length=64, unique=True, verbose_name='Event ID')),
+                ('event_type', models.CharField(max_length=128, verbose_name='Event type')),
+                ('ordering_key', models.CharField(max_length=64, verbose_name='Ordering key')),
+                ('event_created', models.DateTimeField(verbose_name='Event created date')),
+                ('payload', models.JSONField(verbose_name='Payload')),
+                ('status', models.CharField(choices=[('PENDING', 'PENDING'), ('DONE', 'DONE'), ('DEAD', 'DEAD')], default='PENDING', max_length=16, verbose_name='Status')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Attempts')),
+                ('last_error', models.TextField(blank=True, null=True, verbose_name='Last error')),
+                ('date_created', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Created date')),
+                ('date_next_attempt', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Next attempt date')),
+                ('date_processed', models.DateTimeField(blank=True, null=True, verbose_name='Processed date')),
+            ],
+            options={
+                'verbose_name': 'Webhook event',
+                'verbose_name_plural': 'Webhook events',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='webhookevent',
+            index=models.Index(fields=['status', 'event_created', 'id'], name='payments_we_status_49eb97_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='webhookevent',
+            index=models.Index(fields=['ordering_key', 'status'], name='payments_we_orderin_0d7beb_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.1.3 on 2026-10-19 18:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0008_webhook_event'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='subscription',
+            index=models.Index(fields=['active', 'current_period_end'], name='payments_su_active_558d70_idx'),
+        ),
+    ]
@@ -1,14 +1,19 @@
 import datetime
+import traceback
+from typing import Callable, List, Optional
 
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Exists, OuterRef, Q
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from accounts.caches import EntitlementCache
 from accounts.models import User
 from base.utils import generate_jwt_signature
 from payments.core import stripe
+from payments.enums import WebhookEventStatus
 
 
 class Product(models.Model):
@@ -27,7 +32,8 @@ class Product(models.Model):
         max_length=64,
         editable=True,
         null=False,
-        blank=False
+        blank=False,
+        unique=True
     )
     metadata = models.JSONField(
         _('Metadata'),
@@ -59,30 +65,15 @@ class Product(models.Model):
     def populate(products: list = None):
         """Populates products from PSP.
 
-        TODO: Optimise method, for now it's not critical.
-        Method is not optimised and inserts all records 1 by 1.
-        But this method won't be called often.
-
         Args:
-            products (list, optional): list of products.
-        """
-        if products is None:
-            # TODO: change limit=100 to starting_after=product_id
-            products = stripe.Product.list(limit=100).data
-
-        # TODO: Change to bulk update
-        for product in products:
-            product_obj, created = Product.objects.get_or_create(psp_id=product.id)
+            products (list, optional): list of products, all PSP products by default.
 
-            product_obj.active = product.active
-            product_obj.description = product.description
-            product_obj.metadata = product.metadata.to_dict()
-            product_obj.name = product.name
-            product_obj.object_name = product.object
-            product_obj.product_type = product.type
-            product_obj.product_type = product.type
+        Returns:
+            payments.dataclasses.SyncResult: Number of inserted, updated and unchanged products.
+        """
+        from payments.sync import sync_products
 
-            product_obj.save()
+        return sync_products(products)
 
     def is_available(self):
         return self.active
@@ -112,7 +103,8 @@ class Price(models.Model):
         max_length=64,
         editable=True,
         null=False,
-        blank=False
+        blank=False,
+        unique=True
     )
     metadata = models.JSONField(
         _('Metadata'),
@@ -159,37 +151,19 @@ class Price(models.Model):
 
     @staticmethod
     def populate():
-        """Populates prices from PSP.
+        """Populates prices and their products from PSP.
 
-        TODO: Optimise method, for now it's not critical.
-        Method is not optimised and inserts all records 1 by 1.
-        But this method won't be called often.
+        Returns:
+            payments.dataclasses.SyncResult: Number of inserted, updated and unchanged prices.
         """
-        # TODO: change limit=100 to starting_after=price_id
-        price_list = stripe.Price.list(expand=['data.product'], limit=100)
+        from payments.sync import iter_psp_list, sync_prices, sync_products
+
+        prices: list = list(iter_psp_list(stripe.Price, expand=['data.product']))
         # We need to populate ``payments.models.Product`` first as ``payments.models.Price`` has
         # foreign key on ``payments.models.Product``.
-        Product.populate(products=[price.product for price in price_list.data])
-
-        for price in price_list.data:
-            try:
-                price_obj = Price.objects.get(psp_id=price.id)
-            except Price.DoesNotExist:
-                price_obj = Price(psp_id=price.id)
-
-            price_obj.active = price.active
-            price_obj.billing_scheme = price.billing_scheme
-            price_obj.currency = price.currency.upper()
-            price_obj.psp_id = price.id
-            price_obj.metadata = price.metadata.to_dict()
-            price_obj.object_name = price.object
-            price_obj.recurring = price.recurring or {}
-            price_obj.payment_type = price.type
-            price_obj.unit_amount = price.unit_amount
-            price_obj.unit_amount_decimal = price.unit_amount_decimal
-            price_obj.product = Product.objects.get(psp_id=price.product.id)
-
-            price_obj.save()
+        sync_products([price.product for price in prices])
+
+        return sync_prices(prices)
 
     def get_mode(self):
         if self.recurring:
@@ -230,6 +204,38 @@ class Price(models.Model):
         return stripe.checkout.Session.create(**session_kwargs)
 
 
+class SyncCursor(models.Model):
+    """Position of the incremental synchronisation in the PSP events feed."""
+    name = models.CharField(
+        _('Name'),
+        max_length=64,
+        unique=True
+    )
+    event_id = models.CharField(
+        _('Last event ID'),
+        max_length=64,
+        null=True,
+        blank=True
+    )
+    event_created = models.DateTimeField(
+        _('Last event created date'),
+        null=True,
+        blank=True
+    )
+    date_synced = models.DateTimeField(
+        _('Full synchronisation date'),
+        null=True,
+        blank=True
+    )
+
+    class Meta:
+        verbose_name = _('Sync cursor')
+        verbose_name_plural = _('Sync cursors')
+
+    def __str__(self):
+        return self.name
+
+
 class PaymentBase(models.Model):
     user = models.ForeignKey(
         'accounts.User',
@@ -302,6 +308,11 @@ class Subscription(PaymentBase):
         default=datetime.datetime.now
     )
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['active', 'current_period_end']),
+        ]
+
     @classmethod
     def from_event(cls, event: stripe.Event, save=False):
         product: Product = Product.objects.get(id=event.data.object.metadata.product_id)
@@ -324,11 +335,42 @@ class Subscription(PaymentBase):
 
         self.save(update_fields=['active', 'current_period_end'])
 
+    @classmethod
+    def sweep(cls, batch_size: int = 1000) -> int:
+        """Deactivates subscriptions with the lapsed period.
+
+        Subscriptions are found with ``(active, current_period_end)`` index and deactivated with
+        one ``UPDATE`` per batch, cached entitlements of the users are evicted after the commit.
+
+        Args:
+            batch_size (int, optional): Maximum number of subscriptions to deactivate.
+
+        Returns:
+            int: Number of deactivated subscriptions.
+        """
+        with transaction.atomic():
+            expired: List[tuple] = list(
+                cls.objects.select_for_update(skip_locked=True).filter(
+                    active=True,
+                    current_period_end__lt=timezone.now()
+                ).order_by('current_period_end').values_list('id', 'user_id')[:batch_size]
+            )
+
+            if not expired:
+                return 0
+
+            cls.objects.filter(id__in=[_id for _id, _ in expired]).update(active=False)
+            user_ids: set = {user_id for _, user_id in expired}
+            transaction.on_commit(lambda: EntitlementCache.evict_many(user_ids))
+
+        return len(expired)
+
 
 MODE_TO_PAYMENT_INSTANCE = {
     'subscription': Subscription,
     'payment': Payment,
 }
+SUBSCRIPTION_EVENT_PREFIX: str = 'customer.subscription.'
 
 
 def get_payment_instance(event: stripe.Event):
@@ -336,3 +378,211 @@ def get_payment_instance(event: stripe.Event):
         return MODE_TO_PAYMENT_INSTANCE[event.data.object.mode]
     except KeyError:
         raise NotImplementedError()
+
+
+class WebhookEvent(models.Model):
+    """Inbox of the received PSP webhook events.
+
+    Webhook only inserts the event and acknowledges it, redelivered events are ignored by the unique
+    ``event_id``. Events are processed by ``process_webhook_events`` command in the order of creation
+    per ``ordering_key`` (PSP customer or subscription), failed events are retried with exponential backoff and
+    marked as dead after ``MAX_ATTEMPTS``.
+    """
+    event_id = models.CharField(
+        _('Event ID'),
+        max_length=64,
+        unique=True,
+        null=False,
+        blank=False
+    )
+    event_type = models.CharField(
+        _('Event type'),
+        max_length=128,
+        null=False,
+        blank=False
+    )
+    ordering_key = models.CharField(
+        _('Ordering key'),
+        max_length=64,
+        null=False,
+        blank=False
+    )
+    event_created = models.DateTimeField(
+        _('Event created date'),
+        null=False,
+        blank=False
+    )
+    payload = models.JSONField(
+        _('Payload'),
+        null=False,
+        blank=False
+    )
+    status = models.CharField(
+        _('Status'),
+        max_length=16,
+        choices=[(status.value, status.value) for status in WebhookEventStatus],
+        default=WebhookEventStatus.PENDING.value
+    )
+    attempts = models.PositiveIntegerField(
+        _('Attempts'),
+        default=0
+    )
+    last_error = models.TextField(
+        _('Last error'),
+        null=True,
+        blank=True
+    )
+    date_created = models.DateTimeField(
+        _('Created date'),
+        default=timezone.now
+    )
+    date_next_attempt = models.DateTimeField(
+        _('Next attempt date'),
+        default=timezone.now
+    )
+    date_processed = models.DateTimeField(
+        _('Processed date'),
+        null=True,
+        blank=True
+    )
+
+    MAX_ATTEMPTS: int = 8
+    RETRY_BASE_DELAY: int = 30
+    RETRY_MAX_DELAY: int = 60 * 60
+
+    class Meta:
+        verbose_name = _('Webhook event')
+        verbose_name_plural = _('Webhook events')
+        indexes = [
+            models.Index(fields=['status', 'event_created', 'id']),
+            models.Index(fields=['ordering_key', 'status']),
+        ]
+
+    def __str__(self):
+        return self.event_id
+
+    @classmethod
+    def receive(cls, event: stripe.Event) -> None:
+        """Stores the event with a single ``INSERT``, redelivered events are ignored.
+
+        Args:
+            event (stripe.Event): Verified PSP event.
+        """
+        cls.objects.bulk_create([cls.from_event(event)], ignore_conflicts=True)
+
+    @classmethod
+    async def areceive(cls, event: stripe.Event) -> None:
+        """Async version of ``receive``."""
+        await cls.objects.abulk_create([cls.from_event(event)], ignore_conflicts=True)
+
+    @classmethod
+    def from_event(cls, event: stripe.Event) -> 'WebhookEvent':
+        obj = event.data.object
+
+        return cls(
+            event_id=event.id,
+            event_type=event.type,
+            ordering_key=cls.get_ordering_key(event),
+            event_created=datetime.datetime.fromtimestamp(event.created, tz=datetime.timezone.utc),
+            payload=event.to_dict_recursive(),
+        )
+
+    @staticmethod
+    def get_ordering_key(event: stripe.Event) -> str:
+        """Returns the key the events are ordered by.
+
+        Subscription events are retried until ``checkout.session.completed`` creates the local
+        subscription, so they are ordered per subscription and don't hold the checkout of the customer.
+        """
+        obj = event.data.object
+
+        if event.type.startswith(SUBSCRIPTION_EVENT_PREFIX):
+            return obj.id
+
+        return obj.get('customer') or obj.id
+
+    def to_event(self) -> stripe.Event:
+        return stripe.Event.construct_from(self.payload, stripe.api_key)
+
+    def get_retry_delay(self) -> datetime.timedelta:
+        return datetime.timedelta(seconds=min(self.RETRY_BASE_DELAY * 2 ** (self.attempts - 1), self.RETRY_MAX_DELAY))
+
+    @classmethod
+    def process_pending(cls, handler: Callable[[stripe.Event], None], batch_size: int = 100) -> int:
+        """Processes pending events keeping the order of events of every ordering key.
+
+        Events are locked with ``SKIP LOCKED``, so workers can run concurrently. Event is selected only
+        if there are no earlier pending events of its key, so an event locked by another worker
+        or waiting for the retry holds the following events of the same customer.
+
+        Args:
+            handler (Callable): Function processing ``stripe.Event``, exceptions are treated as failures.
+            batch_size (int, optional): Maximum number of events to lock.
+
+        Returns:
+            int: Number of attempted events.
+        """
+        now: datetime.datetime = timezone.now()
+        earlier_pending = cls.objects.filter(
+            Q(event_created__lt=OuterRef('event_created'))
+            | Q(event_created=OuterRef('event_created'), id__lt=OuterRef('id')),
+            status=WebhookEventStatus.PENDING.value,
+            ordering_key=OuterRef('ordering_key'),
+        )
+        attempted: int = 0
+
+        # Following events of the keys become due when their predecessors are processed.
+        while attempted < batch_size:
+            with transaction.atomic():
+                # Blocked keys are excluded in SQL, so the limit applies only to the events which can run
+                # and a customer with many events waiting for a retry doesn't stall other customers.
+                events: List[WebhookEvent] = list(
+                    cls.objects.select_for_update(skip_locked=True).filter(
+                        status=WebhookEventStatus.PENDING.value,
+                        date_next_attempt__lte=now
+                    ).exclude(
+                        Exists(earlier_pending)
+                    ).order_by('event_created', 'id')[:batch_size - attempted]
+                )
+
+                for event in events:
+                    event.process(handler, now)
+
+            if not events:
+                break
+
+            attempted += len(events)
+
+        return attempted
+
+    def process(self, handler: Callable[[stripe.Event], None], now: Optional[datetime.datetime] = None) -> bool:
+        """Runs the handler, on failure schedules a retry or marks the event as dead.
+
+        Returns:
+            bool: True if the event has been processed.
+        """
+        if now is None:
+            now = timezone.now()
+
+        self.attempts += 1
+
+        try:
+            with transaction.atomic():
+                handler(self.to_event())
+        except Exception:
+            self.last_error = traceback.format_exc()
+
+            if self.attempts >= self.MAX_ATTEMPTS:
+                self.status = WebhookEventStatus.DEAD.value
+            else:
+                self.date_next_attempt = now + self.get_retry_delay()
+
+            self.save(update_fields=['attempts', 'last_error', 'status', 'date_next_attempt'])
+
+            return False
+
+        self.status = WebhookEventStatus.DONE.value
+        self.date_processed = now
+        self.save(update_fields=['attempts', 'status', 'date_processed'])
+
+        return True
@@ -0,0 +1,28 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from accounts.caches import EntitlementCache
+from payments.caches import CatalogueCache
+from payments.models import Price, Product, Subscription
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Price)
+@receiver(post_delete, sender=Price)
+def invalidate_catalogue(sender, **kwargs):
+    """Invalidates cached catalogue changed from the admin panel.
+
+    Note:
+        Bulk writes of the synchronisation don't send signals, ``payments.sync`` invalidates
+        the catalogue itself.
+    """
+    CatalogueCache.invalidate()
+
+
+@receiver(post_save, sender=Subscription)
+@receiver(post_delete, sender=Subscription)
+def evict_entitlements(sender, instance: Subscription, **kwargs):
+    """Evicts cached entitlements of the subscription owner after the commit."""
+    transaction.on_commit(EntitlementCache(instance.user_id).evict)
@@ -0,0 +1,352 @@
+"""Catalogue synchronisation with PSP.
+
+Products and prices are paginated through the whole catalogue and written with a single
+``bulk_create(update_conflicts=True)`` per model. Unchanged rows are not written at all, foreign keys
+are resolved from an in-memory map, so the number of queries doesn't depend on the catalogue size.
+
+Incremental synchronisation reads ``product.*`` and ``price.*`` events after the stored cursor and
+applies only the objects they contain. When there is no cursor yet, or it is older than PSP keeps
+events, the whole catalogue is resynchronised and the cursor is moved to the latest event.
+"""
+import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from payments.caches import CatalogueCache
+from payments.core import stripe
+from payments.dataclasses import SyncResult
+from payments.models import Price, Product, SyncCursor
+
+
+PAGE_SIZE: int = 100
+BATCH_SIZE: int = 500
+PRODUCT_FIELDS: Tuple[str, ...] = (
+    'active',
+    'description',
+    'metadata',
+    'name',
+    'object_name',
+    'product_type',
+)
+PRICE_FIELDS: Tuple[str, ...] = (
+    'active',
+    'billing_scheme',
+    'currency',
+    'metadata',
+    'object_name',
+    'recurring',
+    'payment_type',
+    'unit_amount',
+    'unit_amount_decimal',
+    'product_id',
+)
+CATALOGUE_CURSOR_NAME: str = 'catalogue'
+CATALOGUE_EVENT_TYPES: Tuple[str, ...] = (
+    'product.created',
+    'product.updated',
+    'product.deleted',
+    'price.created',
+    'price.updated',
+    'price.deleted',
+)
+# Stripe keeps events for 30 days, a day is left for the clock skew and slow runs.
+MAX_CURSOR_AGE: datetime.timedelta = datetime.timedelta(days=29)
+
+
+def iter_psp_list(resource, **params) -> Iterable:
+    """Yields all objects of the PSP list following ``starting_after`` cursors.
+
+    Args:
+        resource: Stripe resource with ``list`` method, e.g. ``stripe.Product``.
+        **params: List parameters.
+
+    Yields:
+        stripe.stripe_object.StripeObject: PSP object.
+    """
+    return resource.list(limit=PAGE_SIZE, **params).auto_paging_iter()
+
+
+def to_dict(value) -> dict:
+    if value is None:
+        return {}
+
+    try:
+        return value.to_dict_recursive()
+    except AttributeError:
+        return dict(value)
+
+
+def product_from_psp(product) -> Product:
+    return Product(
+        psp_id=product.id,
+        active=product.active,
+        description=product.description,
+        metadata=to_dict(product.metadata),
+        name=product.name,
+        object_name=product.object,
+        product_type=product.type,
+    )
+
+
+def price_from_psp(price, product_id: int) -> Price:
+    return Price(
+        psp_id=price.id,
+        active=price.active,
+        billing_scheme=price.billing_scheme,
+        currency=price.currency.upper(),
+        metadata=to_dict(price.metadata),
+        object_name=price.object,
+        recurring=to_dict(price.recurring),
+        payment_type=price.type,
+        unit_amount=price.unit_amount,
+        unit_amount_decimal=price.unit_amount_decimal,
+        product_id=product_id,
+    )
+
+
+def upsert(model, objects: List, fields: Tuple[str, ...]) -> SyncResult:
+    """Inserts new and updates changed objects by ``psp_id``.
+
+    Args:
+        model: ``payments.models.Product`` or ``payments.models.Price``.
+        objects (list): Unsaved model instances, ``psp_id`` must be unique.
+        fields (tuple): Synchronised fields.
+
+    Returns:
+        payments.dataclasses.SyncResult: Number of inserted, updated and unchanged objects.
+    """
+    # Catalogue is small, loading all rows is cheaper than filtering by thousands of ids.
+    existing: Dict[str, tuple] = {
+        row[0]: row[1:] for row in model.objects.values_list('psp_id', *fields).order_by()
+    }
+    changed: List = []
+    inserted: int = 0
+    updated: int = 0
+
+    for obj in objects:
+        values: Optional[tuple] = existing.get(obj.psp_id)
+
+        if values is None:
+            inserted += 1
+        elif values != tuple(getattr(obj, field) for field in fields):
+            updated += 1
+        else:
+            continue
+
+        changed.append(obj)
+
+    if changed:
+        model.objects.bulk_create(
+            changed,
+            batch_size=BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['psp_id'],
+            update_fields=list(fields),
+        )
+        CatalogueCache.invalidate()
+
+    return SyncResult(inserted=inserted, updated=updated, unchanged=len(objects) - len(changed))
+
+
+def sync_products(products: Optional[Iterable] = None) -> SyncResult:
+    """Synchronises products.
+
+    Args:
+        products (Iterable, optional): PSP products, all PSP products by default.
+
+    Returns:
+        payments.dataclasses.SyncResult: Number of inserted, updated and unchanged products.
+    """
+    if products is None:
+        products = iter_psp_list(stripe.Product)
+
+    unique_products: Dict[str, Product] = {product.id: product_from_psp(product) for product in products}
+
+    return upsert(Product, list(unique_products.values()), PRODUCT_FIELDS)
+
+
+def sync_prices(prices: Optional[Iterable] = None) -> SyncResult:
+    """Synchronises prices, products of the prices must be synchronised before.
+
+    Args:
+        prices (Iterable, optional): PSP prices, all PSP prices by default.
+
+    Returns:
+        payments.dataclasses.SyncResult: Number of inserted, updated and unchanged prices.
+    """
+    if prices is None:
+        prices = iter_psp_list(stripe.Price)
+
+    prices = list(prices)
+    product_ids: Dict[str, int] = dict(Product.objects.values_list('psp_id', 'id').order_by())
+    price_objects: Dict[str, Price] = {
+        price.id: price_from_psp(price, product_ids[get_psp_id(price.product)]) for price in prices
+    }
+
+    return upsert(Price, list(price_objects.values()), PRICE_FIELDS)
+
+
+def sync_catalogue() -> Tuple[SyncResult, SyncResult]:
+    """Synchronises all products and prices.
+
+    Returns:
+        tuple: Product and price sync results.
+    """
+    return sync_products(), sync_prices()
+
+
+def get_psp_id(obj) -> str:
+    """Returns id of the expandable PSP field, which is either id or expanded object."""
+    if isinstance(obj, str):
+        return obj
+
+    return obj.id
+
+
+def apply_catalogue_events(events: List) -> Tuple[SyncResult, SyncResult]:
+    """Applies product and price events, only the latest state of every object is written.
+
+    Deleted objects are deactivated, as prices of deleted products can still be referenced by payments.
+
+    Args:
+        events (list): PSP events in chronological order.
+
+    Returns:
+        tuple: Product and price sync results.
+
+    Raises:
+        KeyError: If price refers to the product that isn't synchronised.
+    """
+    products: Dict[str, object] = {}
+    prices: Dict[str, object] = {}
+    deleted: Dict[str, Set[str]] = {'product': set(), 'price': set()}
+
+    for event in events:
+        obj = event.data.object
+
+        if obj.object == 'product':
+            products[obj.id] = obj
+        else:
+            prices[obj.id] = obj
+
+        if event.type.endswith('.deleted'):
+            deleted[obj.object].add(obj.id)
+        else:
+            deleted[obj.object].discard(obj.id)
+
+    product_result: SyncResult = sync_products(products.values()) if products else SyncResult()
+    price_result: SyncResult = sync_prices(prices.values()) if prices else SyncResult()
+
+    deactivated: int = 0
+
+    if deleted['product']:
+        deactivated += Product.objects.filter(psp_id__in=deleted['product'], active=True).update(active=False)
+
+    if deleted['price']:
+        deactivated += Price.objects.filter(psp_id__in=deleted['price'], active=True).update(active=False)
+
+    if deactivated:
+        CatalogueCache.invalidate()
+
+    return product_result, price_result
+
+
+def is_cursor_expired(cursor: SyncCursor) -> bool:
+    if cursor.date_synced is None:
+        return True
+
+    last_seen: datetime.datetime = cursor.event_created or cursor.date_synced
+
+    return last_seen < timezone.now() - MAX_CURSOR_AGE
+
+
+def resync_catalogue(cursor: SyncCursor) -> None:
+    """Synchronises the whole catalogue and moves the cursor to the latest catalogue event.
+
+    The latest event is fetched before the synchronisation, so events created during the
+    synchronisation are applied by the next incremental run.
+    """
+    latest_events: List = stripe.Event.list(limit=1, types=list(CATALOGUE_EVENT_TYPES)).data
+
+    with transaction.atomic():
+        sync_catalogue()
+
+        cursor.date_synced = timezone.now()
+        cursor.event_id = None
+        cursor.event_created = None
+
+        if latest_events:
+            cursor.event_id = latest_events[0].id
+            cursor.event_created = timestamp_to_datetime(latest_events[0].created)
+
+        cursor.save()
+
+
+def fetch_catalogue_events(cursor: SyncCursor, limit: int) -> List:
+    """Returns the oldest catalogue events after the cursor.
+
+    Args:
+        cursor (payments.models.SyncCursor): Sync cursor.
+        limit (int): Maximum number of events, up to ``PAGE_SIZE``.
+
+    Returns:
+        list: PSP events in chronological order.
+    """
+    types: List[str] = list(CATALOGUE_EVENT_TYPES)
+
+    if cursor.event_id is not None:
+        # ``ending_before`` returns the page of events right after the cursor, newest first.
+        events: List = stripe.Event.list(ending_before=cursor.event_id, limit=limit, types=types).data
+    else:
+        # There were no events during the last full synchronisation.
+        created: int = int(cursor.date_synced.timestamp())
+        events: List = list(iter_psp_list(stripe.Event, types=types, created={'gte': created}))[-limit:]
+
+    return list(reversed(events))
+
+
+def sync_catalogue_events(limit: int = PAGE_SIZE) -> int:
+    """Applies the next batch of catalogue events, falling back to the full synchronisation.
+
+    Args:
+        limit (int): Maximum number of events, up to ``PAGE_SIZE``.
+
+    Returns:
+        int: Number of applied events, 0 after the full synchronisation.
+    """
+    limit = min(limit, PAGE_SIZE)
+    cursor, _created = SyncCursor.objects.get_or_create(name=CATALOGUE_CURSOR_NAME)
+
+    if is_cursor_expired(cursor):
+        resync_catalogue(cursor)
+        return 0
+
+    try:
+        events: List = fetch_catalogue_events(cursor, limit)
+    except stripe.error.InvalidRequestError:
+        # Cursor event is not available anymore.
+        resync_catalogue(cursor)
+        return 0
+
+    if not events:
+        return 0
+
+    try:
+        with transaction.atomic():
+            apply_catalogue_events(events)
+
+            cursor.event_id = events[-1].id
+            cursor.event_created = timestamp_to_datetime(events[-1].created)
+            cursor.save(update_fields=['event_id', 'event_created'])
+    except KeyError:
+        # Price of the product created before the cursor, but missing locally.
+        resync_catalogue(cursor)
+        return 0
+
+    return len(events)
+
+
+def timestamp_to_datetime(timestamp: int) -> datetime.datetime:
+    return datetime.datetime.fromtimestamp(timestamp, tz=datetime.timezone.utc)
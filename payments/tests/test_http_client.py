@@ -0,0 +1,63 @@
+import threading
+from unittest.mock import Mock, patch
+
+from django.test import SimpleTestCase
+import requests
+import stripe
+
+from payments.http_client import get_operation_name, PooledRequestsClient
+from utils.metrics import get_latency_stats, reset_latency_counters
+
+
+class PooledRequestsClientCase(SimpleTestCase):
+    def setUp(self):
+        self.client = PooledRequestsClient(connect_timeout=2, read_timeout=5, max_pool_connections=4)
+        reset_latency_counters()
+        self.addCleanup(reset_latency_counters)
+
+    def request(self):
+        return self.client.request('post', 'https://api.stripe.com/v1/checkout/sessions', {}, 'mode=payment')
+
+    def test_request(self):
+        sessions = []
+
+        def request(session, method, url, **kwargs):
+            sessions.append(session)
+            self.assertEqual(kwargs['timeout'], (2, 5))
+            return Mock(content=b'{}', status_code=200, headers={})
+
+        with patch.object(requests.Session, 'request', autospec=True, side_effect=request):
+            self.assertEqual(self.request()[:2], (b'{}', 200))
+
+            thread = threading.Thread(target=self.request)
+            thread.start()
+            thread.join()
+
+        self.assertIs(sessions[0], sessions[1])
+        self.assertEqual(sessions[0].get_adapter('https://api.stripe.com')._pool_maxsize, 4)
+        self.assertEqual(get_latency_stats('stripe.')['stripe.POST /v1/checkout/sessions']['count'], 2)
+
+    def test_timeout(self):
+        with patch.object(requests.Session, 'request', side_effect=requests.exceptions.ReadTimeout()):
+            with self.assertRaises(stripe.error.APIConnectionError):
+                self.request()
+
+        self.assertEqual(get_latency_stats('stripe.')['stripe.POST /v1/checkout/sessions']['count'], 1)
+
+    def test_operation_name(self):
+        self.assertEqual(
+            get_operation_name('get', 'https://api.stripe.com/v1/checkout/sessions/cs_test_a1B2?expand[]=x'),
+            'GET /v1/checkout/sessions/{id}'
+        )
+        self.assertEqual(
+            get_operation_name('post', 'https://api.stripe.com/v1/payment_intents/pi_3MtwBwLkdIwHu7ix28a3tqPa/confirm'),
+            'POST /v1/payment_intents/{id}/confirm'
+        )
+        self.assertEqual(
+            get_operation_name('post', 'https://api.stripe.com/v1/billing_portal/sessions'),
+            'POST /v1/billing_portal/sessions'
+        )
+        self.assertEqual(
+            get_operation_name('get', 'https://api.stripe.com/v1/prices/price_1MoBy5LkdIwHu7ixZhnattbh'),
+            'GET /v1/prices/{id}'
+        )
@@ -0,0 +1,53 @@
+import datetime
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from accounts.models import DEFAULT_STORAGE_SIZE, User
+from payments.models import Product, Subscription
+
+
+class SweepSubscriptionsCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.product = Product.objects.create(
+            psp_id='prod_1',
+            active=True,
+            metadata={'storage_size': str(DEFAULT_STORAGE_SIZE * 10), 'max_file_size': '100'},
+            object_name='product',
+            product_type='service'
+        )
+        self.expired_user = User.objects.create_user('expired', email='expired@example.com')
+        self.active_user = User.objects.create_user('active', email='active@example.com')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for user, days in ((self.expired_user, -1), (self.active_user, 1)):
+                Subscription.objects.create(
+                    user=user,
+                    product=self.product,
+                    psp_id='sub_%s' % user.username,
+                    active=True,
+                    current_period_end=timezone.now() + datetime.timedelta(days=days)
+                )
+
+    def test_sweep(self):
+        self.assertEqual(self.expired_user.get_storage_size(), DEFAULT_STORAGE_SIZE * 10)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.expired_user.get_max_file_size(), 100)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(Subscription.sweep(batch_size=10), 1)
+
+        self.assertEqual(self.expired_user.get_storage_size(), DEFAULT_STORAGE_SIZE)
+        self.assertEqual(self.active_user.get_storage_size(), DEFAULT_STORAGE_SIZE * 10)
+        self.assertEqual(Subscription.sweep(batch_size=10), 0)
+
+    def test_update_evicts_entitlements(self):
+        self.assertEqual(self.expired_user.get_storage_size(), DEFAULT_STORAGE_SIZE * 10)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Subscription.objects.get(user=self.expired_user).delete()
+
+        self.assertEqual(self.expired_user.get_storage_size(), DEFAULT_STORAGE_SIZE)
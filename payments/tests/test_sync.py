@@ -0,0 +1,135 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.test import TestCase
+import stripe
+
+from payments.models import Price, Product, SyncCursor
+from payments.sync import CATALOGUE_CURSOR_NAME, sync_catalogue, sync_catalogue_events
+from standins.stripe_api import build_event, generate_catalogue
+
+
+def get_psp_catalogue(products_count, prices_per_product):
+    products, prices = generate_catalogue(products_count, prices_per_product)
+
+    return (
+        [stripe.util.convert_to_stripe_object(product) for product in products],
+        [stripe.util.convert_to_stripe_object(price) for price in prices],
+    )
+
+
+class SyncCatalogueCase(TestCase):
+    def sync(self, products, prices):
+        with patch('payments.sync.iter_psp_list', side_effect=lambda resource, **params: {
+            stripe.Product: products,
+            stripe.Price: prices,
+        }[resource]):
+            return sync_catalogue()
+
+    def test_sync(self):
+        products, prices = get_psp_catalogue(3, 2)
+
+        with self.assertNumQueries(5):
+            product_result, price_result = self.sync(products, prices)
+
+        self.assertEqual((product_result.inserted, product_result.updated, product_result.unchanged), (3, 0, 0))
+        self.assertEqual((price_result.inserted, price_result.updated, price_result.unchanged), (6, 0, 0))
+        self.assertEqual(Price.objects.get(psp_id=prices[0].id).product.psp_id, products[0].id)
+
+        products[0].name = 'Renamed'
+        prices[1].unit_amount = 1
+
+        product_result, price_result = self.sync(products, prices)
+
+        self.assertEqual((product_result.inserted, product_result.updated, product_result.unchanged), (0, 1, 2))
+        self.assertEqual((price_result.inserted, price_result.updated, price_result.unchanged), (0, 1, 5))
+        self.assertEqual(Product.objects.get(psp_id=products[0].id).name, 'Renamed')
+        self.assertEqual(Price.objects.get(psp_id=prices[1].id).unit_amount, 1)
+
+    def test_constant_queries(self):
+        products, prices = get_psp_catalogue(20, 4)
+
+        with self.assertNumQueries(5):
+            self.sync(products, prices)
+
+        with self.assertNumQueries(3):
+            self.sync(products, prices)
+
+
+def get_psp_event(event_type, obj):
+    return stripe.util.convert_to_stripe_object(build_event(event_type, obj))
+
+
+class SyncCatalogueEventsCase(TestCase):
+    def setUp(self):
+        self.products, self.prices = generate_catalogue(2, 1)
+        self.psp_products, self.psp_prices = get_psp_catalogue(2, 1)
+        self.latest_event = get_psp_event('product.created', self.products[-1])
+        patcher = patch('payments.sync.iter_psp_list', side_effect=lambda resource, **params: {
+            stripe.Product: self.psp_products,
+            stripe.Price: self.psp_prices,
+        }[resource])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def sync(self, events=(), error=None):
+        def list_events(**params):
+            if 'ending_before' not in params:
+                return SimpleNamespace(data=[self.latest_event])
+
+            if error is not None:
+                raise error
+
+            return SimpleNamespace(data=list(reversed(events)))
+
+        with patch('payments.sync.stripe.Event.list', side_effect=list_events):
+            return sync_catalogue_events()
+
+    def test_full_sync_without_cursor(self):
+        self.assertEqual(self.sync(), 0)
+
+        cursor = SyncCursor.objects.get(name=CATALOGUE_CURSOR_NAME)
+        self.assertEqual(cursor.event_id, self.latest_event.id)
+        self.assertIsNotNone(cursor.date_synced)
+        self.assertEqual(Price.objects.count(), 2)
+
+    def test_apply_events(self):
+        self.sync()
+
+        renamed = dict(self.products[0], name='Renamed')
+        new_price = dict(self.prices[0], id='price_new', unit_amount=1)
+        events = [
+            get_psp_event('product.updated', dict(self.products[0], name='Old')),
+            get_psp_event('product.updated', renamed),
+            get_psp_event('price.created', new_price),
+            get_psp_event('price.deleted', self.prices[1]),
+        ]
+
+        with self.assertNumQueries(10):
+            self.assertEqual(self.sync(events), 4)
+
+        self.assertEqual(Product.objects.get(psp_id=renamed['id']).name, 'Renamed')
+        self.assertEqual(Price.objects.get(psp_id='price_new').product.psp_id, renamed['id'])
+        self.assertFalse(Price.objects.get(psp_id=self.prices[1]['id']).active)
+        self.assertEqual(SyncCursor.objects.get(name=CATALOGUE_CURSOR_NAME).event_id, events[-1].id)
+        self.assertEqual(self.sync(), 0)
+
+    def test_resync_on_expired_cursor(self):
+        self.sync()
+        Product.objects.all().delete()
+
+        self.latest_event = get_psp_event('price.updated', self.prices[0])
+        self.assertEqual(self.sync(error=stripe.error.InvalidRequestError('No such event', 'ending_before')), 0)
+
+        self.assertEqual(Product.objects.count(), 2)
+        self.assertEqual(SyncCursor.objects.get(name=CATALOGUE_CURSOR_NAME).event_id, self.latest_event.id)
+
+    def test_resync_on_unknown_product(self):
+        self.sync()
+
+        product = dict(self.products[0], id='prod_unknown')
+        self.psp_products.append(stripe.util.convert_to_stripe_object(product))
+        events = [get_psp_event('price.created', dict(self.prices[0], id='price_new', product=product['id']))]
+
+        self.assertEqual(self.sync(events), 0)
+        self.assertTrue(Product.objects.filter(psp_id='prod_unknown').exists())
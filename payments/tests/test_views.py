@@ -0,0 +1,60 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from payments.models import Price, Product
+
+
+class ProductsViewCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('payments:products')
+
+        for idx in range(3):
+            product = Product.objects.create(
+                psp_id='prod_%d' % idx,
+                active=idx != 2,
+                name='Product %d' % idx,
+                metadata={},
+                object_name='product',
+                product_type='service'
+            )
+            Price.objects.create(
+                psp_id='price_%d' % idx,
+                product=product,
+                active=True,
+                billing_scheme='per_unit',
+                currency='USD',
+                metadata={},
+                object_name='price',
+                payment_type='one_time',
+                unit_amount=100,
+                unit_amount_decimal='100'
+            )
+
+    def test_get_from_cache(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+
+        self.assertContains(response, 'Product 0')
+        self.assertNotContains(response, 'Product 2')
+
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+
+    def test_invalidate_on_change(self):
+        self.client.get(self.url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            product = Product.objects.get(psp_id='prod_0')
+            product.name = 'Renamed'
+            product.save()
+
+        self.assertContains(self.client.get(self.url), 'Renamed')
+
+    def test_inactive_product(self):
+        product = Product.objects.get(psp_id='prod_2')
+
+        response = self.client.get(reverse('payments:product_prices', kwargs={'pk': product.id}))
+
+        self.assertEqual(response.status_code, 403)
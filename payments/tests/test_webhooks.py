@@ -0,0 +1,137 @@
+import datetime
+
+from django.test import override_settings, TestCase
+from django.utils import timezone
+import stripe
+
+from payments.enums import WebhookEventStatus
+from payments.models import WebhookEvent
+from standins.stripe_api import build_event, dump_event, sign_payload
+
+
+ENDPOINT_SECRET = 'whsec_test'
+
+
+def receive(event_type, obj, created):
+    event = build_event(event_type, obj, created=created)
+    WebhookEvent.receive(stripe.util.convert_to_stripe_object(event))
+
+    return event['id']
+
+
+@override_settings(STRIPE_ENDPOINT_SECRET=ENDPOINT_SECRET)
+class StripeWebhookCase(TestCase):
+    def test_duplicates_are_acknowledged(self):
+        payload = dump_event(build_event('invoice.payment_succeeded', {'id': 'in_1', 'customer': 'cus_1'}))
+
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                response = self.client.post(
+                    '/api/v1/webhooks/stripe/',
+                    payload,
+                    content_type='application/json',
+                    HTTP_STRIPE_SIGNATURE=sign_payload(payload, ENDPOINT_SECRET)
+                )
+
+            self.assertEqual(response.status_code, 200)
+
+        event = WebhookEvent.objects.get()
+        self.assertEqual(event.ordering_key, 'cus_1')
+        self.assertEqual(event.status, WebhookEventStatus.PENDING.value)
+
+    def test_invalid_signature(self):
+        payload = dump_event(build_event('invoice.payment_succeeded', {'id': 'in_1', 'customer': 'cus_1'}))
+        response = self.client.post(
+            '/api/v1/webhooks/stripe/',
+            payload,
+            content_type='application/json',
+            HTTP_STRIPE_SIGNATURE=sign_payload(payload, 'whsec_other')
+        )
+
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('message', response.json())
+        self.assertFalse(WebhookEvent.objects.exists())
+
+
+class ProcessWebhookEventsCase(TestCase):
+    def setUp(self):
+        self.processed = []
+        self.failing = set()
+
+    def handler(self, event):
+        if event.id in self.failing:
+            raise ValueError(event.id)
+
+        self.processed.append(event.id)
+
+    def test_order_per_customer(self):
+        first = receive('checkout.session.completed', {'id': 'cs_1', 'customer': 'cus_1'}, 100)
+        second = receive('invoice.payment_succeeded', {'id': 'in_1', 'customer': 'cus_1'}, 101)
+        third = receive('invoice.paid', {'id': 'in_3', 'customer': 'cus_1'}, 102)
+        other = receive('invoice.payment_succeeded', {'id': 'in_2', 'customer': 'cus_2'}, 103)
+        self.failing.add(second)
+
+        self.assertEqual(WebhookEvent.process_pending(self.handler), 3)
+        self.assertEqual(self.processed, [first, other])
+
+        failed = WebhookEvent.objects.get(event_id=second)
+        self.assertEqual((failed.status, failed.attempts), (WebhookEventStatus.PENDING.value, 1))
+        self.assertIn('ValueError', failed.last_error)
+        self.assertGreater(failed.date_next_attempt, timezone.now())
+
+        # Retry isn't due, the following event of the customer waits.
+        self.failing.clear()
+        self.assertEqual(WebhookEvent.process_pending(self.handler), 0)
+
+        WebhookEvent.objects.filter(event_id=second).update(date_next_attempt=timezone.now())
+
+        self.assertEqual(WebhookEvent.process_pending(self.handler), 2)
+        self.assertEqual(self.processed, [first, other, second, third])
+        self.assertFalse(WebhookEvent.objects.exclude(status=WebhookEventStatus.DONE.value).exists())
+
+    def test_blocked_customer_doesnt_stall_others(self):
+        blocking = receive('invoice.payment_failed', {'id': 'in_0', 'customer': 'cus_1'}, 100)
+        waiting = [
+            receive('invoice.payment_succeeded', {'id': 'in_%d' % idx, 'customer': 'cus_1'}, 100 + idx)
+            for idx in range(1, 4)
+        ]
+        other = receive('invoice.payment_succeeded', {'id': 'in_9', 'customer': 'cus_2'}, 200)
+        WebhookEvent.objects.filter(event_id=blocking).update(
+            attempts=1,
+            date_next_attempt=timezone.now() + datetime.timedelta(hours=1)
+        )
+
+        self.assertEqual(WebhookEvent.process_pending(self.handler, batch_size=2), 1)
+        self.assertEqual(self.processed, [other])
+        self.assertEqual(
+            WebhookEvent.objects.filter(event_id__in=waiting, status=WebhookEventStatus.PENDING.value).count(),
+            3
+        )
+
+    def test_subscription_update_doesnt_hold_checkout(self):
+        # Subscription is updated before the checkout creates it locally.
+        updated = receive('customer.subscription.updated', {'id': 'sub_1', 'customer': 'cus_1'}, 100)
+        completed = receive('checkout.session.completed', {'id': 'cs_1', 'customer': 'cus_1'}, 101)
+        self.failing.add(updated)
+
+        self.assertEqual(WebhookEvent.process_pending(self.handler), 2)
+        self.assertEqual(self.processed, [completed])
+        self.assertEqual(WebhookEvent.objects.get(event_id=updated).ordering_key, 'sub_1')
+
+        self.failing.clear()
+        WebhookEvent.objects.filter(event_id=updated).update(date_next_attempt=timezone.now())
+
+        self.assertEqual(WebhookEvent.process_pending(self.handler), 1)
+        self.assertEqual(self.processed, [completed, updated])
+
+    def test_dead_event(self):
+        event_id = receive('invoice.payment_succeeded', {'id': 'in_1', 'customer': 'cus_1'}, 100)
+        self.failing.add(event_id)
+
+        for _ in range(WebhookEvent.MAX_ATTEMPTS):
+            WebhookEvent.objects.update(date_next_attempt=timezone.now())
+            WebhookEvent.process_pending(self.handler)
+
+        event = WebhookEvent.objects.get()
+        self.assertEqual((event.status, event.attempts), (WebhookEventStatus.DEAD.value, WebhookEvent.MAX_ATTEMPTS))
+        self.assertEqual(WebhookEvent.process_pending(self.handler), 0)
@@ -8,21 +8,20 @@ from django.views import View
 
 from base.exceptions import FatalSignatureError, SignatureExpiredError
 from base.utils import decode_jwt_signature
-from payments.models import Price, Product
+from payments.caches import CatalogueCache
+from payments.models import Price
 
 
 class ProductsView(View):
     template_name = 'payments/products.html'
 
     def get(self, request, *args, **kwargs):
-        # TODO: Don't do like this
-        products = Product.objects.all()
-
         return render(
             request,
             template_name=self.template_name,
             context={
-                'products': products,
+                'products': CatalogueCache.get_products(),
+                'catalogue_version': CatalogueCache.get_version(),
             }
         )
 
@@ -36,9 +35,9 @@ class ProductsView(View):
         if product_id is None:
             raise PermissionDenied()
 
-        try:
-            product = Product.objects.get(id=product_id)
-        except Product.DoesNotExist:
+        product = CatalogueCache.get_product(product_id)
+
+        if product is None:
             raise PermissionDenied()
 
         return redirect('payments:product_prices', pk=product.id)
@@ -69,9 +68,10 @@ class ProductView(View):
             product_id = kwargs['pk']
         except KeyError:
             raise PermissionDenied()
-        try:
-            product = Product.objects.get(id=product_id)
-        except Product.DoesNotExist:
+
+        product = CatalogueCache.get_product(product_id)
+
+        if product is None:
             raise PermissionDenied()
 
         return render(
@@ -79,6 +79,7 @@ class ProductView(View):
             template_name=self.template_name,
             context={
                 'product': product,
+                'catalogue_version': CatalogueCache.get_version(),
             }
         )
 
@@ -87,9 +88,9 @@ class ProductView(View):
         if price_id is None:
             raise PermissionDenied()
 
-        try:
-            price = Price.objects.get(id=price_id)
-        except Price.DoesNotExist:
+        price = CatalogueCache.get_price(price_id)
+
+        if price is None:
             raise PermissionDenied()
 
         payment_session = price.get_payment_session(request.user)
@@ -109,7 +110,12 @@ class PaymentSuccessView(View):
         except (FatalSignatureError, SignatureExpiredError):
             raise PermissionDenied()
 
-        price = Price.objects.get(id=payload.get('price_id'))
+        # Price can be deactivated after the payment, so it's not taken from the catalogue.
+        try:
+            price = Price.objects.select_related('product').get(id=payload.get('price_id'))
+        except Price.DoesNotExist:
+            raise PermissionDenied()
+
         return render(
             request,
             template_name=self.template_name,
@@ -0,0 +1,47 @@
+import json
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from standins.stripe_api import build_event, dump_event, sign_payload
+
+
+class Command(BaseCommand):
+    help = 'Sends Stripe webhook event signed with STRIPE_ENDPOINT_SECRET, the same way Stripe does.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('event_type', help='Event type, e.g. checkout.session.completed.')
+        parser.add_argument('--object', default='{}', help='JSON of the event object.')
+        parser.add_argument('--url', default=None, help='Webhook URL, project Stripe webhook by default.')
+        parser.add_argument('--number', type=int, default=1, help='Number of events to send.')
+
+    def handle(self, *args, **options):
+        try:
+            obj: dict = json.loads(options['object'])
+        except ValueError as e:
+            raise CommandError('Invalid object JSON: %s' % e)
+
+        url: str = options['url'] or '%s%s' % (settings.BF_STANDINS_URL, reverse('stripe_webhook'))
+
+        for _ in range(options['number']):
+            payload: str = dump_event(build_event(options['event_type'], obj))
+            request = Request(
+                url,
+                data=payload.encode('utf-8'),
+                headers={
+                    'Content-Type': 'application/json',
+                    'Stripe-Signature': sign_payload(payload, settings.STRIPE_ENDPOINT_SECRET),
+                },
+                method='POST'
+            )
+
+            try:
+                with urlopen(request) as response:
+                    status: int = response.status
+            except HTTPError as e:
+                status: int = e.code
+
+            self.stdout.write('%s %s' % (options['event_type'], status))
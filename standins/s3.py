@@ -0,0 +1,232 @@
+"""File system backed subset of S3 API.
+
+Objects are stored as files under ``<root>/<bucket>/objects/``, metadata (content type and ETag)
+is stored next to them under ``<root>/<bucket>/meta/``. Multipart uploads keep parts under
+``<root>/<bucket>/uploads/<upload id>/`` until completed or aborted.
+"""
+import datetime
+import hashlib
+import json
+import os
+from pathlib import Path
+import shutil
+from typing import BinaryIO, Iterable, List, Optional
+from uuid import uuid4
+from xml.etree import ElementTree
+
+from django.core.files.storage import FileSystemStorage
+from django.utils._os import safe_join
+
+
+XML_NAMESPACE: str = 'http://s3.amazonaws.com/doc/2006-03-01/'
+DEFAULT_CONTENT_TYPE: str = 'binary/octet-stream'
+COPY_BUFFER_SIZE: int = 1024 * 1024
+
+
+class NoSuchKey(Exception):
+    """Object doesn't exist"""
+
+
+class NoSuchUpload(Exception):
+    """Multipart upload doesn't exist"""
+
+
+class InvalidPart(Exception):
+    """Multipart upload part doesn't exist"""
+
+
+class ObjectStore:
+    """Objects of one bucket.
+
+    Args:
+        root (str): Directory of all buckets.
+        bucket (str): Bucket name.
+    """
+
+    def __init__(self, root: str, bucket: str):
+        self.bucket: str = bucket
+        self.path: str = safe_join(root, bucket)
+        self.objects = FileSystemStorage(location=os.path.join(self.path, 'objects'))
+
+    def get_object_path(self, key: str) -> str:
+        return safe_join(self.path, 'objects', key)
+
+    def get_meta_path(self, key: str) -> str:
+        return safe_join(self.path, 'meta', key + '.json')
+
+    def get_upload_path(self, upload_id: str) -> str:
+        return safe_join(self.path, 'uploads', upload_id)
+
+    def head(self, key: str) -> dict:
+        """Returns object metadata.
+
+        Args:
+            key (str): Object key.
+
+        Returns:
+            dict: ``size``, ``content_type``, ``etag`` and ``last_modified`` of the object.
+
+        Raises:
+            standins.s3.NoSuchKey: If object doesn't exist.
+        """
+        try:
+            stat = os.stat(self.get_object_path(key))
+            with open(self.get_meta_path(key)) as meta_file:
+                meta: dict = json.load(meta_file)
+        except FileNotFoundError:
+            raise NoSuchKey()
+
+        meta['size'] = stat.st_size
+        meta['last_modified'] = datetime.datetime.fromtimestamp(stat.st_mtime, tz=datetime.timezone.utc)
+
+        return meta
+
+    def put(self, key: str, stream: BinaryIO, content_type: Optional[str] = None) -> str:
+        """Stores object.
+
+        Args:
+            key (str): Object key.
+            stream (BinaryIO): Object content.
+            content_type (str, optional): Content type.
+
+        Returns:
+            str: ETag of the object.
+        """
+        return self._write(key, [stream], content_type, multipart=False)
+
+    def delete(self, key: str) -> None:
+        """Deletes object, deleting missing object is not an error as in S3."""
+        for path in (self.get_object_path(key), self.get_meta_path(key)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def create_multipart_upload(self, key: str, content_type: Optional[str] = None) -> str:
+        upload_id: str = uuid4().hex
+        upload_path: str = self.get_upload_path(upload_id)
+        os.makedirs(upload_path)
+
+        with open(os.path.join(upload_path, 'upload.json'), 'w') as upload_file:
+            json.dump({'key': key, 'content_type': content_type}, upload_file)
+
+        return upload_id
+
+    def upload_part(self, key: str, upload_id: str, part_number: int, stream: BinaryIO) -> str:
+        upload: dict = self._get_upload(key, upload_id)
+        md5 = hashlib.md5()
+
+        with open(os.path.join(upload['path'], '%05d' % part_number), 'wb') as part_file:
+            _copy(stream, part_file, md5)
+
+        return '"%s"' % md5.hexdigest()
+
+    def complete_multipart_upload(self, key: str, upload_id: str, part_numbers: Iterable[int]) -> str:
+        upload: dict = self._get_upload(key, upload_id)
+        part_paths: List[str] = [os.path.join(upload['path'], '%05d' % part_number) for part_number in part_numbers]
+
+        if not all(os.path.exists(part_path) for part_path in part_paths):
+            raise InvalidPart()
+
+        part_files: list = [open(part_path, 'rb') for part_path in part_paths]
+
+        try:
+            etag: str = self._write(key, part_files, upload['content_type'], multipart=True)
+        finally:
+            for part_file in part_files:
+                part_file.close()
+
+        shutil.rmtree(upload['path'])
+
+        return etag
+
+    def abort_multipart_upload(self, key: str, upload_id: str) -> None:
+        shutil.rmtree(self._get_upload(key, upload_id)['path'])
+
+    def _get_upload(self, key: str, upload_id: str) -> dict:
+        upload_path: str = self.get_upload_path(upload_id)
+
+        try:
+            with open(os.path.join(upload_path, 'upload.json')) as upload_file:
+                upload: dict = json.load(upload_file)
+        except FileNotFoundError:
+            raise NoSuchUpload()
+
+        if upload['key'] != key:
+            raise NoSuchUpload()
+
+        upload['path'] = upload_path
+
+        return upload
+
+    def _write(self, key: str, streams: List[BinaryIO], content_type: Optional[str], multipart: bool) -> str:
+        object_path: str = self.get_object_path(key)
+        meta_path: str = self.get_meta_path(key)
+        tmp_path: str = '%s.%s.tmp' % (object_path, uuid4().hex)
+        part_digests: List[bytes] = []
+
+        Path(object_path).parent.mkdir(parents=True, exist_ok=True)
+        Path(meta_path).parent.mkdir(parents=True, exist_ok=True)
+
+        with open(tmp_path, 'wb') as object_file:
+            for stream in streams:
+                part_md5 = hashlib.md5()
+                _copy(stream, object_file, part_md5)
+                part_digests.append(part_md5.digest())
+
+        if multipart:
+            # S3 ETag of the multipart object is MD5 of the part MD5s with the number of parts.
+            etag: str = '"%s-%d"' % (hashlib.md5(b''.join(part_digests)).hexdigest(), len(part_digests))
+        else:
+            etag: str = '"%s"' % part_digests[0].hex()
+
+        os.replace(tmp_path, object_path)
+
+        with open(meta_path, 'w') as meta_file:
+            json.dump({'content_type': content_type or DEFAULT_CONTENT_TYPE, 'etag': etag}, meta_file)
+
+        return etag
+
+
+def _copy(source: BinaryIO, destination: BinaryIO, md5) -> None:
+    while True:
+        chunk: bytes = source.read(COPY_BUFFER_SIZE)
+
+        if not chunk:
+            break
+
+        md5.update(chunk)
+        destination.write(chunk)
+
+
+def to_xml(root_tag: str, children: Iterable[tuple]) -> bytes:
+    """Renders S3 XML response.
+
+    Args:
+        root_tag (str): Root element tag.
+        children (Iterable[tuple]): Pairs of tag and text, text can be a list of pairs for nested elements.
+
+    Returns:
+        bytes: XML document.
+    """
+    root = ElementTree.Element(root_tag, xmlns=XML_NAMESPACE)
+    _append_children(root, children)
+
+    return ElementTree.tostring(root, encoding='utf-8', xml_declaration=True)
+
+
+def _append_children(parent, children: Iterable[tuple]) -> None:
+    for tag, value in children:
+        element = ElementTree.SubElement(parent, tag)
+
+        if isinstance(value, list):
+            _append_children(element, value)
+        else:
+            element.text = str(value)
+
+
+def iter_xml_texts(body: bytes, tag: str) -> Iterable[str]:
+    """Yields texts of the XML elements with the tag ignoring namespaces."""
+    for element in ElementTree.fromstring(body).iter():
+        if element.tag.rsplit('}', 1)[-1] == tag:
+            yield element.text or ''
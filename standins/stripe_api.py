@@ -0,0 +1,203 @@
+"""Subset of Stripe API used by the project.
+
+Catalogue is generated deterministically, so every worker process serves the same products and
+prices without shared state. Size of the catalogue is configured with
+``settings.BF_STANDINS_STRIPE_PRODUCTS`` and ``settings.BF_STANDINS_STRIPE_PRICES_PER_PRODUCT``.
+"""
+import hashlib
+import hmac
+import json
+import time
+from typing import List, Optional, Tuple
+from uuid import uuid4
+
+
+DEFAULT_LIST_LIMIT: int = 10
+MAX_LIST_LIMIT: int = 100
+# Stripe creation timestamp of the catalogue objects.
+CATALOGUE_CREATED: int = 1672531200
+STORAGE_SIZES: Tuple[int, ...] = (
+    10 * 1024 ** 3,
+    100 * 1024 ** 3,
+    1024 ** 4,
+)
+
+
+class InvalidRequest(Exception):
+    """Request parameters are not valid"""
+
+
+def generate_catalogue(products_count: int, prices_per_product: int) -> Tuple[List[dict], List[dict]]:
+    """Generates products and prices.
+
+    Args:
+        products_count (int): Number of products.
+        prices_per_product (int): Number of prices of each product.
+
+    Returns:
+        tuple: Products and prices, prices have ids of the products in ``product`` field.
+    """
+    products: List[dict] = []
+    prices: List[dict] = []
+
+    for product_idx in range(products_count):
+        product_id: str = 'prod_standin%06d' % product_idx
+        storage_size: int = STORAGE_SIZES[product_idx % len(STORAGE_SIZES)]
+        products.append({
+            'id': product_id,
+            'object': 'product',
+            'active': True,
+            'created': CATALOGUE_CREATED + product_idx,
+            'description': 'Stand-in product %d' % product_idx,
+            'livemode': False,
+            'metadata': {
+                'storage_size': str(storage_size),
+                'max_file_size': str(storage_size // 10),
+            },
+            'name': 'Product %d' % product_idx,
+            'type': 'service',
+            'updated': CATALOGUE_CREATED + product_idx,
+        })
+
+        for price_idx in range(prices_per_product):
+            recurring: bool = price_idx % 2 == 0
+            unit_amount: int = 100 * (product_idx + 1) * (price_idx + 1)
+            prices.append({
+                'id': 'price_standin%06d%03d' % (product_idx, price_idx),
+                'object': 'price',
+                'active': True,
+                'billing_scheme': 'per_unit',
+                'created': CATALOGUE_CREATED + product_idx,
+                'currency': 'usd',
+                'livemode': False,
+                'metadata': {},
+                'product': product_id,
+                'recurring': {'interval': 'month', 'interval_count': 1} if recurring else None,
+                'type': 'recurring' if recurring else 'one_time',
+                'unit_amount': unit_amount,
+                'unit_amount_decimal': str(unit_amount),
+            })
+
+    return products, prices
+
+
+def paginate(objects: List[dict], url: str, limit: Optional[str], starting_after: Optional[str]) -> dict:
+    """Returns Stripe list object.
+
+    Args:
+        objects (list): All objects ordered as Stripe returns them.
+        url (str): List URL.
+        limit (str, optional): Page size.
+        starting_after (str, optional): Id of the last object of the previous page.
+
+    Returns:
+        dict: Stripe list object.
+
+    Raises:
+        standins.stripe_api.InvalidRequest: If limit or cursor are not valid.
+    """
+    try:
+        limit: int = int(limit) if limit else DEFAULT_LIST_LIMIT
+    except ValueError:
+        raise InvalidRequest('Invalid integer: %s' % limit)
+
+    if not 1 <= limit <= MAX_LIST_LIMIT:
+        raise InvalidRequest('This value must be between 1 and %d' % MAX_LIST_LIMIT)
+
+    start: int = 0
+
+    if starting_after:
+        ids: List[str] = [obj['id'] for obj in objects]
+
+        try:
+            start = ids.index(starting_after) + 1
+        except ValueError:
+            raise InvalidRequest('No such object: %s' % starting_after)
+
+    return {
+        'object': 'list',
+        'data': objects[start:start + limit],
+        'has_more': start + limit < len(objects),
+        'url': url,
+    }
+
+
+def create_checkout_session(params: dict) -> dict:
+    """Returns checkout session object.
+
+    Args:
+        params (dict): Session parameters, the same as Stripe receives, nested form fields are not decoded,
+            only top-level fields and ``metadata[...]`` are used.
+
+    Returns:
+        dict: Checkout session object.
+    """
+    session_id: str = 'cs_test_%s' % uuid4().hex
+    metadata: dict = {
+        key[len('metadata['):-1]: value for key, value in params.items() if key.startswith('metadata[')
+    }
+
+    return {
+        'id': session_id,
+        'object': 'checkout.session',
+        'cancel_url': params.get('cancel_url'),
+        'customer': params.get('customer'),
+        'livemode': False,
+        'metadata': metadata,
+        'mode': params.get('mode', 'payment'),
+        'payment_status': 'unpaid',
+        'status': 'open',
+        'subscription': None,
+        'success_url': params.get('success_url'),
+        'url': None,
+    }
+
+
+def build_event(event_type: str, obj: dict, created: Optional[int] = None) -> dict:
+    """Returns Stripe event object.
+
+    Args:
+        event_type (str): Event type, e.g. ``checkout.session.completed``.
+        obj (dict): Event object.
+        created (int, optional): Creation timestamp, current time by default.
+
+    Returns:
+        dict: Event object.
+    """
+    return {
+        'id': 'evt_%s' % uuid4().hex,
+        'object': 'event',
+        'api_version': '2022-11-15',
+        'created': int(time.time()) if created is None else created,
+        'data': {'object': obj},
+        'livemode': False,
+        'pending_webhooks': 1,
+        'type': event_type,
+    }
+
+
+def sign_payload(payload: str, secret: str, timestamp: Optional[int] = None) -> str:
+    """Returns ``Stripe-Signature`` header value the same way Stripe signs webhook events.
+
+    Args:
+        payload (str): Request body.
+        secret (str): Webhook endpoint secret.
+        timestamp (int, optional): Signature timestamp, current time by default.
+
+    Returns:
+        str: Header value.
+    """
+    if timestamp is None:
+        timestamp = int(time.time())
+
+    signature: str = hmac.new(
+        secret.encode('utf-8'),
+        msg=('%d.%s' % (timestamp, payload)).encode('utf-8'),
+        digestmod=hashlib.sha256
+    ).hexdigest()
+
+    return 't=%d,v1=%s' % (timestamp, signature)
+
+
+def dump_event(event: dict) -> str:
+    return json.dumps(event, separators=(',', ':'))
@@ -0,0 +1,63 @@
+import json
+
+from django.test import LiveServerTestCase, override_settings
+import stripe
+
+from standins.stripe_api import build_event, dump_event, sign_payload
+
+
+ENDPOINT_SECRET = 'whsec_standin'
+
+
+@override_settings(
+    ROOT_URLCONF='standins.tests.urls',
+    BF_STANDINS_STRIPE_PRODUCTS=3,
+    BF_STANDINS_STRIPE_PRICES_PER_PRODUCT=2,
+    STRIPE_ENDPOINT_SECRET=ENDPOINT_SECRET
+)
+class StripeStandinCase(LiveServerTestCase):
+    """Stripe stand-in must be usable with stripe library."""
+
+    def setUp(self):
+        api_base = stripe.api_base
+        stripe.api_base = '%s/standins/stripe' % self.live_server_url
+        self.addCleanup(setattr, stripe, 'api_base', api_base)
+
+    def test_list(self):
+        prices = stripe.Price.list(expand=['data.product'], limit=4)
+
+        self.assertEqual(len(prices.data), 4)
+        self.assertTrue(prices.has_more)
+        self.assertEqual(prices.data[0].product.id, 'prod_standin000000')
+        self.assertEqual(len(list(prices.auto_paging_iter())), 6)
+
+        products = stripe.Product.list(limit=100)
+        self.assertEqual([product.metadata.storage_size for product in products.data][0], str(10 * 1024 ** 3))
+
+    def test_checkout_session(self):
+        session = stripe.checkout.Session.create(
+            line_items=[{'price': 'price_standin000000000', 'quantity': 1}],
+            mode='subscription',
+            success_url='http://localhost/success/',
+            cancel_url='http://localhost/cancel/',
+            metadata={'user_id': 1}
+        )
+
+        self.assertEqual(session.mode, 'subscription')
+        self.assertEqual(session.metadata.user_id, '1')
+        self.assertTrue(session.url.startswith(self.live_server_url))
+
+    def test_signed_event(self):
+        payload = dump_event(build_event('invoice.payment_succeeded', {'id': 'in_1'}))
+        event = stripe.Webhook.construct_event(payload, sign_payload(payload, ENDPOINT_SECRET), ENDPOINT_SECRET)
+
+        self.assertEqual(event.type, 'invoice.payment_succeeded')
+        self.assertEqual(event.data.object.id, json.loads(payload)['data']['object']['id'])
+
+        response = self.client.post(
+            '/api/v1/webhooks/stripe/',
+            payload,
+            content_type='application/json',
+            HTTP_STRIPE_SIGNATURE=sign_payload(payload, ENDPOINT_SECRET)
+        )
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,9 @@
+from django.urls import include, path
+
+from api.v1.views import StripeWebhook
+
+
+urlpatterns = [
+    path('standins/', include('standins.urls')),
+    path('api/v1/webhooks/stripe/', StripeWebhook.as_view(), name='stripe_webhook'),
+]
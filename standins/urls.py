@@ -0,0 +1,25 @@
+from django.urls import path, re_path
+
+from standins.views import (
+    S3BucketView,
+    S3ObjectView,
+    StripeCheckoutSessionsView,
+    StripeCheckoutView,
+    StripeEventsView,
+    StripePricesView,
+    StripeProductsView
+)
+
+
+app_name = 'standins'
+
+
+urlpatterns = [
+    re_path(r'^s3/(?P<bucket>[^/]+)/?$', S3BucketView.as_view(), name='s3_bucket'),
+    path('s3/<str:bucket>/<path:key>', S3ObjectView.as_view(), name='s3_object'),
+    path('stripe/v1/products', StripeProductsView.as_view(), name='stripe_products'),
+    path('stripe/v1/prices', StripePricesView.as_view(), name='stripe_prices'),
+    path('stripe/v1/events', StripeEventsView.as_view(), name='stripe_events'),
+    path('stripe/v1/checkout/sessions', StripeCheckoutSessionsView.as_view(), name='stripe_checkout_sessions'),
+    path('stripe/checkout/<str:session_id>/', StripeCheckoutView.as_view(), name='stripe_checkout'),
+]
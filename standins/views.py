@@ -0,0 +1,349 @@
+import base64
+import binascii
+import datetime
+from functools import lru_cache
+from http import HTTPStatus
+import json
+from typing import List, Tuple
+
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.decorators import method_decorator
+from django.utils.http import http_date
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+
+from standins.s3 import InvalidPart, iter_xml_texts, NoSuchKey, NoSuchUpload, ObjectStore, to_xml
+from standins.stripe_api import create_checkout_session, generate_catalogue, InvalidRequest, paginate
+from utils.streams import iter_storage_range, parse_range_header, RangeNotSatisfiable
+
+
+ISO8601: str = '%Y-%m-%dT%H:%M:%SZ'
+
+
+def s3_error(code: str, message: str, status: int) -> HttpResponse:
+    return HttpResponse(
+        to_xml('Error', [('Code', code), ('Message', message)]),
+        status=status,
+        content_type='application/xml'
+    )
+
+
+def get_object_store(bucket: str) -> ObjectStore:
+    return ObjectStore(settings.BF_STANDINS_ROOT, bucket)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class S3BucketView(View):
+    """Bucket level S3 operations: browser-based POST upload and ``DeleteObjects``.
+
+    Note:
+        Signatures are not verified, POST policy is checked for expiration and content length only.
+    """
+    http_method_names = ['post']
+
+    def post(self, request, *args, **kwargs):
+        store: ObjectStore = get_object_store(kwargs['bucket'])
+
+        if 'delete' in request.GET:
+            return self.delete_objects(request, store)
+
+        return self.post_object(request, store)
+
+    @staticmethod
+    def delete_objects(request, store: ObjectStore):
+        keys: List[str] = list(iter_xml_texts(request.body, 'Key'))
+
+        for key in keys:
+            store.delete(key)
+
+        return HttpResponse(
+            to_xml('DeleteResult', [('Deleted', [('Key', key)]) for key in keys]),
+            content_type='application/xml'
+        )
+
+    def post_object(self, request, store: ObjectStore):
+        try:
+            upload = request.FILES['file']
+            key: str = request.POST['key']
+        except KeyError:
+            return s3_error('InvalidArgument', 'Bucket POST must contain a file and a key', HTTPStatus.BAD_REQUEST)
+
+        key = key.replace('${filename}', upload.name)
+
+        try:
+            min_size, max_size, expiration = self.parse_policy(request.POST.get('policy', ''))
+        except ValueError:
+            return s3_error('InvalidPolicyDocument', 'Invalid Policy', HTTPStatus.BAD_REQUEST)
+
+        if expiration is not None and expiration < datetime.datetime.utcnow():
+            return s3_error('AccessDenied', 'Invalid according to Policy: Policy expired.', HTTPStatus.FORBIDDEN)
+
+        if upload.size < min_size:
+            return s3_error('EntityTooSmall', 'Your proposed upload is smaller than the minimum allowed size',
+                            HTTPStatus.BAD_REQUEST)
+
+        if max_size is not None and upload.size > max_size:
+            return s3_error('EntityTooLarge', 'Your proposed upload exceeds the maximum allowed size',
+                            HTTPStatus.BAD_REQUEST)
+
+        etag: str = store.put(key, upload, request.POST.get('Content-Type'))
+
+        response = HttpResponse(status=HTTPStatus.NO_CONTENT)
+        response['ETag'] = etag
+
+        return response
+
+    @staticmethod
+    def parse_policy(policy: str) -> Tuple[int, int, datetime.datetime]:
+        """Returns content length range and expiration of the POST policy.
+
+        Args:
+            policy (str): Base64 encoded policy.
+
+        Returns:
+            tuple: Minimum size, maximum size or None and expiration or None.
+
+        Raises:
+            ValueError: If policy can't be decoded.
+        """
+        if not policy:
+            return 0, None, None
+
+        try:
+            document: dict = json.loads(base64.b64decode(policy))
+        except binascii.Error:
+            raise ValueError()
+
+        min_size, max_size = 0, None
+
+        for condition in document.get('conditions', []):
+            if isinstance(condition, list) and condition and condition[0] == 'content-length-range':
+                min_size, max_size = int(condition[1]), int(condition[2])
+
+        expiration = document.get('expiration')
+
+        if expiration is not None:
+            expiration = datetime.datetime.strptime(expiration[:19] + 'Z', ISO8601)
+
+        return min_size, max_size, expiration
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class S3ObjectView(View):
+    """Object level S3 operations: ``HeadObject``, ``GetObject`` with ranges, ``PutObject``,
+    ``DeleteObject`` and multipart uploads.
+    """
+    http_method_names = ['get', 'head', 'put', 'post', 'delete']
+
+    def head(self, request, *args, **kwargs):
+        store: ObjectStore = get_object_store(kwargs['bucket'])
+
+        try:
+            meta: dict = store.head(kwargs['key'])
+        except NoSuchKey:
+            return HttpResponse(status=HTTPStatus.NOT_FOUND)
+
+        response = HttpResponse()
+        self.set_object_headers(response, meta)
+        response['Content-Length'] = str(meta['size'])
+
+        return response
+
+    def get(self, request, *args, **kwargs):
+        store: ObjectStore = get_object_store(kwargs['bucket'])
+        key: str = kwargs['key']
+
+        try:
+            meta: dict = store.head(key)
+        except NoSuchKey:
+            return s3_error('NoSuchKey', 'The specified key does not exist.', HTTPStatus.NOT_FOUND)
+
+        try:
+            byte_range = parse_range_header(request.headers.get('Range'), meta['size'])
+        except RangeNotSatisfiable:
+            return s3_error('InvalidRange', 'The requested range is not satisfiable',
+                            HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+
+        start, end = 0, meta['size'] - 1
+        status: int = HTTPStatus.OK
+
+        if byte_range is not None:
+            start, end = byte_range
+            status = HTTPStatus.PARTIAL_CONTENT
+
+        if meta['size'] > 0:
+            response = StreamingHttpResponse(iter_storage_range(store.objects, key, start, end), status=status)
+        else:
+            response = HttpResponse(status=status)
+
+        self.set_object_headers(response, meta)
+        response['Content-Length'] = str(max(end - start + 1, 0))
+
+        if status == HTTPStatus.PARTIAL_CONTENT:
+            response['Content-Range'] = 'bytes %d-%d/%d' % (start, end, meta['size'])
+
+        return response
+
+    def put(self, request, *args, **kwargs):
+        store: ObjectStore = get_object_store(kwargs['bucket'])
+        key: str = kwargs['key']
+
+        if 'uploadId' in request.GET:
+            try:
+                etag: str = store.upload_part(key, request.GET['uploadId'], int(request.GET['partNumber']), request)
+            except NoSuchUpload:
+                return s3_error('NoSuchUpload', 'The specified upload does not exist.', HTTPStatus.NOT_FOUND)
+            except (KeyError, ValueError):
+                return s3_error('InvalidArgument', 'Part number must be an integer', HTTPStatus.BAD_REQUEST)
+        else:
+            etag: str = store.put(key, request, request.META.get('CONTENT_TYPE'))
+
+        response = HttpResponse()
+        response['ETag'] = etag
+
+        return response
+
+    def post(self, request, *args, **kwargs):
+        store: ObjectStore = get_object_store(kwargs['bucket'])
+        key: str = kwargs['key']
+
+        if 'uploads' in request.GET:
+            upload_id: str = store.create_multipart_upload(key, request.META.get('CONTENT_TYPE'))
+
+            return HttpResponse(
+                to_xml('InitiateMultipartUploadResult', [
+                    ('Bucket', store.bucket),
+                    ('Key', key),
+                    ('UploadId', upload_id),
+                ]),
+                content_type='application/xml'
+            )
+
+        if 'uploadId' in request.GET:
+            try:
+                part_numbers: List[int] = [int(number) for number in iter_xml_texts(request.body, 'PartNumber')]
+                etag: str = store.complete_multipart_upload(key, request.GET['uploadId'], part_numbers)
+            except NoSuchUpload:
+                return s3_error('NoSuchUpload', 'The specified upload does not exist.', HTTPStatus.NOT_FOUND)
+            except (InvalidPart, ValueError):
+                return s3_error('InvalidPart', 'One or more of the specified parts could not be found.',
+                                HTTPStatus.BAD_REQUEST)
+
+            return HttpResponse(
+                to_xml('CompleteMultipartUploadResult', [
+                    ('Location', request.build_absolute_uri(request.path)),
+                    ('Bucket', store.bucket),
+                    ('Key', key),
+                    ('ETag', etag),
+                ]),
+                content_type='application/xml'
+            )
+
+        return s3_error('MethodNotAllowed', 'The specified method is not allowed against this resource.',
+                        HTTPStatus.METHOD_NOT_ALLOWED)
+
+    def delete(self, request, *args, **kwargs):
+        store: ObjectStore = get_object_store(kwargs['bucket'])
+
+        if 'uploadId' in request.GET:
+            try:
+                store.abort_multipart_upload(kwargs['key'], request.GET['uploadId'])
+            except NoSuchUpload:
+                return s3_error('NoSuchUpload', 'The specified upload does not exist.', HTTPStatus.NOT_FOUND)
+        else:
+            store.delete(kwargs['key'])
+
+        return HttpResponse(status=HTTPStatus.NO_CONTENT)
+
+    @staticmethod
+    def set_object_headers(response: HttpResponse, meta: dict) -> None:
+        response['Content-Type'] = meta['content_type']
+        response['ETag'] = meta['etag']
+        response['Last-Modified'] = http_date(meta['last_modified'].timestamp())
+        response['Accept-Ranges'] = 'bytes'
+
+
+@lru_cache(maxsize=None)
+def get_catalogue(products_count: int, prices_per_product: int) -> Tuple[List[dict], List[dict]]:
+    return generate_catalogue(products_count, prices_per_product)
+
+
+def stripe_error(message: str, status: int = HTTPStatus.BAD_REQUEST) -> JsonResponse:
+    return JsonResponse({'error': {'type': 'invalid_request_error', 'message': message}}, status=status)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class StripeView(View):
+    """Base view of Stripe API stand-ins, requests must have an API key as Stripe requires."""
+
+    def dispatch(self, request, *args, **kwargs):
+        if not request.headers.get('Authorization', '').startswith('Bearer '):
+            return stripe_error('You did not provide an API key.', HTTPStatus.UNAUTHORIZED)
+
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        except InvalidRequest as e:
+            return stripe_error(str(e))
+
+    @staticmethod
+    def get_catalogue() -> Tuple[List[dict], List[dict]]:
+        return get_catalogue(settings.BF_STANDINS_STRIPE_PRODUCTS, settings.BF_STANDINS_STRIPE_PRICES_PER_PRODUCT)
+
+    @staticmethod
+    def get_expand(request) -> List[str]:
+        return [value for key, value in request.GET.items() if key == 'expand' or key.startswith('expand[')]
+
+
+class StripeProductsView(StripeView):
+    http_method_names = ['get']
+
+    def get(self, request, *args, **kwargs):
+        products, _prices = self.get_catalogue()
+
+        return JsonResponse(
+            paginate(products, '/v1/products', request.GET.get('limit'), request.GET.get('starting_after'))
+        )
+
+
+class StripePricesView(StripeView):
+    http_method_names = ['get']
+
+    def get(self, request, *args, **kwargs):
+        products, prices = self.get_catalogue()
+        page: dict = paginate(prices, '/v1/prices', request.GET.get('limit'), request.GET.get('starting_after'))
+
+        if 'data.product' in self.get_expand(request):
+            products_by_id: dict = {product['id']: product for product in products}
+            page['data'] = [dict(price, product=products_by_id[price['product']]) for price in page['data']]
+
+        return JsonResponse(page)
+
+
+class StripeEventsView(StripeView):
+    """Events feed, the catalogue is static, so there are no events to return."""
+    http_method_names = ['get']
+
+    def get(self, request, *args, **kwargs):
+        return JsonResponse(paginate([], '/v1/events', request.GET.get('limit'), None))
+
+
+class StripeCheckoutSessionsView(StripeView):
+    http_method_names = ['post']
+
+    def post(self, request, *args, **kwargs):
+        session: dict = create_checkout_session(request.POST.dict())
+        session['url'] = request.build_absolute_uri(
+            reverse('standins:stripe_checkout', kwargs={'session_id': session['id']})
+        )
+
+        return JsonResponse(session)
+
+
+class StripeCheckoutView(View):
+    """Page the checkout session redirects to, payments are completed with ``send_standin_event`` command."""
+    http_method_names = ['get']
+
+    def get(self, request, *args, **kwargs):
+        return HttpResponse('Stand-in checkout session %s' % kwargs['session_id'], content_type='text/plain')
@@ -0,0 +1,166 @@
+"""Admin changelists for tables with tens of millions of rows.
+
+The default changelist counts all rows with ``COUNT(*)`` on every page, skips ``OFFSET`` rows to
+reach the page and searches with ``icontains`` over all search fields, which are full table scans.
+
+``ScalableAdminMixin`` changes that:
+    * unfiltered changelist shows the row count estimated by PostgreSQL planner statistics;
+    * searches are exact or prefix lookups of a single field selected with a ``<prefix>:<value>`` term,
+      so they are index scans;
+    * searched or filtered changelist is paginated with keyset pagination by primary key and
+      doesn't count rows at all.
+"""
+from typing import Dict, Optional, Tuple
+
+from django.contrib.admin.views.main import ChangeList
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+CURSOR_VAR: str = 'before'
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator using ``pg_class.reltuples`` as the count of unfiltered querysets of big tables.
+
+    Counts are exact for small tables, filtered querysets and other databases.
+    """
+    # Tables with fewer estimated rows are counted exactly.
+    estimate_threshold: int = 100000
+
+    @cached_property
+    def count(self) -> int:
+        estimate: Optional[int] = self.get_estimated_count()
+
+        if estimate is not None and estimate >= self.estimate_threshold:
+            return estimate
+
+        return super().count
+
+    def get_estimated_count(self) -> Optional[int]:
+        queryset = self.object_list
+        query = getattr(queryset, 'query', None)
+
+        if query is None or query.where or query.is_sliced or query.distinct:
+            return None
+
+        connection = connections[queryset.db]
+
+        if connection.vendor != 'postgresql':
+            return None
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [connection.ops.quote_name(queryset.model._meta.db_table)]
+            )
+            row: Optional[tuple] = cursor.fetchone()
+
+        # Tables which were never analyzed have -1 (PostgreSQL 14+) or 0 tuples.
+        if row is None or row[0] <= 0:
+            return None
+
+        return row[0]
+
+
+class KeysetChangeList(ChangeList):
+    """Changelist paginating searched and filtered results by primary key in descending order."""
+
+    def get_filters_params(self, params=None):
+        lookup_params: dict = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+
+        return lookup_params
+
+    def get_query_string(self, new_params=None, remove=None):
+        # Changed filters or search start from the first page.
+        if new_params is None or CURSOR_VAR not in new_params:
+            remove = list(remove or []) + [CURSOR_VAR]
+
+        return super().get_query_string(new_params, remove)
+
+    def is_keyset_paginated(self, request) -> bool:
+        return bool(self.query) or bool(self.get_filters_params()) or CURSOR_VAR in request.GET
+
+    def get_cursor(self, request) -> Optional[int]:
+        try:
+            return int(request.GET[CURSOR_VAR])
+        except (KeyError, ValueError):
+            return None
+
+    def get_results(self, request):
+        self.keyset_paginated: bool = self.is_keyset_paginated(request)
+        self.next_url: Optional[str] = None
+        self.first_url: Optional[str] = None
+
+        if not self.keyset_paginated:
+            return super().get_results(request)
+
+        cursor: Optional[int] = self.get_cursor(request)
+        queryset = self.queryset.order_by('-pk')
+
+        if cursor is not None:
+            queryset = queryset.filter(pk__lt=cursor)
+            self.first_url = self.get_query_string(remove=[CURSOR_VAR])
+
+        result_list: list = list(queryset[:self.list_per_page + 1])
+
+        if len(result_list) > self.list_per_page:
+            result_list = result_list[:self.list_per_page]
+            self.next_url = self.get_query_string({CURSOR_VAR: result_list[-1].pk})
+
+        self.result_count = len(result_list)
+        self.show_full_result_count = False
+        self.full_result_count = None
+        self.show_admin_actions = True
+        self.result_list = result_list
+        self.can_show_all = False
+        self.multi_page = False
+        self.paginator = Paginator(result_list, self.list_per_page)
+
+
+class ScalableAdminMixin:
+    """Model admin mixin with estimated counts, indexed searches and keyset pagination.
+
+    Attributes:
+        search_lookups (dict): Search term prefixes and lookups, e.g. ``{'sha256': 'sha256__startswith'}``.
+        default_search_lookup (str): Lookup of the search terms without prefix.
+    """
+    search_lookups: Dict[str, str] = {}
+    default_search_lookup: Optional[str] = None
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    sortable_by: Tuple[str, ...] = ()
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+    def get_search_fields(self, request):
+        # Non-empty search fields enable the search box, terms are handled by ``get_search_results``.
+        return tuple(self.search_lookups) or (self.default_search_lookup,)
+
+    def parse_search_term(self, search_term: str) -> Optional[Tuple[str, str]]:
+        """Returns lookup and value of the search term, None if the term is not supported."""
+        prefix, separator, value = search_term.strip().partition(':')
+
+        if separator and prefix.lower() in self.search_lookups:
+            return self.search_lookups[prefix.lower()], value.strip()
+
+        if self.default_search_lookup is None:
+            return None
+
+        return self.default_search_lookup, search_term.strip()
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+
+        parsed: Optional[Tuple[str, str]] = self.parse_search_term(search_term)
+
+        if parsed is None or not parsed[1]:
+            return queryset.none(), False
+
+        lookup, value = parsed
+
+        return queryset.filter(**{lookup: value}), False
@@ -0,0 +1,107 @@
+"""In-process latency and value counters.
+
+Counters are kept per process, each worker reports its own values. ``utils.prometheus`` aggregates
+them across workers and exposes them in Prometheus text format.
+"""
+from bisect import bisect_left
+import threading
+import time
+from typing import Dict, Tuple
+
+
+# Upper bounds of the latency histogram buckets in seconds, the last bucket is unbounded.
+LATENCY_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class LatencyCounter:
+    """Thread-safe counter and histogram of the operation latencies."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count: int = 0
+        self.total: float = 0.0
+        self.max: float = 0.0
+        self.buckets: list = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def observe(self, seconds: float) -> None:
+        bucket: int = bisect_left(LATENCY_BUCKETS, seconds)
+
+        with self._lock:
+            self.count += 1
+            self.total += seconds
+            self.buckets[bucket] += 1
+
+            if seconds > self.max:
+                self.max = seconds
+
+    def snapshot(self) -> dict:
+        """Returns current values.
+
+        Returns:
+            dict: Number of operations, total, average and maximum latencies in seconds,
+                number of operations in every bucket of ``LATENCY_BUCKETS``.
+        """
+        with self._lock:
+            return {
+                'count': self.count,
+                'total': self.total,
+                'avg': self.total / self.count if self.count else 0.0,
+                'max': self.max,
+                'buckets': list(self.buckets),
+            }
+
+
+_counters: Dict[str, LatencyCounter] = {}
+_values: Dict[str, float] = {}
+_counters_lock = threading.Lock()
+
+
+def get_latency_counter(name: str) -> LatencyCounter:
+    try:
+        return _counters[name]
+    except KeyError:
+        with _counters_lock:
+            return _counters.setdefault(name, LatencyCounter())
+
+
+def observe_latency(name: str, seconds: float) -> None:
+    get_latency_counter(name).observe(seconds)
+
+
+def get_latency_stats(prefix: str = '') -> Dict[str, dict]:
+    """Returns snapshots of the counters.
+
+    Args:
+        prefix (str, optional): Return only counters which names start with the prefix.
+
+    Returns:
+        dict: Counter snapshots by counter names.
+    """
+    return {name: counter.snapshot() for name, counter in list(_counters.items()) if name.startswith(prefix)}
+
+
+def observe_query(execute, sql, params, many, context):
+    """Database execute wrapper collecting latency of the queries as ``db.<alias>``."""
+    started_at: float = time.perf_counter()
+
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        observe_latency('db.' + context['connection'].alias, time.perf_counter() - started_at)
+
+
+def increment(name: str, value: float = 1) -> None:
+    """Increments monotonic value counter, e.g. number of uploads or uploaded bytes."""
+    with _counters_lock:
+        _values[name] = _values.get(name, 0) + value
+
+
+def get_counter_values(prefix: str = '') -> Dict[str, float]:
+    with _counters_lock:
+        return {name: value for name, value in _values.items() if name.startswith(prefix)}
+
+
+def reset_latency_counters() -> None:
+    with _counters_lock:
+        _counters.clear()
+        _values.clear()
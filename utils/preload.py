@@ -0,0 +1,139 @@
+"""Warm-up of the application in the master process before workers are forked.
+
+Templates are compiled, URL resolvers populated and libmagic database read on the first request
+otherwise, so every new worker serves its first requests slowly. ``preload_app`` does it once in the
+master, then moves all objects to the permanent generation with ``gc.freeze``: the garbage collector
+doesn't write to their headers, so memory pages stay shared with the forked workers copy-on-write.
+"""
+import gc
+import os
+import re
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.template import engines, TemplateDoesNotExist, TemplateSyntaxError
+from django.template.backends.django import DjangoTemplates
+from django.urls import get_resolver, URLResolver
+
+
+TEMPLATE_EXTENSIONS = ('.html', '.txt', '.xml')
+IMPORT_TIME_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$')
+
+
+def prime_templates() -> int:
+    """Compiles templates of all Django template engines, so they are stored in the cached loaders.
+
+    Returns:
+        int: Number of compiled templates.
+    """
+    compiled: int = 0
+
+    for backend in engines.all():
+        if not isinstance(backend, DjangoTemplates):
+            continue
+
+        for directory in backend.template_dirs:
+            for template_name in iter_template_names(directory):
+                try:
+                    backend.engine.get_template(template_name)
+                except (TemplateDoesNotExist, TemplateSyntaxError, UnicodeDecodeError):
+                    # Broken templates fail on the request, as without preloading.
+                    continue
+
+                compiled += 1
+
+    return compiled
+
+
+def iter_template_names(directory) -> Iterable[str]:
+    for root, _dirs, files in os.walk(directory):
+        for filename in files:
+            if filename.endswith(TEMPLATE_EXTENSIONS):
+                yield os.path.relpath(os.path.join(root, filename), directory).replace(os.sep, '/')
+
+
+def prime_url_resolvers(resolver: Optional[URLResolver] = None) -> int:
+    """Imports URL confs and views, compiles patterns and populates reverse lookups.
+
+    Returns:
+        int: Number of URL patterns.
+    """
+    if resolver is None:
+        resolver = get_resolver()
+
+    # Populates reverse lookups and namespaces of the resolver and included resolvers.
+    resolver.reverse_dict
+    count: int = 0
+
+    for pattern in resolver.url_patterns:
+        pattern.pattern.regex
+
+        if isinstance(pattern, URLResolver):
+            count += prime_url_resolvers(pattern)
+        else:
+            count += 1
+
+    return count
+
+
+def prime_magic() -> None:
+    from accounts.models import MAGIC_MIME
+
+    MAGIC_MIME.from_buffer(b'%PDF-1.4')
+
+
+def freeze() -> None:
+    gc.collect()
+    gc.freeze()
+
+
+def preload_app(freeze_heap: bool = True) -> Dict[str, float]:
+    """Warms up the application, should be called in the master process before workers are forked.
+
+    Args:
+        freeze_heap (bool, optional): Move objects to the permanent generation of the garbage collector.
+
+    Returns:
+        dict: Warm-up steps and their duration in seconds.
+    """
+    steps: List[Tuple[str, Callable]] = [
+        ('url_resolvers', prime_url_resolvers),
+        ('templates', prime_templates),
+        ('magic', prime_magic),
+    ]
+
+    if freeze_heap:
+        steps.append(('gc_freeze', freeze))
+
+    timings: Dict[str, float] = {}
+
+    for name, step in steps:
+        start: float = time.perf_counter()
+        step()
+        timings[name] = time.perf_counter() - start
+
+    return timings
+
+
+def parse_import_times(report: str) -> List[Tuple[str, int, int, int]]:
+    """Parses ``python -X importtime`` report.
+
+    Args:
+        report (str): Standard error of the interpreter started with ``-X importtime``.
+
+    Returns:
+        list: Module name, nesting level, self and cumulative import time in microseconds.
+    """
+    import_times: List[Tuple[str, int, int, int]] = []
+
+    for line in report.splitlines():
+        match = IMPORT_TIME_RE.match(line)
+
+        if match is None:
+            continue
+
+        self_time, cumulative_time, indent, module = match.groups()
+        # Nested imports are indented with two spaces per level.
+        import_times.append((module, (len(indent) - 1) // 2, int(self_time), int(cumulative_time)))
+
+    return import_times
@@ -0,0 +1,401 @@
+"""Presigned S3 URLs and POST policies without botocore request pipeline.
+
+botocore builds and serializes a full request for every presigned URL and derives SigV4 signing
+key again and again. Presigners from this module resolve bucket URLs with botocore once, cache
+the daily derived signing key and compute signatures directly, output is the same as botocore's.
+"""
+import base64
+import datetime
+import hashlib
+import hmac
+import json
+from typing import Optional, Union
+from urllib.parse import quote, unquote, urlsplit
+
+from storages.utils import clean_name
+
+
+ALGORITHM: str = 'AWS4-HMAC-SHA256'
+UNSIGNED_PAYLOAD: str = 'UNSIGNED-PAYLOAD'
+ISO8601: str = '%Y-%m-%dT%H:%M:%SZ'
+SIGV4_TIMESTAMP: str = '%Y%m%dT%H%M%SZ'
+# Same as ``botocore.utils.SAFE_CHARS``.
+SAFE_CHARS: str = '-_.~'
+SERVICE_NAME: str = 's3'
+DEFAULT_EXPIRES_IN: int = 3600
+# Key used to resolve bucket URLs with botocore.
+PROBE_KEY: str = 'presigner-probe'
+# botocore parameters of ``get_object`` which are serialized to the query string.
+QUERY_PARAMETERS: dict = {
+    'ResponseCacheControl': 'response-cache-control',
+    'ResponseContentDisposition': 'response-content-disposition',
+    'ResponseContentEncoding': 'response-content-encoding',
+    'ResponseContentLanguage': 'response-content-language',
+    'ResponseContentType': 'response-content-type',
+    'ResponseExpires': 'response-expires',
+    'VersionId': 'versionId',
+}
+MAX_SIGNING_KEYS: int = 64
+
+_signing_keys: dict = {}
+_presigners: dict = {}
+
+
+def _sign(key: bytes, msg: str) -> bytes:
+    return hmac.new(key, msg.encode('utf-8'), hashlib.sha256).digest()
+
+
+def get_signing_key(secret_key: str, date_stamp: str, region_name: str, service_name: str = SERVICE_NAME) -> bytes:
+    """Returns SigV4 signing key.
+
+    Signing key depends only on the date, region and service, so it's derived once a day.
+
+    Args:
+        secret_key (str): AWS secret access key.
+        date_stamp (str): Date in ``YYYYMMDD`` format.
+        region_name (str): Region name.
+        service_name (str, optional): Service name.
+
+    Returns:
+        bytes: Signing key.
+    """
+    cache_key: tuple = (secret_key, date_stamp, region_name, service_name)
+
+    try:
+        return _signing_keys[cache_key]
+    except KeyError:
+        pass
+
+    k_date: bytes = _sign(('AWS4' + secret_key).encode('utf-8'), date_stamp)
+    k_region: bytes = _sign(k_date, region_name)
+    k_service: bytes = _sign(k_region, service_name)
+    signing_key: bytes = _sign(k_service, 'aws4_request')
+
+    if len(_signing_keys) >= MAX_SIGNING_KEYS:
+        # Keys of the previous days are not needed anymore.
+        _signing_keys.clear()
+
+    _signing_keys[cache_key] = signing_key
+
+    return signing_key
+
+
+def percent_encode(value) -> str:
+    if not isinstance(value, (bytes, str)):
+        value = str(value)
+
+    if not isinstance(value, bytes):
+        value = value.encode('utf-8')
+
+    return quote(value, safe=SAFE_CHARS)
+
+
+def percent_encode_sequence(mapping: dict) -> str:
+    return '&'.join('%s=%s' % (percent_encode(key), percent_encode(value)) for key, value in mapping.items())
+
+
+def get_host(scheme: str, netloc: str) -> str:
+    """Returns host header the same way as botocore does, default ports are omitted."""
+    url_parts = urlsplit('%s://%s' % (scheme, netloc))
+    default_ports: dict = {
+        'http': 80,
+        'https': 443,
+    }
+
+    if url_parts.port is not None and url_parts.port != default_ports.get(scheme):
+        return '%s:%d' % (url_parts.hostname, url_parts.port)
+
+    return url_parts.hostname
+
+
+def get_region_from_credential(credential: str) -> str:
+    # Credential format: <access_key>/<date>/<region>/<service>/aws4_request
+    return credential.split('/')[-3]
+
+
+class BotocorePresigner:
+    """Presigner which delegates to the botocore client.
+
+    Used when ``utils.presigners.S3Presigner`` can't be configured,
+    for example when the client is not configured to use SigV4.
+    """
+    def __init__(self, client, bucket_name: str):
+        self.client = client
+        self.bucket_name = bucket_name
+
+    def generate_presigned_url(
+            self,
+            key: str,
+            params: Optional[dict] = None,
+            expires_in: int = DEFAULT_EXPIRES_IN,
+            http_method: str = 'GET'
+    ) -> str:
+        return self.client.generate_presigned_url(
+            'get_object',
+            Params=dict(params or {}, Bucket=self.bucket_name, Key=key),
+            ExpiresIn=expires_in,
+            HttpMethod=http_method
+        )
+
+    def generate_presigned_post(
+            self,
+            key: str,
+            fields: Optional[dict] = None,
+            conditions: Optional[list] = None,
+            expires_in: int = DEFAULT_EXPIRES_IN
+    ) -> dict:
+        return self.client.generate_presigned_post(
+            Bucket=self.bucket_name,
+            Key=key,
+            Fields=fields,
+            Conditions=conditions,
+            ExpiresIn=expires_in
+        )
+
+
+class S3Presigner:
+    """SigV4 presigner of S3 objects URLs and POST policies.
+
+    Args:
+        credentials (botocore.credentials.Credentials): Credentials, frozen on every call,
+            so refreshable credentials are supported.
+        bucket_name (str): Bucket name.
+        object_url (str): URL of the object with empty key, for example ``https://bucket.s3.amazonaws.com/``.
+        object_region_name (str): Signing region of the objects URLs.
+        post_url (str): URL for the POST uploads.
+        post_region_name (str): Signing region of the POST policies.
+    """
+    def __init__(
+            self,
+            credentials,
+            bucket_name: str,
+            object_url: str,
+            object_region_name: str,
+            post_url: str,
+            post_region_name: str
+    ):
+        self.credentials = credentials
+        self.bucket_name = bucket_name
+        url_parts = urlsplit(object_url)
+        self.scheme: str = url_parts.scheme
+        self.netloc: str = url_parts.netloc
+        self.host: str = get_host(url_parts.scheme, url_parts.netloc)
+        self.path_prefix: str = url_parts.path
+        self.object_region_name = object_region_name
+        self.post_url = post_url
+        self.post_region_name = post_region_name
+
+    @classmethod
+    def from_client(cls, client, bucket_name: str) -> Union['S3Presigner', None]:
+        """Configures presigner from the botocore client.
+
+        Bucket URLs, addressing style and signing regions are resolved by botocore once.
+
+        Args:
+            client (botocore.client.BaseClient): S3 client.
+            bucket_name (str): Bucket name.
+
+        Returns:
+            utils.presigners.S3Presigner: Presigner if client uses SigV4 and has credentials, otherwise None.
+        """
+        # There is no public API to get the credentials of the client.
+        credentials = getattr(getattr(client, '_request_signer', None), '_credentials', None)
+
+        if credentials is None:
+            return None
+
+        url_parts = urlsplit(
+            client.generate_presigned_url('get_object', Params={'Bucket': bucket_name, 'Key': PROBE_KEY})
+        )
+        query: dict = dict(pair.partition('=')[::2] for pair in url_parts.query.split('&'))
+
+        if query.get('X-Amz-Algorithm') != ALGORITHM or not url_parts.path.endswith('/' + PROBE_KEY):
+            return None
+
+        post = client.generate_presigned_post(Bucket=bucket_name, Key=PROBE_KEY)
+
+        if post['fields'].get('x-amz-algorithm') != ALGORITHM:
+            return None
+
+        return cls(
+            credentials=credentials,
+            bucket_name=bucket_name,
+            object_url='%s://%s%s' % (url_parts.scheme, url_parts.netloc, url_parts.path[:-len(PROBE_KEY)]),
+            object_region_name=get_region_from_credential(unquote(query['X-Amz-Credential'])),
+            post_url=post['url'],
+            post_region_name=get_region_from_credential(post['fields']['x-amz-credential'])
+        )
+
+    @staticmethod
+    def get_scope(date_stamp: str, region_name: str) -> str:
+        return '%s/%s/%s/aws4_request' % (date_stamp, region_name, SERVICE_NAME)
+
+    def generate_presigned_url(
+            self,
+            key: str,
+            params: Optional[dict] = None,
+            expires_in: int = DEFAULT_EXPIRES_IN,
+            http_method: str = 'GET',
+            now: Optional[datetime.datetime] = None
+    ) -> str:
+        """Generates presigned URL of the object.
+
+        Args:
+            key (str): Object key.
+            params (dict, optional): ``get_object`` query parameters, for example ``ResponseContentDisposition``.
+            expires_in (int, optional): Expiration time in seconds.
+            http_method (str, optional): HTTP method.
+            now (datetime.datetime, optional): Signing time in UTC.
+
+        Returns:
+            str: Presigned URL.
+        """
+        if now is None:
+            now = datetime.datetime.utcnow()
+
+        credentials = self.credentials.get_frozen_credentials()
+        amz_date: str = now.strftime(SIGV4_TIMESTAMP)
+        date_stamp: str = amz_date[:8]
+        scope: str = self.get_scope(date_stamp, self.object_region_name)
+        auth_params: dict = {
+            'X-Amz-Algorithm': ALGORITHM,
+            'X-Amz-Credential': '%s/%s' % (credentials.access_key, scope),
+            'X-Amz-Date': amz_date,
+            'X-Amz-Expires': expires_in,
+            'X-Amz-SignedHeaders': 'host',
+        }
+
+        if credentials.token is not None:
+            auth_params['X-Amz-Security-Token'] = credentials.token
+
+        query_string: str = percent_encode_sequence(auth_params)
+
+        if params:
+            # Operation parameters must go first.
+            query_string = '%s&%s' % (
+                percent_encode_sequence({QUERY_PARAMETERS[name]: value for name, value in params.items()}),
+                query_string
+            )
+
+        path: str = self.path_prefix + quote(key.encode('utf-8'), safe='/~')
+        canonical_query_string: str = '&'.join(
+            '%s=%s' % pair for pair in sorted(pair.partition('=')[::2] for pair in query_string.split('&'))
+        )
+        canonical_request: str = '\n'.join((
+            http_method.upper(),
+            path,
+            canonical_query_string,
+            'host:%s\n' % self.host,
+            'host',
+            UNSIGNED_PAYLOAD,
+        ))
+        string_to_sign: str = '\n'.join((
+            ALGORITHM,
+            amz_date,
+            scope,
+            hashlib.sha256(canonical_request.encode('utf-8')).hexdigest(),
+        ))
+        signing_key: bytes = get_signing_key(credentials.secret_key, date_stamp, self.object_region_name)
+        signature: str = hmac.new(signing_key, string_to_sign.encode('utf-8'), hashlib.sha256).hexdigest()
+
+        return '%s://%s%s?%s&X-Amz-Signature=%s' % (self.scheme, self.netloc, path, query_string, signature)
+
+    def generate_presigned_post(
+            self,
+            key: str,
+            fields: Optional[dict] = None,
+            conditions: Optional[list] = None,
+            expires_in: int = DEFAULT_EXPIRES_IN,
+            now: Optional[datetime.datetime] = None
+    ) -> dict:
+        """Generates URL and form fields for the presigned POST upload.
+
+        Args:
+            key (str): Object key.
+            fields (dict, optional): Prefilled form fields.
+            conditions (list, optional): Policy conditions.
+            expires_in (int, optional): Expiration time in seconds.
+            now (datetime.datetime, optional): Signing time in UTC.
+
+        Returns:
+            dict: ``url`` and ``fields`` like ``botocore.client.BaseClient.generate_presigned_post``.
+        """
+        if now is None:
+            now = datetime.datetime.utcnow()
+
+        credentials = self.credentials.get_frozen_credentials()
+        fields = dict(fields or {})
+        conditions = list(conditions or [])
+        amz_date: str = now.strftime(SIGV4_TIMESTAMP)
+        date_stamp: str = amz_date[:8]
+        credential: str = '%s/%s' % (credentials.access_key, self.get_scope(date_stamp, self.post_region_name))
+
+        conditions.append({'bucket': self.bucket_name})
+
+        if key.endswith('${filename}'):
+            conditions.append(['starts-with', '$key', key[:-len('${filename}')]])
+        else:
+            conditions.append({'key': key})
+
+        fields['key'] = key
+        fields['x-amz-algorithm'] = ALGORITHM
+        fields['x-amz-credential'] = credential
+        fields['x-amz-date'] = amz_date
+
+        conditions.append({'x-amz-algorithm': ALGORITHM})
+        conditions.append({'x-amz-credential': credential})
+        conditions.append({'x-amz-date': amz_date})
+
+        if credentials.token is not None:
+            fields['x-amz-security-token'] = credentials.token
+            conditions.append({'x-amz-security-token': credentials.token})
+
+        policy: dict = {
+            'expiration': (now + datetime.timedelta(seconds=expires_in)).strftime(ISO8601),
+            'conditions': conditions,
+        }
+        fields['policy'] = base64.b64encode(json.dumps(policy).encode('utf-8')).decode('utf-8')
+        signing_key: bytes = get_signing_key(credentials.secret_key, date_stamp, self.post_region_name)
+        fields['x-amz-signature'] = hmac.new(signing_key, fields['policy'].encode('utf-8'), hashlib.sha256).hexdigest()
+
+        return {
+            'url': self.post_url,
+            'fields': fields,
+        }
+
+
+def get_presigner(client, bucket_name: str) -> Union[S3Presigner, BotocorePresigner]:
+    """Returns presigner for the bucket.
+
+    Presigners are cached per bucket and client configuration, so bucket URLs
+    are resolved by botocore only once per process.
+
+    Args:
+        client (botocore.client.BaseClient): S3 client.
+        bucket_name (str): Bucket name.
+
+    Returns:
+        utils.presigners.S3Presigner: If client uses SigV4.
+        utils.presigners.BotocorePresigner: Otherwise.
+    """
+    cache_key: tuple = (bucket_name, client.meta.endpoint_url, client.meta.region_name)
+
+    try:
+        presigner = _presigners[cache_key]
+    except KeyError:
+        presigner = _presigners[cache_key] = S3Presigner.from_client(client, bucket_name)
+
+    if presigner is None:
+        return BotocorePresigner(client, bucket_name)
+
+    return presigner
+
+
+def get_storage_presigner(storage) -> Union[S3Presigner, BotocorePresigner]:
+    """Returns presigner for the ``storages.backends.s3boto3.S3Boto3Storage`` storage."""
+    return get_presigner(storage.connection.meta.client, storage.bucket_name)
+
+
+def get_storage_key(storage, name: str) -> str:
+    """Returns object key of the file name the same way ``storages.backends.s3boto3.S3Boto3Storage.url`` does."""
+    return storage._normalize_name(clean_name(name))
@@ -0,0 +1,264 @@
+"""Prometheus exposition of ``utils.metrics`` counters aggregated across worker processes.
+
+Counters live in the memory of every worker. If ``settings.METRICS_DIR`` is set, every process writes
+snapshots of its counters to ``metrics-<pid>-<token>.json`` file in the directory every
+``settings.METRICS_WRITE_INTERVAL`` seconds, the process serving the scrape sums all snapshots.
+Snapshots of exited workers are merged into ``metrics-archive.json``, so counters stay monotonic
+when uWSGI restarts or scales down workers. The directory must be local to the host and cleaned
+when the server starts.
+
+Latency counters ``<family>.<name>`` are exposed as ``bf_<family>_duration_seconds`` histograms with
+``name`` label, value counters ``<name>`` as ``bf_<name>_total`` counters.
+"""
+import atexit
+import fcntl
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+import uuid
+
+import orjson
+
+from utils.json import dumps
+from utils.metrics import get_counter_values, get_latency_stats, LATENCY_BUCKETS
+
+
+CONTENT_TYPE: str = 'text/plain; version=0.0.4; charset=utf-8'
+METRIC_PREFIX: str = 'bf_'
+SNAPSHOT_PREFIX: str = 'metrics-'
+SNAPSHOT_SUFFIX: str = '.json'
+ARCHIVE_NAME: str = 'metrics-archive.json'
+LOCK_NAME: str = 'metrics.lock'
+SNAPSHOT_NAME_RE = re.compile(r'^metrics-(\d+)-[0-9a-f]+\.json$')
+INVALID_NAME_CHARS_RE = re.compile(r'[^a-zA-Z0-9_]')
+
+_process: Tuple[int, str] = (0, '')
+_writer_pid: Optional[int] = None
+_writer_lock = threading.Lock()
+
+
+def get_snapshot() -> dict:
+    """Returns counters of the current process."""
+    return {'latency': get_latency_stats(), 'counters': get_counter_values()}
+
+
+def get_snapshot_path(directory: str) -> str:
+    global _process
+
+    pid: int = os.getpid()
+
+    # Token distinguishes processes which reuse the pid of an exited worker.
+    if _process[0] != pid:
+        _process = (pid, uuid.uuid4().hex)
+
+    return os.path.join(directory, '%s%d-%s%s' % (SNAPSHOT_PREFIX, pid, _process[1], SNAPSHOT_SUFFIX))
+
+
+def write_file(path: str, content: bytes) -> None:
+    # Readers never see partially written files.
+    tmp_path: str = '%s.%d.tmp' % (path, os.getpid())
+
+    with open(tmp_path, 'wb') as tmp_file:
+        tmp_file.write(content)
+
+    os.replace(tmp_path, path)
+
+
+def write_snapshot(directory: str) -> None:
+    write_file(get_snapshot_path(directory), dumps(get_snapshot()))
+
+
+def read_file(path: str) -> Optional[dict]:
+    try:
+        with open(path, 'rb') as snapshot_file:
+            return orjson.loads(snapshot_file.read())
+    except (OSError, ValueError):
+        # Archived by another process or written by an older version.
+        return None
+
+
+def merge_snapshot(merged: dict, snapshot: dict) -> dict:
+    """Adds counters of the snapshot to the merged counters.
+
+    Returns:
+        dict: Merged counters.
+    """
+    for name, stats in snapshot.get('latency', {}).items():
+        current: Optional[dict] = merged['latency'].get(name)
+
+        if current is None:
+            merged['latency'][name] = dict(stats, buckets=list(stats.get('buckets') or []))
+            continue
+
+        current['count'] += stats['count']
+        current['total'] += stats['total']
+        current['max'] = max(current['max'], stats['max'])
+        current['avg'] = current['total'] / current['count'] if current['count'] else 0.0
+        buckets: list = stats.get('buckets') or []
+
+        if len(current['buckets']) == len(buckets):
+            current['buckets'] = [a + b for a, b in zip(current['buckets'], buckets)]
+        else:
+            # Buckets were changed between deployments, histogram falls back to count and sum.
+            current['buckets'] = []
+
+    for name, value in snapshot.get('counters', {}).items():
+        merged['counters'][name] = merged['counters'].get(name, 0) + value
+
+    return merged
+
+
+def is_process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+    return True
+
+
+def archive_snapshots(directory: str) -> None:
+    """Merges snapshots of exited processes into the archive, so the directory doesn't grow."""
+    with open(os.path.join(directory, LOCK_NAME), 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+        exited: List[str] = []
+
+        for filename in os.listdir(directory):
+            match = SNAPSHOT_NAME_RE.match(filename)
+
+            if match is not None and not is_process_alive(int(match.group(1))):
+                exited.append(os.path.join(directory, filename))
+
+        if not exited:
+            return
+
+        archive_path: str = os.path.join(directory, ARCHIVE_NAME)
+        archive: dict = merge_snapshot({'latency': {}, 'counters': {}}, read_file(archive_path) or {})
+
+        for path in exited:
+            merge_snapshot(archive, read_file(path) or {})
+
+        write_file(archive_path, dumps(archive))
+
+        for path in exited:
+            os.remove(path)
+
+
+def read_snapshots(directory: str) -> dict:
+    """Returns counters of all processes, including exited ones."""
+    merged: dict = {'latency': {}, 'counters': {}}
+
+    for filename in sorted(os.listdir(directory)):
+        if filename.startswith(SNAPSHOT_PREFIX) and filename.endswith(SNAPSHOT_SUFFIX):
+            merge_snapshot(merged, read_file(os.path.join(directory, filename)) or {})
+
+    return merged
+
+
+def collect(directory: Optional[str] = None) -> dict:
+    """Returns counters of all workers, or of the current process if the directory isn't set."""
+    if directory is None:
+        return get_snapshot()
+
+    write_snapshot(directory)
+    archive_snapshots(directory)
+
+    return read_snapshots(directory)
+
+
+def _write_snapshots(directory: str, interval: float) -> None:
+    last_content: Optional[bytes] = None
+
+    while True:
+        time.sleep(interval)
+        content: bytes = dumps(get_snapshot())
+
+        if content == last_content:
+            continue
+
+        try:
+            write_file(get_snapshot_path(directory), content)
+        except OSError:
+            # Retried with the next interval.
+            continue
+
+        last_content = content
+
+
+def start_snapshot_writer(directory: str, interval: float) -> None:
+    """Starts the thread writing snapshots of the current process.
+
+    Threads don't survive fork, so it's called on every request and starts the thread once per process.
+    """
+    global _writer_pid
+
+    pid: int = os.getpid()
+
+    if _writer_pid == pid:
+        return
+
+    with _writer_lock:
+        if _writer_pid == pid:
+            return
+
+        threading.Thread(
+            target=_write_snapshots,
+            args=(directory, interval),
+            name='metrics-snapshot-writer',
+            daemon=True
+        ).start()
+        atexit.register(write_snapshot, directory)
+        _writer_pid = pid
+
+
+def format_name(name: str) -> str:
+    return INVALID_NAME_CHARS_RE.sub('_', name)
+
+
+def format_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render(snapshot: dict) -> str:
+    """Returns counters in Prometheus text exposition format."""
+    families: Dict[str, list] = {}
+
+    for name, stats in snapshot['latency'].items():
+        family, _separator, label = name.partition('.')
+        families.setdefault(family, []).append((label, stats))
+
+    lines: List[str] = []
+
+    for family, items in sorted(families.items()):
+        metric: str = '%s%s_duration_seconds' % (METRIC_PREFIX, format_name(family))
+        lines.append('# HELP %s Latency of %s operations in seconds.' % (metric, family))
+        lines.append('# TYPE %s histogram' % metric)
+
+        for label, stats in sorted(items, key=lambda item: item[0]):
+            labels: str = 'name="%s"' % format_label(label)
+            cumulative: int = 0
+
+            if len(stats.get('buckets') or []) == len(LATENCY_BUCKETS) + 1:
+                for bound, count in zip(LATENCY_BUCKETS, stats['buckets']):
+                    cumulative += count
+                    lines.append('%s_bucket{%s,le="%r"} %d' % (metric, labels, bound, cumulative))
+
+            lines.append('%s_bucket{%s,le="+Inf"} %d' % (metric, labels, stats['count']))
+            lines.append('%s_sum{%s} %r' % (metric, labels, float(stats['total'])))
+            lines.append('%s_count{%s} %d' % (metric, labels, stats['count']))
+
+    for name, value in sorted(snapshot['counters'].items()):
+        metric: str = '%s%s_total' % (METRIC_PREFIX, format_name(name))
+        lines.append('# TYPE %s counter' % metric)
+        lines.append('%s %s' % (metric, format_value(value)))
+
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,194 @@
+"""S3 storage with a shared, tuned connection pool.
+
+``storages.backends.s3boto3.S3Boto3Storage`` creates a boto3 session, resource and client with
+its own connection pool for every thread, and the pool is limited to 10 connections by default.
+``PooledS3Boto3Storage`` creates a single thread-safe client per process and storage configuration,
+threads only get a lightweight resource around that client.
+
+Settings:
+    AWS_S3_MAX_POOL_CONNECTIONS (int): Connection pool size, 50 by default.
+    AWS_S3_CONNECT_TIMEOUT (float): Connection timeout in seconds, 5 by default.
+    AWS_S3_READ_TIMEOUT (float): Read timeout in seconds, 30 by default.
+    AWS_S3_RETRY_MODE (str): botocore retry mode: legacy, standard or adaptive, standard by default.
+    AWS_S3_MAX_ATTEMPTS (int): Maximum number of attempts including the initial one, 3 by default.
+    AWS_S3_TCP_KEEPALIVE (bool): Enable TCP keep-alive, True by default.
+"""
+import os
+import threading
+import time
+from typing import Iterable, List
+
+from botocore.config import Config
+from django.core.files.storage import default_storage
+from storages.backends.s3boto3 import S3Boto3Storage
+from storages.utils import setting
+
+from utils.metrics import observe_latency
+from utils.presigners import get_storage_key, get_storage_presigner
+
+
+LATENCY_COUNTER_PREFIX: str = 's3.'
+# Maximum number of keys of one ``DeleteObjects`` request.
+DELETE_BATCH_SIZE: int = 1000
+STARTED_AT_CONTEXT_KEY: str = 'bf_started_at'
+OPERATION_CONTEXT_KEY: str = 'bf_operation'
+
+_clients: dict = {}
+_clients_lock = threading.Lock()
+
+
+def _before_call(model, context, **kwargs) -> None:
+    context[OPERATION_CONTEXT_KEY] = model.name
+    context[STARTED_AT_CONTEXT_KEY] = time.perf_counter()
+
+
+def _after_call(context, **kwargs) -> None:
+    try:
+        started_at: float = context.pop(STARTED_AT_CONTEXT_KEY)
+    except KeyError:
+        return
+
+    observe_latency(LATENCY_COUNTER_PREFIX + context[OPERATION_CONTEXT_KEY], time.perf_counter() - started_at)
+
+
+class PooledS3Boto3Storage(S3Boto3Storage):
+    """S3 storage sharing one boto3 client between threads of the process.
+
+    Note:
+        Clients are stored per process id, so workers forked by uWSGI never share sockets
+        with the master process.
+
+    Per-operation latencies are collected with ``utils.metrics`` under ``s3.<OperationName>`` names,
+    for streaming operations like ``GetObject`` latency is the time to the response headers.
+    """
+
+    def __init__(self, **settings):
+        config_provided: bool = settings.get('config', self.config) is not None
+
+        super().__init__(**settings)
+
+        if not config_provided:
+            self.config = self.config.merge(Config(
+                connect_timeout=self.connect_timeout,
+                read_timeout=self.read_timeout,
+                max_pool_connections=self.max_pool_connections,
+                retries={'mode': self.retry_mode, 'total_max_attempts': self.max_attempts},
+                tcp_keepalive=self.tcp_keepalive,
+            ))
+
+    def get_default_settings(self):
+        default_settings: dict = super().get_default_settings()
+        default_settings.update({
+            'max_pool_connections': setting('AWS_S3_MAX_POOL_CONNECTIONS', 50),
+            'connect_timeout': setting('AWS_S3_CONNECT_TIMEOUT', 5),
+            'read_timeout': setting('AWS_S3_READ_TIMEOUT', 30),
+            'retry_mode': setting('AWS_S3_RETRY_MODE', 'standard'),
+            'max_attempts': setting('AWS_S3_MAX_ATTEMPTS', 3),
+            'tcp_keepalive': setting('AWS_S3_TCP_KEEPALIVE', True),
+        })
+
+        return default_settings
+
+    @property
+    def connection(self):
+        connection = getattr(self._connections, 'connection', None)
+
+        if connection is None:
+            resource_class, client = self.get_shared_client()
+            connection = self._connections.connection = resource_class(client=client)
+
+        return connection
+
+    def get_client_key(self) -> tuple:
+        return (
+            os.getpid(),
+            self.session_profile,
+            self.access_key,
+            self.secret_key,
+            self.security_token,
+            self.region_name,
+            self.endpoint_url,
+            self.use_ssl,
+            self.verify,
+            self.max_pool_connections,
+            self.connect_timeout,
+            self.read_timeout,
+            self.retry_mode,
+            self.max_attempts,
+            self.tcp_keepalive,
+        )
+
+    def get_shared_client(self) -> tuple:
+        """Returns resource class and client shared by all threads of the process.
+
+        Returns:
+            tuple: boto3 S3 service resource class and botocore S3 client.
+        """
+        client_key: tuple = self.get_client_key()
+
+        try:
+            return _clients[client_key]
+        except KeyError:
+            pass
+
+        with _clients_lock:
+            if client_key not in _clients:
+                resource = self._create_session().resource(
+                    's3',
+                    region_name=self.region_name,
+                    use_ssl=self.use_ssl,
+                    endpoint_url=self.endpoint_url,
+                    config=self.config,
+                    verify=self.verify,
+                )
+                client = resource.meta.client
+                client.meta.events.register_first('before-call.s3', _before_call)
+                client.meta.events.register('after-call.s3', _after_call)
+                client.meta.events.register('after-call-error.s3', _after_call)
+
+                _clients[client_key] = type(resource), client
+
+            return _clients[client_key]
+
+
+def warm_up(storage=None) -> None:
+    """Creates shared client and resolves presigner of the storage.
+
+    Called after worker fork, so the first request doesn't pay for the botocore data loading
+    and endpoint resolution.
+
+    Args:
+        storage (django.core.files.storage.Storage, optional): Storage, ``default_storage`` by default.
+    """
+    if storage is None:
+        storage = default_storage
+
+    if not isinstance(storage, S3Boto3Storage):
+        return
+
+    get_storage_presigner(storage)
+
+
+def delete_many(storage, names: Iterable[str]) -> None:
+    """Deletes files from the storage, missing files are ignored.
+
+    S3 objects are deleted with one ``DeleteObjects`` request per ``DELETE_BATCH_SIZE`` keys,
+    other storages delete files one by one.
+
+    Args:
+        storage (django.core.files.storage.Storage): File storage.
+        names (Iterable[str]): File names in the storage.
+    """
+    names: List[str] = [name for name in names if name]
+
+    if not isinstance(storage, S3Boto3Storage):
+        for name in names:
+            storage.delete(name)
+
+        return
+
+    for idx in range(0, len(names), DELETE_BATCH_SIZE):
+        storage.bucket.delete_objects(Delete={
+            'Objects': [{'Key': get_storage_key(storage, name)} for name in names[idx:idx + DELETE_BATCH_SIZE]],
+            'Quiet': True,
+        })
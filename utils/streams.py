@@ -0,0 +1,127 @@
+"""Chunked streaming of the stored files with HTTP range support.
+
+Files are read from the storage in fixed-size chunks, so memory usage doesn't depend on the
+file size. S3 objects are requested with ``Range`` header instead of downloading the whole
+object, like ``storages.backends.s3boto3.S3File`` does.
+"""
+import re
+from typing import Iterator, Optional, Tuple
+
+from django.core.files.storage import Storage
+from storages.backends.s3boto3 import S3Boto3Storage
+
+from utils.presigners import get_storage_key
+
+
+DEFAULT_CHUNK_SIZE: int = 64 * 1024
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(Exception):
+    """Requested range is outside the file"""
+
+
+def parse_range_header(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Parses HTTP ``Range`` header.
+
+    Note:
+        Only single byte ranges are supported, multiple ranges are ignored, so the whole file
+        will be sent, that's allowed by RFC 9110.
+
+    Args:
+        header (str, optional): ``Range`` header value.
+        size (int): File size.
+
+    Returns:
+        tuple: First and last byte positions, both inclusive, or None if the whole file must be sent.
+
+    Raises:
+        utils.streams.RangeNotSatisfiable: If range doesn't overlap the file.
+    """
+    if not header:
+        return None
+
+    match = RANGE_RE.match(header.strip())
+
+    if match is None:
+        return None
+
+    first, last = match.groups()
+
+    if not first and not last:
+        return None
+
+    if not first:
+        # Suffix range: last N bytes.
+        suffix_length: int = int(last)
+
+        if suffix_length == 0 or size == 0:
+            raise RangeNotSatisfiable()
+
+        return max(size - suffix_length, 0), size - 1
+
+    start: int = int(first)
+    end: int = int(last) if last else size - 1
+
+    if last and start > end:
+        return None
+
+    if start >= size:
+        raise RangeNotSatisfiable()
+
+    return start, min(end, size - 1)
+
+
+def iter_storage_range(
+        storage: Storage,
+        name: str,
+        start: int,
+        end: int,
+        chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[bytes]:
+    """Yields chunks of the stored file from ``start`` to ``end`` inclusive.
+
+    Args:
+        storage (django.core.files.storage.Storage): File storage.
+        name (str): File name in the storage.
+        start (int): First byte position.
+        end (int): Last byte position.
+        chunk_size (int, optional): Maximum chunk size.
+
+    Yields:
+        bytes: File chunk.
+    """
+    if isinstance(storage, S3Boto3Storage):
+        yield from _iter_s3_range(storage, name, start, end, chunk_size)
+    else:
+        yield from _iter_file_range(storage, name, start, end, chunk_size)
+
+
+def _iter_s3_range(storage: S3Boto3Storage, name: str, start: int, end: int, chunk_size: int) -> Iterator[bytes]:
+    response: dict = storage.connection.meta.client.get_object(
+        Bucket=storage.bucket_name,
+        Key=get_storage_key(storage, name),
+        Range='bytes=%d-%d' % (start, end),
+    )
+    body = response['Body']
+
+    try:
+        yield from body.iter_chunks(chunk_size)
+    finally:
+        body.close()
+
+
+def _iter_file_range(storage: Storage, name: str, start: int, end: int, chunk_size: int) -> Iterator[bytes]:
+    remaining: int = end - start + 1
+
+    with storage.open(name, 'rb') as file:
+        file.seek(start)
+
+        while remaining > 0:
+            chunk: bytes = file.read(min(chunk_size, remaining))
+
+            if not chunk:
+                break
+
+            remaining -= len(chunk)
+            yield chunk
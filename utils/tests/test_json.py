@@ -0,0 +1,32 @@
+import datetime
+from decimal import Decimal
+import json
+
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+
+from utils.json import dumps, FastJsonResponse
+
+
+class DumpsCase(SimpleTestCase):
+    def test_dumps(self):
+        data = {
+            'date': datetime.datetime(2023, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc),
+            'amount': Decimal('1.50'),
+            'label': gettext_lazy('File'),
+            1: [None, True],
+        }
+
+        self.assertEqual(
+            json.loads(dumps(data)),
+            {'date': '2023-01-02T03:04:05Z', 'amount': 1.5, 'label': 'File', '1': [None, True]}
+        )
+
+    def test_response(self):
+        response = FastJsonResponse({'status': 'DONE'})
+
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response.content, b'{"status":"DONE"}')
+
+        with self.assertRaises(TypeError):
+            FastJsonResponse([])
@@ -0,0 +1,36 @@
+import gc
+from unittest.mock import patch
+
+from django.template import engines
+from django.test import SimpleTestCase
+
+from utils.preload import parse_import_times, preload_app
+
+
+class PreloadAppCase(SimpleTestCase):
+    def test_preload_app(self):
+        engine = engines['django'].engine
+        engine.template_loaders[0].reset()
+
+        with patch.object(gc, 'freeze') as freeze:
+            timings = preload_app(freeze_heap=False)
+
+        freeze.assert_not_called()
+        self.assertEqual(list(timings), ['url_resolvers', 'templates', 'magic'])
+        self.assertIn('accounts/account.html', engine.template_loaders[0].get_template_cache)
+
+
+class ParseImportTimesCase(SimpleTestCase):
+    def test_parse_import_times(self):
+        report = '\n'.join([
+            'import time: self [us] | cumulative | imported package',
+            'import time:       120 |        120 |     _io',
+            'import time:        80 |        200 |   io',
+            'import time:      1500 |       1700 | django',
+            'Traceback is not a report line',
+        ])
+
+        self.assertEqual(
+            parse_import_times(report),
+            [('_io', 2, 120, 120), ('io', 1, 80, 200), ('django', 0, 1500, 1700)]
+        )
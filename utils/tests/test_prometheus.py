@@ -0,0 +1,75 @@
+import os
+import tempfile
+
+from django.test import SimpleTestCase
+
+from utils.json import dumps
+from utils.metrics import increment, observe_latency, reset_latency_counters
+from utils.prometheus import ARCHIVE_NAME, collect, render
+
+# Greater than the maximum pid of Linux.
+EXITED_PID = 2 ** 23
+
+
+class RenderCase(SimpleTestCase):
+    def setUp(self):
+        reset_latency_counters()
+        self.addCleanup(reset_latency_counters)
+
+    def test_render(self):
+        observe_latency('s3.GetObject', 0.02)
+        observe_latency('s3.GetObject', 20)
+        increment('upload.bytes', 7)
+
+        lines = render(collect()).splitlines()
+
+        self.assertIn('# TYPE bf_s3_duration_seconds histogram', lines)
+        self.assertIn('bf_s3_duration_seconds_bucket{name="GetObject",le="0.01"} 0', lines)
+        self.assertIn('bf_s3_duration_seconds_bucket{name="GetObject",le="0.025"} 1', lines)
+        self.assertIn('bf_s3_duration_seconds_bucket{name="GetObject",le="10.0"} 1', lines)
+        self.assertIn('bf_s3_duration_seconds_bucket{name="GetObject",le="+Inf"} 2', lines)
+        self.assertIn('bf_s3_duration_seconds_sum{name="GetObject"} 20.02', lines)
+        self.assertIn('bf_upload_bytes_total 7', lines)
+
+    def test_escape_labels(self):
+        observe_latency('http.say "hi"', 0.1)
+
+        self.assertIn('bf_http_duration_seconds_count{name="say \\"hi\\""} 1', render(collect()))
+
+
+class CollectCase(SimpleTestCase):
+    def setUp(self):
+        reset_latency_counters()
+        self.addCleanup(reset_latency_counters)
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def write_exited_snapshot(self, token, count):
+        snapshot = {
+            'latency': {'http.health': {'count': count, 'total': 0.5, 'avg': 0.5 / count, 'max': 0.3, 'buckets': []}},
+            'counters': {'upload.started': count},
+        }
+
+        with open(os.path.join(self.directory, 'metrics-%d-%s.json' % (EXITED_PID, token)), 'wb') as snapshot_file:
+            snapshot_file.write(dumps(snapshot))
+
+    def test_collect(self):
+        self.write_exited_snapshot('a1', 2)
+        self.write_exited_snapshot('b2', 3)
+        observe_latency('http.health', 0.4)
+        increment('upload.started')
+
+        snapshot = collect(self.directory)
+
+        self.assertEqual(snapshot['counters'], {'upload.started': 6})
+        self.assertEqual(snapshot['latency']['http.health']['count'], 6)
+        self.assertEqual(snapshot['latency']['http.health']['max'], 0.4)
+        filenames = [filename for filename in os.listdir(self.directory) if filename.endswith('.json')]
+        self.assertEqual(len(filenames), 2)
+        self.assertIn(ARCHIVE_NAME, filenames)
+        self.assertFalse([filename for filename in filenames if str(EXITED_PID) in filename])
+
+        # Archived snapshots are counted once.
+        self.assertEqual(collect(self.directory)['counters'], {'upload.started': 6})
@@ -0,0 +1,42 @@
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.test import SimpleTestCase
+
+from utils.streams import iter_storage_range, parse_range_header, RangeNotSatisfiable
+
+
+class ParseRangeHeaderCase(SimpleTestCase):
+    def test_ranges(self):
+        self.assertEqual(parse_range_header('bytes=0-9', 100), (0, 9))
+        self.assertEqual(parse_range_header('bytes=90-', 100), (90, 99))
+        self.assertEqual(parse_range_header('bytes=-10', 100), (90, 99))
+        self.assertEqual(parse_range_header('bytes=-1000', 100), (0, 99))
+        self.assertEqual(parse_range_header('bytes=50-1000', 100), (50, 99))
+
+    def test_ignored(self):
+        self.assertIsNone(parse_range_header(None, 100))
+        self.assertIsNone(parse_range_header('bytes=0-1,5-6', 100))
+        self.assertIsNone(parse_range_header('items=0-1', 100))
+        self.assertIsNone(parse_range_header('bytes=-', 100))
+        self.assertIsNone(parse_range_header('bytes=9-1', 100))
+
+    def test_not_satisfiable(self):
+        with self.assertRaises(RangeNotSatisfiable):
+            parse_range_header('bytes=100-', 100)
+
+        with self.assertRaises(RangeNotSatisfiable):
+            parse_range_header('bytes=-0', 100)
+
+
+class IterStorageRangeCase(SimpleTestCase):
+    def test_file_system_storage(self):
+        with tempfile.TemporaryDirectory() as location:
+            storage = FileSystemStorage(location=location)
+            name = storage.save('file.bin', ContentFile(bytes(range(256))))
+
+            chunks = list(iter_storage_range(storage, name, 10, 109, chunk_size=32))
+
+        self.assertEqual([len(chunk) for chunk in chunks], [32, 32, 32, 4])
+        self.assertEqual(b''.join(chunks), bytes(range(10, 110)))